@@ -0,0 +1,151 @@
+"""
+JWT settings, verification and the verified-token cache.
+
+Key material and algorithm are read from the environment once (`load_auth_settings`,
+called at startup) instead of on every call. Access tokens that passed signature
+verification are remembered in a bounded LRU keyed by the SHA-256 digest of the
+token, so a client sending the same bearer token again skips the signature check
+until the token expires or the cache entry's TTL runs out.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+import jwt
+from pydantic import BaseModel
+
+
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", 300))
+
+
+@dataclass(frozen=True)
+class AuthSettings:
+    algorithm: str
+    signing_key: Any
+    verify_key: Any
+    refresh_signing_key: Any
+    refresh_verify_key: Any
+    access_token_expire_minutes: int
+
+
+class TokenClaims(BaseModel):
+    sub: str
+    un: Optional[str] = None
+    rl: Optional[str] = None
+    exp: int
+
+
+def _prepare(algorithm: str, key: Optional[str]):
+    # Parse the key once (PEM parsing is expensive for RS*/ES*)
+    if key is None:
+        return None
+    algorithms = jwt.algorithms.get_default_algorithms()
+    if algorithm not in algorithms:
+        raise ValueError(f"Unknown ALGORITHM '{algorithm}', expected one of {', '.join(sorted(algorithms))}")
+    return algorithms[algorithm].prepare_key(key)
+
+
+# RSA, RSA-PSS, ECDSA and EdDSA sign with a private key and verify with a public one
+_ASYMMETRIC_PREFIXES = ("RS", "PS", "ES", "EdDSA")
+
+_settings: Optional[AuthSettings] = None
+
+
+def load_auth_settings() -> AuthSettings:
+    global _settings
+    algorithm = os.getenv("ALGORITHM", "HS256")
+    secret = os.getenv("JWT_SECRET_KEY")
+    refresh_secret = os.getenv("JWT_REFRESH_SECRET_KEY") or secret
+    # Asymmetric algorithms verify with the public key, HMAC with the secret itself
+    if algorithm.startswith(_ASYMMETRIC_PREFIXES) and not os.getenv("JWT_PUBLIC_KEY"):
+        raise ValueError(f"ALGORITHM '{algorithm}' verifies with a public key, set JWT_PUBLIC_KEY")
+    public_key = os.getenv("JWT_PUBLIC_KEY") or secret
+    refresh_public_key = os.getenv("JWT_REFRESH_PUBLIC_KEY") or os.getenv("JWT_PUBLIC_KEY") or refresh_secret
+
+    _settings = AuthSettings(
+        algorithm=algorithm,
+        signing_key=_prepare(algorithm, secret),
+        verify_key=_prepare(algorithm, public_key),
+        refresh_signing_key=_prepare(algorithm, refresh_secret),
+        refresh_verify_key=_prepare(algorithm, refresh_public_key),
+        access_token_expire_minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 600)),
+    )
+    _token_cache.clear()
+    return _settings
+
+
+def get_auth_settings() -> AuthSettings:
+    return _settings or load_auth_settings()
+
+
+class VerifiedTokenCache:
+    """LRU of token digest -> (claims, evict_at). A size of 0 disables it."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[TokenClaims, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes) -> Optional[TokenClaims]:
+        if not self.maxsize:
+            return None
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            claims, evict_at = entry
+            if time.time() >= evict_at:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def set(self, digest: bytes, claims: TokenClaims):
+        if not self.maxsize:
+            return
+        # Never serve a token past its own expiry
+        evict_at = min(time.time() + self.ttl, claims.exp)
+        with self._lock:
+            self._entries[digest] = (claims, evict_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_token_cache = VerifiedTokenCache(JWT_CACHE_SIZE, JWT_CACHE_TTL)
+
+
+def decode_access_token(token: str) -> TokenClaims:
+    """
+    Verified claims of an access token.
+    Raises jwt.PyJWTError (or pydantic.ValidationError for malformed claims).
+    """
+    if not isinstance(token, str) or not token:
+        # No bearer header: the scheme is auto_error=False and passes None
+        raise jwt.exceptions.DecodeError("No token")
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = _token_cache.get(digest)
+    if claims is not None:
+        return claims
+
+    settings = get_auth_settings()
+    payload = jwt.decode(token, settings.verify_key, algorithms=[settings.algorithm])
+    claims = TokenClaims(**payload)
+    _token_cache.set(digest, claims)
+    return claims
+
+
+def decode_refresh_token(token: str) -> TokenClaims:
+    settings = get_auth_settings()
+    payload = jwt.decode(token, settings.refresh_verify_key, algorithms=[settings.algorithm])
+    return TokenClaims(**payload)
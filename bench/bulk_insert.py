@@ -0,0 +1,92 @@
+"""
+Rows per second of POST /project-experience/bulk vs one POST per row.
+
+Each run starts from a freshly seeded database in its own interpreter. The
+single-row baseline times `--single` requests and extrapolates to `--rows`:
+
+    python bench/bulk_insert.py --rows 100000
+    python bench/bulk_insert.py --rows 100000 --batch-size 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+
+
+def item(i: int) -> dict:
+    return {
+        "no_sales_order": f"SO-B{i:08d}", "customer_name": f"Customer {i % 5000}", "project_name": f"Project {i}",
+        "project_year": str(2000 + i % 25), "category": f"Category {i % 12}", "consulting_manager_id": i % 50 + 1,
+    }
+
+
+async def measure(rows: int, single: int, batch_size: int):
+    import httpx
+    from database import async_engine, engine
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=600) as client:
+        start = time.perf_counter()
+        for i in range(single):
+            response = await client.post("/project-experience/", json=item(i))
+            assert response.status_code == 200, response.text
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post(
+            f"/project-experience/bulk?batch_size={batch_size}", json=[item(i) for i in range(rows)]
+        )
+        bulk_elapsed = time.perf_counter() - start
+        assert response.status_code == 200 and response.json()["inserted"] == rows, response.text
+
+    # No lifespan here: close the pooled connections (aiosqlite threads) ourselves
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+    return {
+        "rows": rows,
+        "single_rows_per_s": round(single / single_elapsed, 1),
+        "single_extrapolated_s": round(single_elapsed / single * rows, 1),
+        "bulk_rows_per_s": round(rows / bulk_elapsed, 1),
+        "bulk_s": round(bulk_elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--single", type=int, default=1000, help="single-row requests timed for the baseline")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(asyncio.run(measure(args.rows, args.single, args.batch_size))))
+        return
+
+    for mode in ("false", "true"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            seed(path, 0)
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", DB_ASYNC=mode)
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", "--rows", str(args.rows), "--single", str(args.single),
+                 "--batch-size", str(args.batch_size)],
+                env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            print(json.dumps({"db_async": mode == "true", **json.loads(out)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Dashboard burst: many identical GETs at once, with and without coalescing.
+
+Fires `--concurrency` identical requests together for each dashboard URL,
+`--bursts` times, and reports SQL statements executed, wall time per burst
+and the coalescing counters. Each mode runs in a fresh interpreter
+(COALESCE_ENABLED is read at import):
+
+    python bench/coalescing.py --rows 100000 --concurrency 50
+    python bench/coalescing.py --cache-ttl 0.5      # with the micro-cache
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+
+DASHBOARD = [
+    ("/project-experience/", "skip=0&limit=10"),
+    ("/consulting-manager/", ""),
+    ("/project-experience/stats", ""),
+]
+
+
+async def measure(concurrency: int, bursts: int) -> dict:
+    from sqlalchemy import event
+
+    from database import async_engine, engine
+    from main import app
+    from request_coalescing import single_flight
+    from suite import call, start_lifespan
+
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(async_engine.sync_engine if async_engine is not None else engine, "before_cursor_execute", count)
+    shutdown = await start_lifespan(app)
+
+    timings = []
+    for _ in range(bursts):
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            call(app, "GET", path, query) for path, query in DASHBOARD for _ in range(concurrency)
+        ])
+        timings.append(time.perf_counter() - start)
+        assert all(status == 200 for status, _ in results), results
+
+    await shutdown()
+    return {
+        "requests": bursts * concurrency * len(DASHBOARD),
+        "statements": statements[0],
+        "burst_ms": round(statistics.median(timings) * 1000, 1),
+        **single_flight.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--cache-ttl", type=float, default=0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+        print(json.dumps(asyncio.run(measure(args.concurrency, args.bursts))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.rows)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", LOG_LEVEL="WARNING",
+                   COALESCE_CACHE_TTL=str(args.cache_ttl), ETAG_ENABLED="false")
+        subprocess.run([sys.executable, "-m", "migrations", "upgrade"], env=env, cwd=ROOT, check=True,
+                       capture_output=True)
+        for enabled in ("false", "true"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", "--concurrency", str(args.concurrency),
+                 "--bursts", str(args.bursts)],
+                env=dict(env, COALESCE_ENABLED=enabled), cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            print(json.dumps({"coalesce": enabled == "true", **json.loads(out)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold start: import time, startup time and time to first response, each
+measured in a fresh interpreter, as a new Cloud Run instance would pay them.
+
+Every run starts a new `python` that times `import main`, the lifespan
+startup and one in-process GET, and reports them. The database is seeded and
+migrated once beforehand, so the runs measure a deployed instance, not the
+first deploy. Runs with AUTO_MIGRATE on (check the version at startup) and
+off (migrations as a deploy step):
+
+    python bench/cold_start.py --runs 15
+    python bench/cold_start.py --runs 15 --budget-ms 800   # exit 1 when over budget, for CI
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_REQUEST = ("/project-experience/", "limit=50")
+
+
+async def child():
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from main import app
+    imported = time.perf_counter()
+
+    # Timed part is over: the helpers' own imports do not count
+    sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+    from suite import call, start_lifespan
+
+    started = time.perf_counter()
+    shutdown = await start_lifespan(app)
+    ready = time.perf_counter()
+    status, _ = await call(app, "GET", *FIRST_REQUEST)
+    answered = time.perf_counter()
+    assert status == 200, status
+    await shutdown()
+
+    print(json.dumps({
+        "import_s": imported - start,
+        "startup_s": ready - started,
+        "first_request_s": answered - ready,
+        "modules": len(sys.modules),
+    }))
+
+
+def run_mode(env: dict, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child"], env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1]
+        samples.append(json.loads(out))
+
+    result = {
+        key: round(statistics.median(sample[key] for sample in samples) * 1000, 1)
+        for key in ("import_s", "startup_s", "first_request_s")
+    }
+    result = {key.replace("_s", "_ms"): value for key, value in result.items()}
+    result["total_ms"] = round(statistics.median(
+        sample["import_s"] + sample["startup_s"] + sample["first_request_s"] for sample in samples
+    ) * 1000, 1)
+    result["modules"] = samples[-1]["modules"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=15, help="fresh interpreters per mode")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when a median total is above this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child())
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from datagen import seed
+
+    over_budget = False
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.rows)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", LOG_LEVEL="WARNING")
+        subprocess.run([sys.executable, "-m", "migrations", "upgrade"], env=env, cwd=ROOT, check=True,
+                       capture_output=True)
+
+        for auto_migrate in ("true", "false"):
+            result = run_mode(dict(env, AUTO_MIGRATE=auto_migrate), args.runs)
+            over = args.budget_ms is not None and result["total_ms"] > args.budget_ms
+            over_budget = over_budget or over
+            print(json.dumps({"auto_migrate": auto_migrate == "true", **result,
+                              **({"over_budget": over} if args.budget_ms is not None else {})}))
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
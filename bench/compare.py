@@ -0,0 +1,60 @@
+"""
+Compare two bench/suite.py result files.
+
+Prints p50/p99 per backend and scenario with the relative change, and exits
+with status 1 when any p50 got slower by more than --threshold percent:
+
+    python bench/compare.py results/base.json results/new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p50 slowdown in percent")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"base {base['meta']['revision'][:12]}  new {new['meta']['revision'][:12]}")
+    if base["meta"]["rows"] != new["meta"]["rows"] or base["meta"]["seed"] != new["meta"]["seed"]:
+        print("warning: runs used different --rows/--seed, numbers are not comparable")
+
+    regressions = []
+    for backend, results in new["backends"].items():
+        before = base["backends"].get(backend, {}).get("results")
+        if "results" not in results or not before:
+            continue
+
+        print(f"\n{backend}")
+        print(f"  {'scenario':<18}{'p50 base':>10}{'p50 new':>10}{'change':>9}{'p99 base':>10}{'p99 new':>10}{'change':>9}")
+        for scenario, after in results["results"].items():
+            if scenario not in before:
+                continue
+            p50 = change(before[scenario]["p50_ms"], after["p50_ms"])
+            p99 = change(before[scenario]["p99_ms"], after["p99_ms"])
+            print(
+                f"  {scenario:<18}{before[scenario]['p50_ms']:>10.2f}{after['p50_ms']:>10.2f}{p50:>+8.1f}%"
+                f"{before[scenario]['p99_ms']:>10.2f}{after['p99_ms']:>10.2f}{p99:>+8.1f}%"
+            )
+            if p50 > args.threshold:
+                regressions.append(f"{backend}/{scenario}")
+
+    if regressions:
+        print(f"\np50 regressions over {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Seeded synthetic data for users, consulting_managers and project_experience.
+
+The same `--seed` and counts always produce the same rows, so results from
+different commits are comparable. Works on any SQLAlchemy URL; the schema is
+created from the app's models, then migrated to the latest version.
+
+    python bench/datagen.py sqlite:////tmp/bench.db --experiences 1000000
+    python bench/datagen.py postgresql://user:pw@localhost/bench --experiences 10000000 --reset
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEPARTMENTS = ["Consulting", "Advisory", "Audit", "Tax", "Technology", "Risk", "Strategy", "Operations"]
+ADJECTIVES = ["Agile", "Digital", "Global", "Lean", "Smart", "Cloud", "Data", "Green", "Secure", "Rapid"]
+NOUNS = ["Migration", "Rollout", "Assessment", "Platform", "Transformation", "Review", "Upgrade", "Audit"]
+
+# Every generated user logs in with this password
+BENCH_PASSWORD = "bench-password"
+
+BATCH_SIZE = 20_000
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def _models(database_url: str):
+    # The models bind to `database`, which needs a DATABASE_URL at import time;
+    # only their metadata is used here, on a separate engine
+    os.environ.setdefault("DATABASE_URL", database_url)
+    if ROOT not in sys.path:
+        sys.path.append(ROOT)
+    from database import Base
+    from models.ConsManager import ConsultingManager
+    from models.ProjExperience import ProjectExperience
+    from models.User import User
+    return Base, User, ConsultingManager, ProjectExperience
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(
+    database_url: str,
+    experiences: int,
+    managers: int = 50,
+    users: int = 0,
+    seed: int = 42,
+    reset: bool = False,
+) -> dict:
+    """Create the schema and insert the requested number of rows. Returns the counts and timing."""
+    Base, User, ConsultingManager, ProjectExperience = _models(database_url)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+
+    engine = create_engine(database_url)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def fast_load(dbapi_connection, connection_record):
+            # Throwaway data: skip the journal and fsyncs while loading
+            dbapi_connection.execute("PRAGMA journal_mode=OFF")
+            dbapi_connection.execute("PRAGMA synchronous=OFF")
+
+    if reset:
+        from migrations import schema_migrations
+        Base.metadata.drop_all(engine)
+        schema_migrations.drop(engine, checkfirst=True)
+    Base.metadata.create_all(engine)
+
+    def manager_rows():
+        for i in range(managers):
+            yield {
+                "name": f"Manager {i}",
+                "email": f"manager{i}@example.com",
+                "department_name": rng.choice(DEPARTMENTS),
+                "created_at": BASE_TIME - timedelta(days=rng.randrange(3650)),
+            }
+
+    def user_rows():
+        from utils import get_hashed_password
+        password = get_hashed_password(BENCH_PASSWORD)
+        for i in range(users):
+            yield {
+                "username": f"user{i}",
+                "name": f"User {i}",
+                "password": password,
+                "email": f"user{i}@example.com",
+                "department_name": rng.choice(DEPARTMENTS),
+                "created_at": BASE_TIME - timedelta(days=rng.randrange(3650)),
+            }
+
+    def experience_rows():
+        for i in range(experiences):
+            yield {
+                "no_sales_order": f"SO-{i:08d}",
+                "customer_name": f"Customer {rng.randrange(5000)}",
+                "project_name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} Project {i}",
+                "project_year": str(2000 + rng.randrange(25)),
+                "category": f"Category {rng.randrange(12)}",
+                "consulting_manager_id": rng.randint(1, managers) if managers and rng.random() > 0.05 else None,
+                "created_at": BASE_TIME - timedelta(minutes=rng.randrange(5_000_000)),
+            }
+
+    with engine.begin() as connection:
+        for model, rows in (
+            (ConsultingManager, manager_rows()),
+            (User, user_rows() if users else ()),
+            (ProjectExperience, experience_rows()),
+        ):
+            for batch in _batches(rows):
+                connection.execute(insert(model), batch)
+
+    # Then the deploy step: search indexes, summary counts, ... from the rows
+    from migrations import upgrade
+    upgrade(engine)
+
+    engine.dispose()
+    return {
+        "managers": managers,
+        "users": users,
+        "experiences": experiences,
+        "seed": seed,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def seed(path: str, rows: int):
+    """SQLite file with 50 managers ("Manager 0".."Manager 49") and `rows` project experiences."""
+    generate(f"sqlite:///{path}", experiences=rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("database_url")
+    parser.add_argument("--experiences", type=int, default=100_000)
+    parser.add_argument("--managers", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop the app tables first")
+    args = parser.parse_args()
+
+    print(json.dumps(generate(
+        args.database_url, args.experiences, args.managers, args.users, args.seed, args.reset
+    )))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Bytes and CPU saved by conditional GETs under dashboard-style polling.
+
+Polls a few list and detail endpoints in-process, once as a client that
+ignores ETags and once as a client that sends If-None-Match with the last
+tag it got. `--write-every N` creates a project experience every N polls so
+the conditional client sees some misses:
+
+    python bench/etag_polling.py --rows 100000 --polls 2000
+    python bench/etag_polling.py --rows 100000 --polls 2000 --write-every 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+
+ENDPOINTS = {
+    "experiences_page": ("/project-experience/", "limit=50"),
+    "experiences_search": ("/project-experience/", "search=Agile&limit=50"),
+    "managers_page": ("/consulting-manager/", "limit=50"),
+    "manager_detail": ("/consulting-manager/7", ""),
+}
+
+NEW_EXPERIENCE = json.dumps({
+    "no_sales_order": "SO-POLL", "customer_name": "Poll Customer", "project_name": "Poll Project",
+    "project_year": "2025", "category": "Poll", "consulting_manager_id": 1,
+}).encode()
+
+
+async def call(app, method: str, path: str, query: str = "", body: bytes = b"", headers=()):
+    """One in-process HTTP request. Returns (status, headers, body size)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"content-type", b"application/json"), *headers],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": None, "headers": {}, "size": 0}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message["headers"])
+        elif message["type"] == "http.response.body":
+            response["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["size"]
+
+
+async def poll(app, path: str, query: str, polls: int, conditional: bool, write_every: int) -> dict:
+    etag = None
+    latencies, sent, not_modified = [], 0, 0
+    cpu_start = time.process_time()
+    for i in range(polls):
+        if write_every and i and i % write_every == 0:
+            await call(app, "POST", "/project-experience/", body=NEW_EXPERIENCE)
+
+        headers = [(b"if-none-match", etag)] if conditional and etag else []
+        start = time.perf_counter()
+        status, response_headers, size = await call(app, "GET", path, query, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert status in (200, 304), status
+
+        sent += size
+        not_modified += status == 304
+        etag = response_headers.get(b"etag", etag)
+    cpu = time.process_time() - cpu_start
+
+    latencies.sort()
+    return {
+        "bytes_per_poll": round(sent / polls),
+        "cpu_us_per_poll": round(cpu / polls * 1e6, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "not_modified": round(not_modified / polls, 3),
+    }
+
+
+async def measure(polls: int, write_every: int) -> dict:
+    from database import async_engine, engine
+    from main import app
+
+    results = {}
+    for name, (path, query) in ENDPOINTS.items():
+        results[name] = {
+            mode: await poll(app, path, query, polls, mode == "if_none_match", write_every)
+            for mode in ("unconditional", "if_none_match")
+        }
+
+    # No lifespan here: close the pooled connections (aiosqlite threads) ourselves
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--polls", type=int, default=2000, help="requests per endpoint and mode")
+    parser.add_argument("--write-every", type=int, default=0, help="insert a row every N polls, 0 = never")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(asyncio.run(measure(args.polls, args.write_every))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.rows)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", LOG_LEVEL="WARNING")
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--polls", str(args.polls), "--write-every", str(args.write_every)],
+            env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1]
+
+    for name, modes in json.loads(out).items():
+        print(json.dumps({"endpoint": name, **{f"{mode}_{key}": value for mode, stats in modes.items()
+                                               for key, value in stats.items()}}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Time-to-first-byte and peak RSS of GET /project-experience/export/xlsx.
+
+Each size runs in a fresh interpreter so ru_maxrss is not polluted by the
+previous run:
+
+    python bench/export_xlsx.py                 # 10k, 100k, 1M rows
+    python bench/export_xlsx.py --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+
+
+async def measure():
+    from main import app
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats = {"first_byte": None, "bytes": 0}
+    start = time.perf_counter()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if stats["first_byte"] is None:
+                stats["first_byte"] = time.perf_counter() - start
+            stats["bytes"] += len(message["body"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/project-experience/export/xlsx", "raw_path": b"/project-experience/export/xlsx",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    await app(scope, receive, send)
+
+    return {
+        "ttfb_ms": round(stats["first_byte"] * 1000, 1),
+        "total_ms": round((time.perf_counter() - start) * 1000, 1),
+        "bytes": stats["bytes"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(asyncio.run(measure())))
+        return
+
+    for rows in args.rows or [10_000, 100_000, 1_000_000]:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            seed(path, rows)
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+            out = subprocess.run(
+                [sys.executable, __file__, "--child"],
+                env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            print(json.dumps({"rows": rows, **json.loads(out)}))
+
+
+if __name__ == "__main__":
+    main()
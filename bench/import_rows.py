@@ -0,0 +1,139 @@
+"""
+Rows per second and peak RSS of POST /project-experience/import.
+
+Writes an XLSX and a CSV file in the export layout, then imports each into a
+freshly seeded database in its own interpreter (so ru_maxrss is per run):
+
+    python bench/import_rows.py                  # 500k rows
+    python bench/import_rows.py --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The repo root goes first so its modules win over same-named bench scripts
+sys.path.insert(0, ROOT)
+
+from datagen import seed  # noqa: E402
+from export_formats import ExportFormat, open_writer  # noqa: E402
+
+HEADERS = ["ID", "No Sales Order", "Customer Name", "Project Name", "Project Year", "Category", "Consulting Manager"]
+
+
+def sheet_rows(rows: int):
+    for i in range(rows):
+        yield ("", f"SO-{i:08d}", f"Customer {i % 5000}", f"Project {i}", str(2000 + i % 25),
+               f"Category {i % 12}", f"Manager {i % 50}")
+
+
+def write_file(directory: str, export_format: ExportFormat, rows: int, chunk_rows: int = 10_000) -> str:
+    # Same writers as the export endpoints, so the files have the export layout
+    path = os.path.join(directory, f"import.{export_format.value}")
+    writer = open_writer(export_format, HEADERS, HEADERS)
+    chunk = []
+    with open(path, "wb") as f:
+        f.write(writer.start())
+        for row in sheet_rows(rows):
+            chunk.append(row)
+            if len(chunk) == chunk_rows:
+                f.write(writer.write_rows(chunk))
+                chunk = []
+        f.write(writer.write_rows(chunk))
+        f.write(writer.finish())
+    return path
+
+
+def write_files(directory: str, rows: int):
+    return {export_format.value: write_file(directory, export_format, rows)
+            for export_format in (ExportFormat.xlsx, ExportFormat.csv)}
+
+
+def iter_body(prefix: bytes, path: str):
+    # Feed the upload in 1 MiB messages so the client side does not hold the file
+    yield prefix
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            yield chunk
+    yield b"\r\n--bench--\r\n"
+
+
+async def measure(path: str):
+    from main import app
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    body_prefix = (
+        b"--bench\r\nContent-Disposition: form-data; name=\"file\"; filename=\""
+        + os.path.basename(path).encode() + b"\"\r\nContent-Type: application/octet-stream\r\n\r\n"
+    )
+    messages = iter_body(body_prefix, path)
+    result = {}
+
+    async def receive():
+        body = next(messages, None)
+        if body is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": body, "more_body": True}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            result["body"] = result.get("body", b"") + message.get("body", b"")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/project-experience/import", "raw_path": b"/project-experience/import",
+        "query_string": b"", "headers": [(b"content-type", b"multipart/form-data; boundary=bench")],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - start
+
+    assert result["status"] == 200, result
+    summary = json.loads(result["body"])
+    return {
+        "inserted": summary["inserted"],
+        "errored": summary["errored"],
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(summary["inserted"] / elapsed, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.child))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = write_files(tmp, args.rows)
+        for file_format, path in files.items():
+            database = os.path.join(tmp, f"{file_format}.db")
+            seed(database, 0)
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", path],
+                env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1]
+            print(json.dumps({
+                "format": file_format, "rows": args.rows, "file_mb": round(os.path.getsize(path) / 2**20, 1),
+                **json.loads(out),
+            }))
+
+
+if __name__ == "__main__":
+    main()
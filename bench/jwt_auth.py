@@ -0,0 +1,88 @@
+"""
+Cost of bearer-token verification with the verified-token cache on and off.
+
+Reports raw decode_access_token() calls per second and in-process requests per
+second against a route protected by `verify_access_token`:
+
+    python bench/jwt_auth.py --seconds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-at-least-32-bytes")
+os.environ.setdefault("JWT_REFRESH_SECRET_KEY", "bench-refresh-key-with-at-least-32-bytes")
+
+from fastapi import Depends, FastAPI  # noqa: E402
+
+import auth  # noqa: E402
+from dependencies import verify_access_token  # noqa: E402
+from utils import create_access_token  # noqa: E402
+
+
+def decode_rate(token: str, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            auth.decode_access_token(token)
+        calls += 100
+    return calls / seconds
+
+
+async def request_rate(app: FastAPI, token: str, seconds: float) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/me", "raw_path": b"/me", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    requests = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        await app(dict(scope), receive, send)
+        requests += 1
+    return requests / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(claims: auth.TokenClaims = Depends(verify_access_token)):
+        return {"username": claims.un}
+
+    auth.load_auth_settings()
+    token = create_access_token(1, "", "bench")
+    cache_size = auth._token_cache.maxsize
+
+    for enabled in (False, True):
+        auth._token_cache.maxsize = cache_size if enabled else 0
+        auth._token_cache.clear()
+        print(json.dumps({
+            "cache": enabled,
+            "decodes_per_s": round(decode_rate(token, args.seconds)),
+            "requests_per_s": round(asyncio.run(request_rate(app, token, args.seconds))),
+        }))
+
+
+if __name__ == "__main__":
+    main()
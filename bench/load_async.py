@@ -0,0 +1,115 @@
+"""
+Throughput and latency of the API in sync (threadpool) vs async (DB_ASYNC) mode.
+
+Starts one uvicorn worker per mode on a seeded database and fires requests
+from `--concurrency` concurrent clients:
+
+    python bench/load_async.py --concurrency 200 --requests 5000
+    python bench/load_async.py --database-url postgresql://user:pw@localhost/bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+
+PATHS = [
+    "/project-experience/?skip=0&limit=10",
+    "/project-experience/?skip=5000&limit=10",
+    "/consulting-manager/7",
+    "/users/?limit=10",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(base_url: str):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                await client.get("/consulting-manager/1")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def load(base_url: str, concurrency: int, total: int):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start = time.perf_counter()
+                response = await client.get(PATHS[i % len(PATHS)])
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--database-url", help="use an existing, already seeded database instead of SQLite")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        if not database_url:
+            path = os.path.join(tmp, "bench.db")
+            seed(path, args.rows)
+            database_url = f"sqlite:///{path}"
+
+        for mode in ("false", "true"):
+            port = free_port()
+            env = dict(os.environ, DATABASE_URL=database_url, DB_ASYNC=mode)
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                asyncio.run(wait_ready(base_url))
+                result = asyncio.run(load(base_url, args.concurrency, args.requests))
+                print(json.dumps({"db_async": mode == "true", "concurrency": args.concurrency, **result}))
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Login throughput and latency of unrelated GETs during a login storm.
+
+Runs the server with password hashing inline (PASSWORD_HASH_WORKERS=0, threadpool
+of the web worker) and with the process pool, then for `--seconds` keeps
+`--concurrency` clients logging in while one client polls GET /consulting-manager/1:
+
+    python bench/login_storm.py --concurrency 64 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+from load_async import free_port, wait_ready  # noqa: E402
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return round(samples[max(int(len(samples) * q) - 1, 0)] * 1000, 1)
+
+
+async def storm(base_url: str, concurrency: int, seconds: float):
+    credentials = {"username": "bench", "password": "bench-password"}
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await client.post("/users/", json={**credentials, "name": "Bench", "email": "bench@example.com"})
+
+        deadline = time.perf_counter() + seconds
+        logins = {"ok": 0, "rejected": 0, "latency": []}
+        probes = []
+
+        async def login_worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/users/login", json=credentials)
+                if response.status_code == 200:
+                    logins["ok"] += 1
+                    logins["latency"].append(time.perf_counter() - start)
+                elif response.status_code == 503:
+                    logins["rejected"] += 1
+                    await asyncio.sleep(0.05)
+
+        async def probe():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get("/consulting-manager/1")
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *[login_worker() for _ in range(concurrency)])
+
+    return {
+        "logins_per_s": round(logins["ok"] / seconds, 1),
+        "rejected_503": logins["rejected"],
+        "login_p99_ms": percentile(logins["latency"], 0.99) if logins["latency"] else None,
+        "get_p50_ms": percentile(probes, 0.5),
+        "get_p99_ms": percentile(probes, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, 1000)
+
+        for workers in (0, args.workers):
+            port = free_port()
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{path}",
+                PASSWORD_HASH_WORKERS=str(workers),
+                PASSWORD_HASH_MAX_PENDING=str(args.concurrency * 2),
+            )
+            server = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                asyncio.run(wait_ready(base_url))
+                result = asyncio.run(storm(base_url, args.concurrency, args.seconds))
+                print(json.dumps({"hash_workers": workers, "concurrency": args.concurrency, **result}))
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-request cost of MetricsMiddleware.
+
+Times a bare ASGI app and a small FastAPI app (one included router, a path
+parameter) called in-process, with and without the middleware, and reports
+the difference in microseconds per request:
+
+    python bench/metrics_overhead.py --requests 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi import APIRouter, FastAPI  # noqa: E402
+
+from request_metrics import MetricsMiddleware, RequestMetrics  # noqa: E402
+
+SCOPE = {
+    "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+    "scheme": "http", "path": "/items/42", "raw_path": b"/items/42", "query_string": b"", "headers": [],
+    "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80), "root_path": "",
+}
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def fastapi_app():
+    router = APIRouter()
+
+    @router.get("/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/items")
+    return app
+
+
+async def per_request_us(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(1000):
+        await app(dict(SCOPE), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for name, app in (("bare_asgi", bare_app), ("fastapi_route", fastapi_app())):
+        off = asyncio.run(per_request_us(app, args.requests))
+        on = asyncio.run(per_request_us(MetricsMiddleware(app, RequestMetrics()), args.requests))
+        print(json.dumps({
+            "app": name,
+            "off_us": round(off, 2),
+            "on_us": round(on, 2),
+            "overhead_us": round(on - off, 2),
+        }))
+
+
+if __name__ == "__main__":
+    main()
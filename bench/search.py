@@ -0,0 +1,71 @@
+"""
+ILIKE scan vs trigram-indexed search on project_experience.project_name.
+
+    python bench/search.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from datagen import seed  # noqa: E402
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, round(statistics.median(samples) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.rows)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+        from database import SessionLocal, engine
+        from migrations import upgrade
+        from models.ProjExperience import ProjectExperience
+        from search import _fts_tables, load_search_indexes, search_filter
+
+        # seed() already migrated (the trigram indexes come from migration 0002);
+        # upgrading again is a no-op, like a repeated deploy step
+        upgrade(engine)
+        load_search_indexes(engine)
+        print(json.dumps({"rows": args.rows, "trigram_index": "project_experience" in _fts_tables}))
+
+        db = SessionLocal()
+        for term in ["Project 12345", "ject 99", "777", "nothing-matches"]:
+            ilike = db.query(ProjectExperience).filter(ProjectExperience.project_name.ilike(f"%{term}%"))
+            indexed = db.query(ProjectExperience).filter(search_filter(ProjectExperience, term))
+
+            ilike_ids, ilike_page = timed(lambda: [p.id for p in ilike.order_by(ProjectExperience.id).limit(50)], args.repeat)
+            indexed_ids, indexed_page = timed(lambda: [p.id for p in indexed.order_by(ProjectExperience.id).limit(50)], args.repeat)
+            ilike_total, ilike_count = timed(ilike.count, args.repeat)
+            indexed_total, indexed_count = timed(indexed.count, args.repeat)
+
+            assert ilike_ids == indexed_ids and ilike_total == indexed_total, term
+            print(json.dumps({
+                "term": term, "matches": ilike_total,
+                "ilike_page_ms": ilike_page, "indexed_page_ms": indexed_page,
+                "ilike_count_ms": ilike_count, "indexed_count_ms": indexed_count,
+            }))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
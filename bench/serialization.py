@@ -0,0 +1,109 @@
+"""
+Time to fetch and serialize 1000 rows of users, managers and project
+experiences, per list rendering pipeline:
+
+- orm_jsonable: ORM objects -> PaginatedResponse[...] -> jsonable_encoder ->
+  json.dumps (what FastAPI does with a response_model before the
+  pydantic-core fast path, or with a custom response class)
+- orm_dump_json: ORM objects -> PaginatedResponse[...] -> model_dump_json
+  (FastAPI's fast path for a response_model with the default response class)
+- rows_page_json: column rows -> dicts -> fast_json.page_json (the list routes)
+
+    python bench/serialization.py --rows 1000 --repeat 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import generate  # noqa: E402
+
+
+def median_time(fn, repeat: int) -> float:
+    """Median seconds of `repeat` calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    generate(url, experiences=args.rows, managers=args.rows, users=args.rows)
+
+    sys.path.insert(0, ROOT)
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    import fast_json
+    from database import SessionLocal
+    from fieldsets import field_columns, schema_fields
+    from models.ConsManager import ConsultingManager
+    from models.ProjExperience import ProjectExperience
+    from models.User import User
+    from schemas.ConsManagerSchema import ConsultingManagerResponse
+    from schemas.PaginatedResponseSchemas import PaginatedResponse
+    from schemas.ProjManagerSchema import ProjectExperienceResponse
+    from schemas.UserSchemas import UserOut
+
+    print(json.dumps({"orjson": fast_json.orjson is not None}))
+    for name, model, schema in (
+        ("users", User, UserOut),
+        ("managers", ConsultingManager, ConsultingManagerResponse),
+        ("experiences", ProjectExperience, ProjectExperienceResponse),
+    ):
+        # The routes returned PaginatedResponse(data=<ORM objects>) and FastAPI
+        # validated it against the response_model with from_attributes
+        adapter = TypeAdapter(PaginatedResponse[schema])
+        fields = schema_fields(schema)
+
+        with SessionLocal() as session:
+            def fetch_objects():
+                session.expunge_all()
+                return session.query(model).order_by(model.id).limit(args.rows).all()
+
+            def fetch_rows():
+                return session.query(*field_columns(model, fields)).order_by(model.id).limit(args.rows).all()
+
+            objects, rows = fetch_objects(), fetch_rows()
+            result = {
+                "table": name,
+                "rows": len(rows),
+                "fetch_objects_ms": round(median_time(fetch_objects, args.repeat) * 1000, 2),
+                "fetch_rows_ms": round(median_time(fetch_rows, args.repeat) * 1000, 2),
+                "orm_jsonable_ms": round(median_time(
+                    lambda: json.dumps(jsonable_encoder(adapter.validate_python(
+                        PaginatedResponse(data=objects, total=len(objects)), from_attributes=True
+                    ))).encode(),
+                    args.repeat,
+                ) * 1000, 2),
+                "orm_dump_json_ms": round(median_time(
+                    lambda: adapter.dump_json(adapter.validate_python(
+                        PaginatedResponse(data=objects, total=len(objects)), from_attributes=True
+                    )),
+                    args.repeat,
+                ) * 1000, 2),
+                "rows_page_json_ms": round(median_time(
+                    lambda: fast_json.page_json(fields, rows, len(rows)), args.repeat,
+                ) * 1000, 2),
+            }
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
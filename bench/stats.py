@@ -0,0 +1,116 @@
+"""
+Report queries from the project_experience_stats summary table vs the same
+GROUP BY over project_experience, per report, at a given table size:
+
+    python bench/stats.py --rows 1000000 --repeat 20
+
+Also times the insert path with and without the summary upkeep (single ORM
+inserts fire the mapper events, one upsert each).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import generate  # noqa: E402
+
+REPORTS = {
+    "by_manager": ["consulting_manager"],
+    "by_year": ["project_year"],
+    "by_category": ["category"],
+    "manager_by_year": ["consulting_manager", "project_year"],
+    "year_by_category_2010_2015": ["project_year", "category"],
+}
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--managers", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--inserts", type=int, default=500, help="single ORM inserts timed per mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        generate(url, experiences=args.rows, managers=args.managers)
+        # Migration 0004 fills the summary table from the seeded rows
+        subprocess.run([sys.executable, "-m", "migrations", "upgrade"], env=dict(os.environ, DATABASE_URL=url),
+                       cwd=ROOT, check=True, capture_output=True)
+
+        sys.path.insert(0, ROOT)
+        from sqlalchemy import event, func, select
+
+        import experience_stats
+        from database import SessionLocal, engine
+        from experience_stats import StatsDimension, group_counts, stats_filters
+        from models.ProjExperience import ProjectExperience
+
+        experiences = ProjectExperience.__table__.c
+        source = {
+            StatsDimension.consulting_manager: func.coalesce(experiences.consulting_manager_id, 0),
+            StatsDimension.project_year: experiences.project_year,
+            StatsDimension.category: experiences.category,
+        }
+
+        with SessionLocal() as session:
+            groups = session.execute(select(func.count()).select_from(experience_stats.project_experience_stats)).scalar()
+            print(json.dumps({"rows": args.rows, "summary_groups": groups}))
+
+            for name, dimensions in REPORTS.items():
+                dimensions = [StatsDimension(dimension) for dimension in dimensions]
+                ranged = name.endswith("2010_2015")
+                conditions = stats_filters(project_year_from=2010, project_year_to=2015) if ranged else []
+                columns = [source[dimension] for dimension in dimensions]
+                where = [experiences.project_year.between("2010", "2015")] if ranged else []
+                group_by = (
+                    select(*columns, func.count()).where(*where).group_by(*columns).order_by(func.count().desc(), *columns)
+                )
+
+                summary_rows = group_counts(session, dimensions, conditions)
+                direct_rows = session.execute(group_by).all()
+                assert sorted(map(tuple, summary_rows)) == sorted(map(tuple, direct_rows)), name
+
+                print(json.dumps({
+                    "report": name,
+                    "groups": len(summary_rows),
+                    "summary_ms": median_ms(lambda: group_counts(session, dimensions, conditions), args.repeat),
+                    "group_by_ms": median_ms(lambda: session.execute(group_by).all(), args.repeat),
+                }))
+
+        def insert_rate() -> float:
+            start = time.perf_counter()
+            for i in range(args.inserts):
+                with SessionLocal() as session:
+                    session.add(ProjectExperience(
+                        no_sales_order=f"SO-STATS-{i}", customer_name="Bench", project_name="Bench",
+                        project_year="2024", category=f"Category {i % 12}", consulting_manager_id=1 + i % args.managers,
+                    ))
+                    session.commit()
+            return round(args.inserts / (time.perf_counter() - start), 1)
+
+        with_summary = insert_rate()
+        event.remove(ProjectExperience, "after_insert", experience_stats._count_insert)
+        without_summary = insert_rate()
+        print(json.dumps({"orm_inserts_per_s": with_summary, "orm_inserts_per_s_without_summary": without_summary}))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Rows/sec and peak RSS of a full dump through GET /project-experience/stream,
+against the old way of pulling everything: the list with a growing `skip`.
+
+Each size runs in a fresh interpreter so ru_maxrss is not polluted by the
+previous run. The client reads as fast as it can; `--slow-client-ms` sleeps
+after every chunk to check that a slow reader does not make the server buffer:
+
+    python bench/stream.py                         # 100k and 1M rows
+    python bench/stream.py --rows 10000000
+    python bench/stream.py --rows 100000 --slow-client-ms 5
+
+The paging loop is O(n^2) and only runs up to --paging-max-rows.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from datagen import seed  # noqa: E402
+
+PAGE_SIZE = 1000
+
+
+def _rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+async def get(app, path: str, query: str = "", on_body=None) -> int:
+    """In-process GET; returns the body size. `on_body(chunk)` is awaited for every chunk."""
+    size = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.body" and message.get("body"):
+            size += len(message["body"])
+            if on_body is not None:
+                await on_body(message["body"])
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(), "headers": [],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    await app(scope, receive, send)
+    return size
+
+
+async def measure(mode: str, slow_client_ms: float):
+    from main import app
+    from suite import start_lifespan
+
+    # The shutdown closes the pooled aiosqlite threads (DB_ASYNC) so the process can exit
+    shutdown = await start_lifespan(app)
+    baseline_rss = _rss_mb()
+    lines = 0
+    start = time.perf_counter()
+
+    if mode == "stream":
+        async def on_body(chunk: bytes):
+            nonlocal lines
+            lines += chunk.count(b"\n")
+            if slow_client_ms:
+                await asyncio.sleep(slow_client_ms / 1000)
+
+        size = await get(app, "/project-experience/stream", on_body=on_body)
+    else:
+        size, skip, body = 0, 0, []
+
+        async def on_body(chunk: bytes):
+            body.append(chunk)
+
+        while True:
+            body.clear()
+            size += await get(app, "/project-experience/", f"skip={skip}&limit={PAGE_SIZE}&total_mode=none", on_body)
+            page = len(json.loads(b"".join(body))["data"])
+            lines += page
+            skip += PAGE_SIZE
+            if page < PAGE_SIZE:
+                break
+
+    elapsed = time.perf_counter() - start
+    await shutdown()
+    return {
+        "mode": mode,
+        "rows_read": lines,
+        "rows_per_s": round(lines / elapsed),
+        "total_s": round(elapsed, 2),
+        "bytes": size,
+        "peak_rss_mb": _rss_mb(),
+        "rss_growth_mb": round(_rss_mb() - baseline_rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--paging-max-rows", type=int, default=200_000)
+    parser.add_argument("--slow-client-ms", type=float, default=0)
+    parser.add_argument("--child", choices=["stream", "paging"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+        print(json.dumps(asyncio.run(measure(args.child, args.slow_client_ms))))
+        return
+
+    for rows in args.rows or [100_000, 1_000_000]:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            seed(path, rows)
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", LOG_LEVEL="WARNING")
+            modes = ["stream"] + (["paging"] if rows <= args.paging_max_rows else [])
+            for mode in modes:
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, "--slow-client-ms", str(args.slow_client_ms)],
+                    env=env, cwd=ROOT, check=True, capture_output=True, text=True,
+                ).stdout.strip().splitlines()[-1]
+                print(json.dumps({"rows": rows, **json.loads(out)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Change feed: rows inserted, updated or deleted since a token.
+
+Every entity with a feed has an `updated_at` column, set on insert and on
+every update, indexed with the id. An ORM delete leaves a tombstone in the
+`deleted_rows` log, in the same transaction (mapper `after_delete` event).
+`GET /<entity>/changes?since=<token>` returns the rows updated and the ids
+deleted after the token, in time order, and the token to ask with next time.
+A mirror applies them in order and keeps the token, so a sync costs
+O(changes) instead of O(table). Without `since` the feed starts from the
+beginning: every current row, then the tombstones still kept.
+
+Timestamps are naive UTC (`database.utcnow`), taken when a write is flushed,
+not when it commits, so a slow
+transaction can commit a change older than a token already handed out. Once
+caught up, the token therefore stays CHANGES_LAG seconds behind the clock:
+those changes are sent again on the next call, which is harmless since
+applying a change twice gives the same result. A change committing more than
+CHANGES_LAG after its flush, or written by an instance whose clock is off by
+more than that, can be missed.
+
+Tombstones are kept CHANGES_RETENTION_DAYS. An older token gets 410 and the
+mirror has to start over without `since`. Prune with:
+
+    python -m change_feed prune
+
+DELETE statements that bypass the ORM leave no tombstone.
+"""
+import os
+import sys
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, Index, Integer, String, Table, delete, event, insert, select
+
+from database import Base, utcnow
+from models.ConsManager import ConsultingManager
+from models.ProjExperience import ProjectExperience
+from models.User import User
+from pagination import _after, decode_cursor, encode_cursor
+
+
+CHANGES_LAG = float(os.getenv("CHANGES_LAG", 5))
+# Most changes one call returns; each side (upserts, tombstones) reads one more
+CHANGES_MAX_LIMIT = int(os.getenv("CHANGES_MAX_LIMIT", 10_000))
+CHANGES_RETENTION_DAYS = float(os.getenv("CHANGES_RETENTION_DAYS", 30))
+
+deleted_rows = Table(
+    "deleted_rows",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("table_name", String(100), nullable=False),
+    Column("row_id", Integer, nullable=False),
+    Column("deleted_at", DateTime, nullable=False),
+    Index("ix_deleted_rows_table_deleted_at", "table_name", "deleted_at", "id"),
+)
+
+_tombstones = deleted_rows.c
+
+
+def _leave_tombstone(mapper, connection, target):
+    connection.execute(insert(deleted_rows).values(
+        table_name=mapper.local_table.name, row_id=target.id, deleted_at=utcnow(),
+    ))
+
+
+for _model in (User, ConsultingManager, ProjectExperience):
+    event.listen(_model, "after_delete", _leave_tombstone)
+
+
+def changes(session, model, fields: Sequence[str], since: Optional[str], limit: int) -> dict:
+    """
+    Up to `limit` changes of `model` after the `since` token, oldest first:
+    {"op": "upsert", "id", "at", "data": `fields` of the row} or
+    {"op": "delete", "id", "at"}. Also returns the next token and whether more
+    changes are waiting (`has_more`: ask again right away).
+    """
+    if not 1 <= limit <= CHANGES_MAX_LIMIT:
+        raise HTTPException(400, f"limit must be between 1 and {CHANGES_MAX_LIMIT}")
+
+    # The token is the (time, id) position reached on each side
+    columns = [model.updated_at, model.id, _tombstones.deleted_at, _tombstones.id]
+    position = decode_cursor(since, columns) if since else [None] * 4
+    updated_at, row_id, deleted_at, tombstone_id = position
+
+    now = utcnow()
+    if deleted_at is not None and deleted_at < now - timedelta(days=CHANGES_RETENTION_DAYS):
+        raise HTTPException(410, "Token expired, sync again without since")
+
+    # One row past the limit on each side tells whether there is more.
+    # `fields` come first, zipped into the data; the position follows.
+    rows = select(
+        *[getattr(model, name) for name in fields],
+        model.id.label("change_id"),
+        model.updated_at.label("change_at"),
+    ).where(model.updated_at.is_not(None))
+    if updated_at is not None:
+        rows = rows.where(_after([model.updated_at, model.id], [updated_at, row_id], False))
+    rows = session.execute(rows.order_by(model.updated_at, model.id).limit(limit + 1)).all()
+
+    tombstones = select(_tombstones.row_id, _tombstones.deleted_at, _tombstones.id) \
+        .where(_tombstones.table_name == model.__tablename__)
+    if deleted_at is not None:
+        tombstones = tombstones.where(
+            _after([_tombstones.deleted_at, _tombstones.id], [deleted_at, tombstone_id], False)
+        )
+    tombstones = session.execute(tombstones.order_by(_tombstones.deleted_at, _tombstones.id).limit(limit + 1)).all()
+
+    # Upserts and deletes in one time order; an upsert goes first on a tie
+    merged = sorted(
+        [(row.change_at, 0, row.change_id, row) for row in rows]
+        + [(row.deleted_at, 1, row.id, row) for row in tombstones],
+        key=lambda change: change[:3],
+    )
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    result = []
+    for at, kind, key, row in merged:
+        if kind == 0:
+            result.append({"op": "upsert", "id": key, "at": at, "data": dict(zip(fields, row))})
+            updated_at, row_id = at, key
+        else:
+            result.append({"op": "delete", "id": row.row_id, "at": at})
+            deleted_at, tombstone_id = at, key
+
+    if not has_more:
+        # Caught up: nothing older than the lag can still appear, so both
+        # sides move up to it (and the last CHANGES_LAG seconds come again)
+        horizon = [now - timedelta(seconds=CHANGES_LAG), 0]
+        updated_at, row_id = _not_before(position[:2], horizon)
+        deleted_at, tombstone_id = _not_before(position[2:], horizon)
+
+    return {
+        "changes": result,
+        "next_token": encode_cursor([updated_at, row_id, deleted_at, tombstone_id]),
+        "has_more": has_more,
+    }
+
+
+def _not_before(previous: list, candidate: list) -> list:
+    """`candidate`, unless the client already was past it: a token never moves back."""
+    if previous[0] is None or tuple(candidate) > tuple(previous):
+        return candidate
+    return list(previous)
+
+
+def prune(connection, retention_days: float = CHANGES_RETENTION_DAYS) -> int:
+    """Delete tombstones older than the retention. Returns how many."""
+    cutoff = utcnow() - timedelta(days=retention_days)
+    return connection.execute(delete(deleted_rows).where(_tombstones.deleted_at < cutoff)).rowcount
+
+
+def main():
+    if sys.argv[1:] != ["prune"]:
+        sys.exit("usage: python -m change_feed prune")
+
+    from database import engine
+    with engine.begin() as connection:
+        pruned = prune(connection)
+    print(f"Pruned {pruned} tombstones older than {CHANGES_RETENTION_DAYS:g} days")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Per-table data versions.
+
+Every committed write through a SQLAlchemy Session bumps a counter for each
+table it touched. Anything derived from table contents (cached counts, ETags,
+...) can store the version it was computed at and treat itself as stale once
+the version moves on.
+
+Rows updated or deleted through the ORM also get a row version
+(`get_row_version`), so a single row can be checked without looking at it.
+Row versions come from one global sequence and only the most recent
+ROW_VERSION_CACHE_SIZE are kept; a forgotten row reports its table's floor
+(the highest version forgotten or bulk-written), which is never lower than
+what it reported before. UPDATE/DELETE statements that bypass the ORM raise
+the floor of their table, as they may have touched any row.
+
+Versions are process-local: writes made by another worker process are not seen
+here, so consumers should still put a TTL on whatever they cache.
+
+Stored versions (`stored_versions`) are the cross-process counterpart, used for
+ETags: the `data_versions` table holds a counter per table, incremented in the
+transaction of every Session commit that wrote to the table. The increment
+locks the counter row until the commit, so versions follow commit order and
+every worker reads the same ones. Writes that bypass the Session (raw SQL on a
+connection, other services) do not move them.
+"""
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from itertools import chain
+from typing import Dict, Hashable, Iterable, Tuple
+
+from sqlalchemy import Column, Integer, String, Table, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from database import Base
+
+
+ROW_VERSION_CACHE_SIZE = int(os.getenv("ROW_VERSION_CACHE_SIZE", 100_000))
+
+_PENDING_KEY = "data_version.pending_tables"
+_PENDING_ROWS_KEY = "data_version.pending_rows"
+_PENDING_BULK_KEY = "data_version.pending_bulk_tables"
+
+# One row per versioned table, seeded by migration 0006
+data_versions = Table(
+    "data_versions",
+    Base.metadata,
+    Column("table_name", String(100), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = defaultdict(int)
+
+_sequence = 0
+_row_versions: "OrderedDict[Tuple[str, Hashable], int]" = OrderedDict()
+_row_floors: Dict[str, int] = defaultdict(int)
+
+
+def get_version(table: str) -> int:
+    return _versions[table]
+
+
+def get_row_version(table: str, key: Hashable) -> int:
+    with _lock:
+        return _row_versions.get((table, key), _row_floors[table])
+
+
+def bump(*tables: str):
+    with _lock:
+        for table in tables:
+            _versions[table] += 1
+
+
+def bump_rows(rows=(), bulk_tables=()):
+    """New row versions for (table, primary key) pairs; `bulk_tables` move every row of a table."""
+    global _sequence
+    with _lock:
+        _sequence += 1
+        for table in bulk_tables:
+            _row_floors[table] = _sequence
+        for row in rows:
+            _row_versions[row] = _sequence
+            _row_versions.move_to_end(row)
+        while len(_row_versions) > ROW_VERSION_CACHE_SIZE:
+            (table, _), version = _row_versions.popitem(last=False)
+            _row_floors[table] = max(_row_floors[table], version)
+
+
+def _pending(session: Session, key: str = _PENDING_KEY) -> set:
+    return session.info.setdefault(key, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            _pending(session).add(table.name)
+
+    for obj in chain(session.dirty, session.deleted):
+        table = getattr(obj, "__table__", None)
+        identity = inspect(obj).identity
+        if table is not None and identity is not None:
+            _pending(session, _PENDING_ROWS_KEY).add((table.name, identity[0] if len(identity) == 1 else identity))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_dml_tables(orm_execute_state):
+    # insert()/update()/delete() statements run through the session bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _pending(orm_execute_state.session).add(orm_execute_state.statement.table.name)
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        _pending(orm_execute_state.session, _PENDING_BULK_KEY).add(orm_execute_state.statement.table.name)
+
+
+def stored_versions(session: Session, tables: Iterable[str]) -> Dict[str, int]:
+    """Stored version of each of `tables` (one query); tables without a counter are left out."""
+    rows = session.execute(
+        select(data_versions.c.table_name, data_versions.c.version)
+        .where(data_versions.c.table_name.in_(list(tables)))
+    )
+    return dict(rows.all())
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_stored_versions(session):
+    # Flushed here, so the tables of the final flush are known too
+    session.flush()
+    tables = session.info.get(_PENDING_KEY)
+    if tables:
+        session.execute(
+            update(data_versions)
+            .where(data_versions.c.table_name.in_(sorted(tables)))
+            .values(version=data_versions.c.version + 1)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tables(session):
+    tables = session.info.pop(_PENDING_KEY, None)
+    rows = session.info.pop(_PENDING_ROWS_KEY, None)
+    bulk_tables = session.info.pop(_PENDING_BULK_KEY, None)
+    if rows or bulk_tables:
+        bump_rows(rows or (), bulk_tables or ())
+    if tables:
+        bump(*tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tables(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_PENDING_ROWS_KEY, None)
+    session.info.pop(_PENDING_BULK_KEY, None)
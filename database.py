@@ -1,8 +1,15 @@
 from dotenv import load_dotenv
+import asyncio
 import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, TypeVar
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from db_pool import instrument_pool, pool_options
+from sql_metrics import instrument_engine
 
 # Load environment variables
 load_dotenv()
@@ -10,26 +17,141 @@ load_dotenv()
 ENVIRONMENT_PROJECT = os.getenv("ENVIRONMENT_PROJECT", "HOME")
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# DB_ASYNC=true serves requests through an AsyncEngine (aiosqlite / asyncpg)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
 print("======================================")
 print("LOADING ENV:", ENVIRONMENT_PROJECT)
-print("DATABASE_URL:", DATABASE_URL)
+print("DATABASE_URL:", make_url(DATABASE_URL).render_as_string(hide_password=True) if DATABASE_URL else None)
+print("DB_ASYNC:", DB_ASYNC)
 print("======================================")
 
 if DATABASE_URL is None:
     raise ValueError("DATABASE_URL is not set in environment variables.")
 
+# Async driver used for each sync backend when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}', set ASYNC_DATABASE_URL.")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# Pool size, overflow, timeout, recycle and pre-ping come from DB_POOL_* (see db_pool)
 if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **pool_options(DATABASE_URL))
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+instrument_pool("sync", engine)
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    # Only imported in async mode: it pulls in greenlet and the asyncio extension
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, asyncio=True))
+    instrument_pool("async", async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine)
+    # Objects are serialized after the session work is done, so keep them loaded
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+T = TypeVar("T")
+
+
+def utcnow() -> datetime:
+    """
+    Naive UTC now, the time base of `updated_at` and the change feed. Local
+    time would repeat an hour when DST ends and reorder changes.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class DbSession:
+    """
+    Database handle returned by `get_db`.
 
-def get_db():
-    db = SessionLocal()
+    Route code stays plain SQLAlchemy ORM code written against a `Session` and is
+    handed to `run`. In sync mode it runs in the threadpool on a regular Session;
+    in async mode (DB_ASYNC) it runs on the event loop through
+    `AsyncSession.run_sync`, with every round trip awaited on the async driver,
+    so a request waiting on the database does not hold a thread.
+
+    Each `run` is one unit of work on its own session: the connection goes back
+    to the pool as soon as `fn` returns, not when the response has been sent.
+    Returned objects are detached but keep their loaded attributes. Checks that
+    must hold when a write commits (uniqueness, ...) belong in the same `fn`.
+    """
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if DB_ASYNC:
+            async with AsyncSessionLocal() as session:
+                try:
+                    return await session.run_sync(fn, *args, **kwargs)
+                finally:
+                    for callback in session.sync_session.info.pop(_DEFERRED_KEY, ()):
+                        await run_in_threadpool(callback)
+        return await run_in_threadpool(self._run_sync, fn, *args, **kwargs)
+
+    @staticmethod
+    def _run_sync(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with SessionLocal() as session:
+            return fn(session, *args, **kwargs)
+
+
+_DEFERRED_KEY = "database.deferred"
+
+
+def run_blocking(session, callback: Callable[[], Any]):
+    """
+    Call `callback` (blocking I/O, e.g. a cache invalidation over the network)
+    from a session event. In async mode the event runs on the event loop, so
+    the call is deferred to the threadpool once the `DbSession.run` owning
+    `session` has finished, before its result is returned.
+    """
     try:
-        yield db
-    finally:
-        db.close()
+        asyncio.get_running_loop()
+    except RuntimeError:
+        callback()
+        return
+    session.info.setdefault(_DEFERRED_KEY, []).append(callback)
+
+
+async def stream_rows(statement, chunk_size: int) -> AsyncIterator[list]:
+    """
+    Execute `statement` on a dedicated session and yield its rows in lists of
+    at most `chunk_size`, without buffering the whole result.
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(statement.execution_options(yield_per=chunk_size))
+            async for partition in result.partitions(chunk_size):
+                yield partition
+        return
+
+    def partitions():
+        with SessionLocal() as session:
+            result = session.execute(statement.execution_options(yield_per=chunk_size))
+            yield from result.partitions(chunk_size)
+
+    async for partition in iterate_in_threadpool(partitions()):
+        yield partition
+
+
+async def get_db():
+    yield DbSession()
@@ -0,0 +1,173 @@
+"""
+Connection pool settings and pool instrumentation.
+
+Pool sizing comes from the environment (see `pool_options`). Engines built with
+`InstrumentedQueuePool` / `InstrumentedAsyncQueuePool` record, per engine:
+
+- how long `pool.connect()` takes (queue wait + connect + pre-ping),
+- how long connections stay checked out,
+- how many checkouts found the pool exhausted and had to wait, and timeouts.
+
+`pool_status()` is served at GET /internal/db-pool and `log_pool_status()`
+writes the same data as one JSON log line per engine.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from metrics import Histogram
+
+
+logger = logging.getLogger("db.pool")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Seconds after which a connection is replaced on checkout, -1 = never
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Seconds between pool status log lines, 0 disables them
+DB_POOL_LOG_INTERVAL = float(os.getenv("DB_POOL_LOG_INTERVAL", 60))
+
+
+class PoolStats:
+    def __init__(self):
+        self.acquire = Histogram()
+        self.hold = Histogram()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats
+
+    def connect(self):
+        # Every connection of pool_size + max_overflow is out: this checkout queues
+        if self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow:
+            self.stats.incr("waits")
+
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.incr("timeouts")
+            logger.warning(json.dumps({"event": "db_pool_timeout", **_pool_state(self)}))
+            raise
+        self.stats.acquire.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    # Log under sqlalchemy.* like the stock pool (kept at WARNING by SQLAlchemy)
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+
+_engines: Dict[str, object] = {}
+
+
+def pool_options(database_url: str, asyncio: bool = False) -> dict:
+    """Keyword arguments for create_engine / create_async_engine."""
+    # In-memory SQLite lives in a single connection, there is nothing to size
+    if database_url.startswith("sqlite") and (":memory:" in database_url or database_url.rstrip("/").endswith(":")):
+        return {}
+
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if asyncio else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def instrument_pool(name: str, engine):
+    """Attach stats and checkout/checkin listeners to an engine's pool."""
+    pool = engine.pool
+    if not isinstance(pool, _InstrumentedPoolMixin):
+        return
+
+    pool.stats = PoolStats()
+    _engines[name] = engine
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool.stats.incr("connects")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool.stats.incr("checkouts")
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            pool.stats.hold.observe(time.perf_counter() - checked_out_at)
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool.stats.incr("invalidations")
+
+
+def _pool_state(pool) -> dict:
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def pool_status() -> Dict[str, dict]:
+    status = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        stats = pool.stats
+        status[name] = {
+            **_pool_state(pool),
+            "timeout": pool._timeout,
+            "recycle": pool._recycle,
+            "pre_ping": pool._pre_ping,
+            "checkouts": stats.checkouts,
+            "waits": stats.waits,
+            "timeouts": stats.timeouts,
+            "connects": stats.connects,
+            "invalidations": stats.invalidations,
+            "acquire_seconds": stats.acquire.snapshot(),
+            "hold_seconds": stats.hold.snapshot(),
+        }
+    return status
+
+
+def log_pool_status():
+    for name, status in pool_status().items():
+        summary = {key: value for key, value in status.items() if not key.endswith("_seconds")}
+        for key in ("acquire_seconds", "hold_seconds"):
+            summary[f"{key}_sum"] = round(status[key]["sum"], 6)
+        logger.info(json.dumps({"event": "db_pool", "engine": name, **summary}))
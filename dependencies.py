@@ -1,22 +1,20 @@
 from fastapi import Depends, HTTPException, status, Header
 import jwt
 from typing import Optional
-import os
+from pydantic import ValidationError
 
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+from auth import TokenClaims, decode_access_token
 
-def decode_jwt_token(token: str):
+def decode_jwt_token(token: str) -> TokenClaims:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload 
-    except jwt.DecodeError:
+        return decode_access_token(token)
+    except (jwt.PyJWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
 
-async def verify_access_token(authorization: Optional[str] = Header(None)):
+async def verify_access_token(authorization: Optional[str] = Header(None)) -> TokenClaims:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
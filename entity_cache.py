@@ -0,0 +1,260 @@
+"""
+Read-through cache of single entities by primary key.
+
+`entity_cache.get_or_load(db, Model, id)` returns the JSON of the model's
+registered response schema, loading the row on a miss. Entries are keyed by
+(table, id) and dropped when the ORM updates or deletes the row: the
+`after_update` / `after_delete` mapper events collect the keys and they are
+invalidated once the transaction commits. UPDATE/DELETE statements that
+bypass the ORM drop every cached row of their table. A TTL bounds anything
+the events cannot see (other services writing to the database).
+
+Backends (ENTITY_CACHE_BACKEND):
+
+- "local": LRU + TTL in this process (default),
+- "redis": any Redis-protocol server at ENTITY_CACHE_REDIS_URL, shared by
+  every worker so an invalidation in one is seen by all. Needs the `redis`
+  package.
+
+Hit, miss, eviction and invalidation counters are served at
+GET /internal/entity-cache and on /metrics.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from data_version import get_row_version
+from database import run_blocking
+from fieldsets import schema_load_only
+
+
+ENTITY_CACHE_ENABLED = os.getenv("ENTITY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+ENTITY_CACHE_BACKEND = os.getenv("ENTITY_CACHE_BACKEND", "local")
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", 10_000))
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", 60))
+ENTITY_CACHE_REDIS_URL = os.getenv("ENTITY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+_PENDING_KEY = "entity_cache.pending"
+
+
+class LocalBackend:
+    """Bounded LRU with a TTL per entry, for one process."""
+
+    blocking = False
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Entries in a Redis-protocol server, expiring after the TTL; its own maxmemory policy evicts."""
+
+    blocking = True
+    evictions = 0
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("ENTITY_CACHE_BACKEND=redis needs the 'redis' package")
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes):
+        self.client.set(key, value, px=int(self.ttl * 1000))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*keys)
+
+    def delete_prefix(self, prefix: str):
+        keys = list(self.client.scan_iter(match=prefix + "*", count=1000))
+        for start in range(0, len(keys), 1000):
+            self.client.delete(*keys[start:start + 1000])
+
+    def __len__(self):
+        return self.client.dbsize()
+
+
+class EntityCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.schemas: Dict[str, type] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def register(self, model, schema):
+        """Cache `model` rows as `schema` JSON and invalidate them on ORM writes."""
+        table = model.__tablename__
+        self.schemas[table] = schema
+
+        @event.listens_for(model, "after_update")
+        @event.listens_for(model, "after_delete")
+        def collect(mapper, connection, target):
+            session = Session.object_session(target)
+            if session is not None:
+                session.info.setdefault(_PENDING_KEY, set()).add(self._key(table, mapper.primary_key_from_instance(target)))
+
+    @staticmethod
+    def _key(table: str, key) -> str:
+        if isinstance(key, (list, tuple)):
+            key = key[0] if len(key) == 1 else ",".join(str(part) for part in key)
+        return f"entity:{table}:{key}"
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    async def _call(self, method, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    async def get(self, model, key: Hashable) -> Optional[bytes]:
+        """Cached JSON for the row, or None. Does not load."""
+        if not ENTITY_CACHE_ENABLED:
+            return None
+        value = await self._call(self.backend.get, self._key(model.__tablename__, key))
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    async def get_or_load(self, db, model, key: Hashable) -> Optional[bytes]:
+        """Cached JSON for the row, loading it through `db` on a miss. None when the row does not exist."""
+        value = await self.get(model, key)
+        if value is not None:
+            return value
+
+        table = model.__tablename__
+        version = get_row_version(table, key)
+        schema = self.schemas[table]
+        obj = await db.run(lambda session: session.get(model, key, options=[schema_load_only(model, schema)]))
+        if obj is None:
+            return None
+
+        value = _dump_json(schema, obj)
+        # A write committed while we were loading: what we read may already be stale
+        if ENTITY_CACHE_ENABLED and get_row_version(table, key) == version:
+            await self._call(self.backend.set, self._key(table, key), value)
+        return value
+
+    def invalidate(self, *keys: str):
+        self.backend.delete(*keys)
+        with self._lock:
+            self.invalidations += len(keys)
+
+    def invalidate_table(self, table: str):
+        self.backend.delete_prefix(f"entity:{table}:")
+        self._count("invalidations")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": ENTITY_CACHE_BACKEND,
+            "enabled": ENTITY_CACHE_ENABLED,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.backend.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def _dump_json(schema, obj) -> bytes:
+    if hasattr(schema, "model_validate"):
+        # pydantic 2 does not honour the v1 `orm_mode` config in from_orm
+        return schema.model_validate(obj, from_attributes=True).model_dump_json().encode("utf-8")
+    return schema.from_orm(obj).json().encode("utf-8")
+
+
+def _make_backend():
+    if ENTITY_CACHE_BACKEND == "redis":
+        return RedisBackend(ENTITY_CACHE_REDIS_URL, ENTITY_CACHE_TTL)
+    if ENTITY_CACHE_BACKEND != "local":
+        raise ValueError(f"Unknown ENTITY_CACHE_BACKEND '{ENTITY_CACHE_BACKEND}', expected local or redis")
+    return LocalBackend(ENTITY_CACHE_SIZE, ENTITY_CACHE_TTL)
+
+
+entity_cache = EntityCache(_make_backend())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    # update()/delete() statements do not fire the mapper events and may touch any row
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table.name
+        if table in entity_cache.schemas:
+            orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(table)
+
+
+def _invalidate(pending: set):
+    entity_keys = [key for key in pending if key.startswith("entity:")]
+    if entity_keys:
+        entity_cache.invalidate(*entity_keys)
+    for table in pending.difference(entity_keys):
+        entity_cache.invalidate_table(table)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    if entity_cache.backend.blocking:
+        # Network round trips: kept off the event loop in async mode
+        run_blocking(session, lambda: _invalidate(pending))
+    else:
+        _invalidate(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,80 @@
+"""
+ETags and conditional GET (If-None-Match -> 304) for the read endpoints.
+
+ETags are derived from versions stored in the database, not from the response
+body, so a matching request costs one small query instead of the full one:
+
+- lists and stats: the stored versions of the tables read (see
+  data_version.stored_versions) + the request's query parameters,
+- detail endpoints: the row's `updated_at`.
+
+Every worker reads the same versions, so a tag issued by one is honoured by the
+others and stays valid until the data changes. Writes that bypass the Session
+(raw SQL without `updated_at`, other services) do not change the tags.
+
+    @router.get("/")
+    async def get_things(request: Request, response: Response, db: DbSession = Depends(get_db), ...):
+        etag = await table_etag(request, db, Thing.__tablename__)
+        not_modified = check_etag(request, response, etag)
+        if not_modified:
+            return not_modified
+"""
+import hashlib
+import os
+from typing import Hashable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from data_version import stored_versions
+from database import DbSession
+
+
+ETAG_ENABLED = os.getenv("ETAG_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+def _etag(*parts) -> str:
+    raw = "\x1f".join(str(part) for part in parts)
+    return '"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+async def table_etag(request: Request, db: DbSession, *tables: str) -> str:
+    """Tag for a response built from `tables` and the request's query parameters."""
+    versions = await db.run(stored_versions, tables)
+    params = sorted(request.query_params.multi_items())
+    return _etag(request.url.path, params, *[(table, versions.get(table)) for table in tables])
+
+
+async def row_etag(request: Request, db: DbSession, model, key: Hashable) -> str:
+    """Tag for a response built from the row of `model` with primary key `key`."""
+    def updated_at(session: Session):
+        return session.scalar(select(model.updated_at).where(model.id == key))
+
+    version = await db.run(updated_at)
+    params = sorted(request.query_params.multi_items())
+    return _etag(request.url.path, params, model.__tablename__, key, version and version.isoformat())
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    A 304 response when the client's If-None-Match matches `etag`; otherwise
+    None, with the ETag set on the response the route is about to return.
+    """
+    if not ETAG_ENABLED:
+        return None
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,222 @@
+"""
+Project experience counts per (consulting manager, project year, category).
+
+The counts live in the `project_experience_stats` summary table, so the
+report endpoints read one row per group instead of grouping the whole
+`project_experience` table. Coarser reports (per manager, per year, ...) sum
+the summary rows.
+
+The table is updated in the transaction of the write that changes a count:
+ORM inserts, updates and deletes of ProjectExperience through mapper events,
+and the bulk insert path through `record_inserted`. Experiences without a
+manager are counted under manager key 0, since NULL cannot be part of the key.
+
+update() and delete() statements on `project_experience` run through a
+Session are not seen row by row; the counts are rebuilt before that session
+commits. Writes that bypass the Session entirely (raw SQL on a connection,
+text() statements, other services, manual fixes in a SQL console) leave the
+counts stale until a full rebuild:
+
+    python -m experience_stats rebuild
+"""
+import sys
+from collections import Counter
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, Integer, String, Table, delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import Base
+from models.ProjExperience import ProjectExperience
+
+
+NO_MANAGER = 0
+
+_REBUILD_KEY = "experience_stats.rebuild"
+
+project_experience_stats = Table(
+    "project_experience_stats",
+    Base.metadata,
+    Column("consulting_manager_key", Integer, primary_key=True, autoincrement=False),
+    Column("project_year", String(4), primary_key=True),
+    Column("category", String(150), primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+
+_stats = project_experience_stats.c
+
+
+class StatsDimension(str, Enum):
+    consulting_manager = "consulting_manager"
+    project_year = "project_year"
+    category = "category"
+
+
+# Report dimension -> summary column
+DIMENSIONS = {
+    StatsDimension.consulting_manager: _stats.consulting_manager_key,
+    StatsDimension.project_year: _stats.project_year,
+    StatsDimension.category: _stats.category,
+}
+
+_KEY_FIELDS = ("consulting_manager_id", "project_year", "category")
+
+_UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _key(manager_id: Optional[int], project_year: str, category: str) -> Tuple[int, str, str]:
+    return (manager_id if manager_id is not None else NO_MANAGER, project_year, category)
+
+
+def apply_deltas(connection, deltas: Dict[Tuple[int, str, str], int]):
+    """Add `deltas` ((manager key, year, category) -> change) to the counts."""
+    rows = [
+        {"consulting_manager_key": manager, "project_year": year, "category": category, "count": delta}
+        for (manager, year, category), delta in deltas.items() if delta
+    ]
+    if not rows:
+        return
+
+    upsert = _UPSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(project_experience_stats)
+        statement = statement.on_conflict_do_update(
+            index_elements=[_stats.consulting_manager_key, _stats.project_year, _stats.category],
+            set_={"count": _stats.count + statement.excluded["count"]},
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(
+            update(project_experience_stats)
+            .where(
+                _stats.consulting_manager_key == row["consulting_manager_key"],
+                _stats.project_year == row["project_year"],
+                _stats.category == row["category"],
+            )
+            .values(count=_stats.count + row["count"])
+        ).rowcount
+        if not updated:
+            connection.execute(insert(project_experience_stats), row)
+
+
+def record_inserted(connection, rows: Iterable[dict]):
+    """Count rows inserted without the ORM (the bulk path), given as column -> value dicts."""
+    apply_deltas(connection, Counter(
+        _key(row.get("consulting_manager_id"), row["project_year"], row["category"]) for row in rows
+    ))
+
+
+def _committed(target, field: str):
+    """Value of `field` before the pending change (the current value when unchanged)."""
+    history = inspect(target).attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, field)
+
+
+@event.listens_for(ProjectExperience, "after_insert")
+def _count_insert(mapper, connection, target):
+    apply_deltas(connection, {_key(target.consulting_manager_id, target.project_year, target.category): 1})
+
+
+@event.listens_for(ProjectExperience, "after_update")
+def _count_update(mapper, connection, target):
+    old = _key(*[_committed(target, field) for field in _KEY_FIELDS])
+    new = _key(target.consulting_manager_id, target.project_year, target.category)
+    if old != new:
+        apply_deltas(connection, {old: -1, new: 1})
+
+
+@event.listens_for(ProjectExperience, "after_delete")
+def _count_delete(mapper, connection, target):
+    apply_deltas(connection, {_key(*[_committed(target, field) for field in _KEY_FIELDS]): -1})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_statements(orm_execute_state):
+    # update()/delete() statements change rows the mapper events never see
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        if orm_execute_state.statement.table.name == ProjectExperience.__tablename__:
+            orm_execute_state.session.info[_REBUILD_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _rebuild_before_commit(session):
+    if session.info.pop(_REBUILD_KEY, False):
+        rebuild(session.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rebuild(session):
+    session.info.pop(_REBUILD_KEY, None)
+
+
+def rebuild(connection) -> int:
+    """Recompute every count from `project_experience`. Returns the number of groups."""
+    if connection.dialect.name == "postgresql":
+        # Writers wait until the new counts are committed, so none is lost in between
+        connection.exec_driver_sql("LOCK TABLE project_experience IN SHARE MODE")
+
+    experiences = ProjectExperience.__table__.c
+    manager_key = func.coalesce(experiences.consulting_manager_id, NO_MANAGER)
+    connection.execute(delete(project_experience_stats))
+    connection.execute(insert(project_experience_stats).from_select(
+        ["consulting_manager_key", "project_year", "category", "count"],
+        select(manager_key, experiences.project_year, experiences.category, func.count())
+        .group_by(manager_key, experiences.project_year, experiences.category),
+    ))
+    return connection.execute(select(func.count()).select_from(project_experience_stats)).scalar()
+
+
+def stats_filters(
+    project_year: Optional[str] = None,
+    project_year_from: Optional[int] = None,
+    project_year_to: Optional[int] = None,
+    category: Optional[str] = None,
+    consulting_manager_id: Optional[int] = None,
+) -> list:
+    """WHERE conditions on the summary table, same meaning as the list filters."""
+    conditions = []
+    if project_year is not None:
+        conditions.append(_stats.project_year == project_year)
+    if project_year_from is not None:
+        conditions.append(_stats.project_year >= f"{project_year_from:04d}")
+    if project_year_to is not None:
+        conditions.append(_stats.project_year <= f"{project_year_to:04d}")
+    if category is not None:
+        conditions.append(_stats.category == category)
+    if consulting_manager_id is not None:
+        conditions.append(_stats.consulting_manager_key == consulting_manager_id)
+    return conditions
+
+
+def group_counts(session, dimensions: List[StatsDimension], conditions=()) -> List[tuple]:
+    """(*dimension values, count) per group of `dimensions`, largest groups first."""
+    columns = [DIMENSIONS[dimension] for dimension in dimensions]
+    total = func.sum(_stats.count)
+    return session.execute(
+        select(*columns, total)
+        .where(_stats.count > 0, *conditions)
+        .group_by(*columns)
+        .order_by(total.desc(), *columns)
+    ).all()
+
+
+def main():
+    """Recount everything, after writes that bypassed the Session (see the module docstring)."""
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m experience_stats rebuild")
+
+    from database import engine
+    with engine.begin() as connection:
+        groups = rebuild(connection)
+    print(f"Rebuilt project_experience_stats: {groups} groups")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Row writers for exports, one per file format.
+
+Every writer has the interface of `XlsxStreamWriter`: `start()` returns the
+bytes preceding the rows, `write_rows(rows)` the bytes for a chunk of rows and
+`finish()` the rest of the file, so a caller can stream any of them chunk by
+chunk to a response or to disk.
+"""
+import csv
+import io
+from enum import Enum
+from typing import List, Optional, Sequence
+
+from fast_json import dumps
+
+
+class ExportFormat(str, Enum):
+    xlsx = "xlsx"
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+MEDIA_TYPES = {
+    ExportFormat.xlsx: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+class CsvWriter:
+    """CSV with a header line, UTF-8."""
+
+    def __init__(self, headers: Sequence[str]):
+        self.headers = headers
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _flush(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self) -> bytes:
+        self._writer.writerow(self.headers)
+        return self._flush()
+
+    def write_rows(self, rows) -> bytes:
+        self._writer.writerows(rows)
+        return self._flush()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class NdjsonWriter:
+    """One JSON object per line, keyed by `keys`."""
+
+    def __init__(self, keys: Sequence[str]):
+        self.keys = keys
+
+    def start(self) -> bytes:
+        return b""
+
+    def write_rows(self, rows) -> bytes:
+        return b"".join(dumps(dict(zip(self.keys, row))) + b"\n" for row in rows)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+def column_widths(headers: Sequence[str], lengths: Sequence[Optional[int]]) -> List[int]:
+    """XLSX column widths from the longest value of each column."""
+    from xlsx_stream import column_width
+    return [column_width(max(len(header), length or 0)) for header, length in zip(headers, lengths)]
+
+
+def open_writer(
+    export_format: ExportFormat,
+    headers: Sequence[str],
+    keys: Sequence[str],
+    widths: Optional[Sequence[int]] = None,
+    title: str = "Sheet1",
+):
+    """Writer for `export_format`; `headers` label the columns, `keys` name them in NDJSON."""
+    if export_format is ExportFormat.csv:
+        return CsvWriter(headers)
+    if export_format is ExportFormat.ndjson:
+        return NdjsonWriter(keys)
+    # Imported here so the spreadsheet code is not loaded at startup
+    from xlsx_stream import XlsxStreamWriter
+    return XlsxStreamWriter(headers, widths, sheet_title=title)
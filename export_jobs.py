@@ -0,0 +1,251 @@
+"""
+Background export jobs.
+
+A request queues an export (`export_jobs.submit`) and gets a job id back
+instead of waiting for the file. EXPORT_WORKERS tasks take jobs off a queue of
+at most EXPORT_QUEUE_SIZE; a full queue is refused (ExportQueueFull) rather
+than piling up work. A job streams its rows in chunks of EXPORT_CHUNK_SIZE
+into `<id>.<format>.part` under EXPORT_DIR, renamed once complete, and reports
+how many rows it has written so far.
+
+Finished files are kept EXPORT_TTL seconds, then a periodic sweep deletes them
+along with their job. The sweep also deletes leftover files of earlier
+processes. A submit identical (same key) to a job still queued or running
+returns that job, so repeated clicks do not export the same rows twice.
+
+Jobs live in this process: with several worker processes, status and download
+requests have to reach the process that took the job.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from enum import Enum
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import DbSession, stream_rows
+from export_formats import ExportFormat, column_widths, open_writer
+
+
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 2))
+EXPORT_QUEUE_SIZE = int(os.getenv("EXPORT_QUEUE_SIZE", 10))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "exports"))
+EXPORT_TTL = float(os.getenv("EXPORT_TTL", 3600))
+
+# Only files named like ours are swept from EXPORT_DIR
+_FILE_RE = re.compile(r"^[0-9a-f]{32}\.(xlsx|csv|ndjson)(\.part)?$")
+
+logger = logging.getLogger(__name__)
+
+
+class ExportQueueFull(Exception):
+    pass
+
+
+class ExportStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ExportSource:
+    """
+    What a job exports: the rows of `statement`, whose columns are labelled
+    `headers` (and named `keys` in NDJSON). `summarize(session)` returns the
+    row count and the longest value per column, for progress and XLSX widths.
+    """
+
+    def __init__(
+        self,
+        title: str,
+        headers: Sequence[str],
+        keys: Sequence[str],
+        statement,
+        summarize: Callable[[Session], Tuple[int, List[int]]],
+    ):
+        self.title = title
+        self.headers = headers
+        self.keys = keys
+        self.statement = statement
+        self.summarize = summarize
+
+
+class ExportJob:
+    def __init__(self, key: Hashable, export_format: ExportFormat, source: ExportSource, directory: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.format = export_format
+        self.source = source
+        self.path = os.path.join(directory, f"{self.id}.{export_format.value}")
+        self.status = ExportStatus.queued
+        self.rows_written = 0
+        self.total_rows: Optional[int] = None
+        self.size: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def filename(self) -> str:
+        created = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.created_at))
+        return f"{self.source.title.lower().replace(' ', '_')}_{created}.{self.format.value}"
+
+    def expires_at(self, ttl: float) -> Optional[float]:
+        return self.finished_at + ttl if self.finished_at is not None else None
+
+
+class ExportJobs:
+    """Queue, workers and registry of export jobs."""
+
+    def __init__(self, workers: int, queue_size: int, directory: str, ttl: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.directory = directory
+        self.ttl = ttl
+        self._jobs: Dict[str, ExportJob] = {}
+        self._active: Dict[Hashable, ExportJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _start(self):
+        # On first use, so processes that never export start no tasks
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = asyncio.Queue(self.queue_size)
+        self._tasks = [_detached_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(_detached_task(self._sweep_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._active.clear()
+
+    def submit(self, key: Hashable, export_format: ExportFormat, source: ExportSource) -> ExportJob:
+        """Queue an export, or return the queued/running job with the same `key`."""
+        active = self._active.get(key)
+        if active is not None:
+            return active
+        if self._queue is None:
+            self._start()
+
+        job = ExportJob(key, export_format, source, self.directory)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ExportQueueFull()
+        self._jobs[job.id] = job
+        self._active[key] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._active.pop(job.key, None)
+                self._queue.task_done()
+
+    async def _run(self, job: ExportJob):
+        job.status = ExportStatus.running
+        part = job.path + ".part"
+        try:
+            job.total_rows, lengths = await DbSession().run(job.source.summarize)
+            widths = column_widths(job.source.headers, lengths) if job.format is ExportFormat.xlsx else None
+            writer = open_writer(job.format, job.source.headers, job.source.keys, widths, title=job.source.title)
+            with open(part, "wb") as out:
+                out.write(writer.start())
+                async for rows in stream_rows(job.source.statement, EXPORT_CHUNK_SIZE):
+                    # Encoding and writing are blocking, keep them off the event loop
+                    await run_in_threadpool(_write_rows, out, writer, rows)
+                    job.rows_written += len(rows)
+                out.write(writer.finish())
+            os.replace(part, job.path)
+            job.size = os.path.getsize(job.path)
+            job.status = ExportStatus.done
+        except asyncio.CancelledError:
+            _remove(part)
+            raise
+        except Exception:
+            logger.exception("Export %s failed", job.id)
+            _remove(part)
+            job.status = ExportStatus.failed
+            job.error = "Export failed"
+        job.finished_at = time.time()
+
+    async def sweep(self, now: Optional[float] = None):
+        """Drop jobs (and files) finished more than `ttl` ago, and files no job owns that old."""
+        now = time.time() if now is None else now
+        # The registry is only touched on the event loop, the files in a thread
+        expired = [
+            job for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at + self.ttl < now
+        ]
+        for job in expired:
+            del self._jobs[job.id]
+
+        owned = {os.path.basename(job.path) for job in self._jobs.values()}
+        owned |= {name + ".part" for name in owned}
+        await run_in_threadpool(self._sweep_files, [job.path for job in expired], owned, now)
+
+    def _sweep_files(self, expired: List[str], owned: set, now: float):
+        for path in expired:
+            _remove(path)
+
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not _FILE_RE.match(name) or name in owned:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) + self.ttl < now:
+                    _remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def _sweep_loop(self):
+        while True:
+            await self.sweep()
+            await asyncio.sleep(min(self.ttl, 60))
+
+
+def _detached_task(coroutine) -> asyncio.Task:
+    """
+    Task running in an empty context. A task copies the context it is created
+    in, and jobs start inside the request that submitted the first export:
+    its context variables (e.g. the request's SQL stats) must not follow them.
+    """
+    return contextvars.Context().run(asyncio.create_task, coroutine)
+
+
+def _write_rows(out, writer, rows):
+    data = writer.write_rows(rows)
+    if data:
+        out.write(data)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+export_jobs = ExportJobs(EXPORT_WORKERS, EXPORT_QUEUE_SIZE, EXPORT_DIR, EXPORT_TTL)
@@ -0,0 +1,66 @@
+"""
+JSON encoding for responses.
+
+`dumps` uses orjson when it is installed and falls back to the stdlib json
+module (compact, dates as ISO 8601, the same output orjson gives for naive
+datetimes). `ORJSONResponse` is the app's default response class.
+
+`page_json` renders a list page from column rows (SQLAlchemy `Row`s) without
+building or validating pydantic models: the values come straight from typed
+columns, so they are trusted. Routes still declare their `response_model`,
+which keeps the OpenAPI schema as it was.
+"""
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def page_json(
+    fields: Sequence[str],
+    rows,
+    total: Optional[int],
+    next_cursor: Optional[str] = None,
+    embedded: Optional[Dict[str, Sequence[Any]]] = None,
+) -> bytes:
+    """
+    A PaginatedResponse body for `rows`, with `fields` (in that order) of each
+    row. `embedded` adds a key to every item: name -> one value per row.
+    """
+    data = [dict(zip(fields, row)) for row in rows]
+    for name, values in (embedded or {}).items():
+        for item, value in zip(data, values):
+            item[name] = value
+    return dumps({
+        "data": data,
+        "total": total,
+        "next_cursor": next_cursor,
+    })
@@ -0,0 +1,77 @@
+"""
+Sparse fieldsets: `?fields=id,project_name,customer_name`.
+
+List endpoints always select columns rather than ORM objects: the
+requested ones, or every field of the response schema by default (plus the
+primary key, which keyset pagination needs). The rows are rendered by
+`fast_json.page_json`. Detail endpoints trim the (usually cached) full JSON.
+
+Without `fields` the endpoints answer exactly as before.
+
+`?expand=consulting_manager` embeds related objects; `parse_expand` validates
+the names against what an endpoint can embed.
+"""
+import json
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import load_only
+
+from fast_json import dumps
+
+
+def schema_fields(schema) -> Tuple[str, ...]:
+    """Field names of a response schema, in declaration order (pydantic 1 or 2)."""
+    return tuple(getattr(schema, "model_fields", None) or schema.__fields__)
+
+
+def parse_fields(schema, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """`fields=id,name` -> the requested names in `schema` order, None when not given."""
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    allowed = schema_fields(schema)
+    unknown = requested.difference(allowed)
+    if unknown or not requested:
+        raise HTTPException(400, f"fields must be a subset of: {', '.join(allowed)}")
+    return tuple(field for field in allowed if field in requested)
+
+
+def parse_expand(expand: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    """`expand=consulting_manager` -> the requested relations, empty when not given."""
+    if not expand:
+        return ()
+
+    requested = tuple(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+    if not requested or any(name not in allowed for name in requested):
+        raise HTTPException(400, f"expand must be a subset of: {', '.join(allowed)}")
+    return requested
+
+
+def response_fields(schema, selected: Optional[Tuple[str, ...]]) -> Tuple[str, ...]:
+    """The parsed `fields`, or every field of `schema` when none were requested."""
+    return selected or schema_fields(schema)
+
+
+def field_columns(model, fields: Sequence[str], *extra) -> list:
+    """
+    Columns to select for `fields`, in that order, followed by the primary key
+    and `extra` columns (e.g. the sort key a cursor needs) that are missing.
+    """
+    columns = [getattr(model, name) for name in fields]
+    for column in (model.id, *extra):
+        if column.key not in fields and all(column is not selected for selected in columns):
+            columns.append(column)
+    return columns
+
+
+def schema_load_only(model, schema):
+    """Loader option skipping the columns `schema` does not expose (e.g. the password hash)."""
+    return load_only(*[getattr(model, name) for name in schema_fields(schema) if hasattr(model, name)])
+
+
+def trim_json(body: bytes, fields: Tuple[str, ...]) -> bytes:
+    """Keep only `fields` of a serialized object."""
+    data = json.loads(body)
+    return dumps({field: data[field] for field in fields})
@@ -4,21 +4,42 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import HTTPBearer
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os
 
-from database import Base, engine
+from database import async_engine, engine
+from search import load_search_indexes
 from dependencies import verify_access_token
+from auth import load_auth_settings
+from utils import shutdown_password_pool
+from export_jobs import export_jobs
+from db_pool import DB_POOL_LOG_INTERVAL, log_pool_status
+from request_metrics import METRICS_ENABLED, MetricsMiddleware, metrics_endpoint
+from sql_metrics import SQL_STATS_ENABLED, QueryStatsMiddleware
+from fast_json import ORJSONResponse
 
 # Import ONLY the routes you need
 from routes import (
     user_routes,
     cons_manager_routes,
-    proj_experience_routes
+    proj_experience_routes,
+    internal_routes
 )
 
 load_dotenv()
 
-app = FastAPI()
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s",
+)
+
+# Migrations are a deploy step (`python -m migrations upgrade`), run once before
+# the workers start. AUTO_MIGRATE=true applies them at startup instead, for a
+# single local process only: concurrent workers would race on the same version.
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 
 # -----------------------------------------------------------
@@ -61,7 +82,15 @@ app.openapi = custom_openapi
 # -----------------------------------------------------------
 @app.on_event("startup")
 async def startup_event():
-    Base.metadata.create_all(bind=engine)
+    if AUTO_MIGRATE:
+        # Imported here: nothing of it is needed when migrations are a deploy step
+        from migrations import upgrade
+        upgrade(engine)
+    load_search_indexes(engine)
+    load_auth_settings()
+
+    if DB_POOL_LOG_INTERVAL > 0:
+        app.state.pool_log_task = asyncio.create_task(pool_log_loop())
 
     # STATIC_URL = os.getenv("STATIC_URL", "static")
     # os.makedirs(STATIC_URL, exist_ok=True)
@@ -71,6 +100,26 @@ async def startup_event():
     print("🚀 Server starting...")
 
 
+async def pool_log_loop():
+    while True:
+        await asyncio.sleep(DB_POOL_LOG_INTERVAL)
+        log_pool_status()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if getattr(app.state, "pool_log_task", None):
+        app.state.pool_log_task.cancel()
+    await export_jobs.stop()
+    shutdown_password_pool()
+
+    # Pooled aiosqlite connections each own a non-daemon thread; close them
+    # so the process can exit
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+
 # -----------------------------------------------------------
 # CORS
 # -----------------------------------------------------------
@@ -87,6 +136,17 @@ app.add_middleware(
 )
 
 
+# -----------------------------------------------------------
+# Metrics (added last so it is outermost and times everything)
+# -----------------------------------------------------------
+if SQL_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+
 # -----------------------------------------------------------
 # Static Files
 # -----------------------------------------------------------
@@ -121,3 +181,11 @@ app.include_router(
     tags=["Project Experience"],
     # dependencies=[Depends(verify_access_token)]
 )
+
+# Operational endpoints (pool state, ...)
+app.include_router(
+    internal_routes.router,
+    prefix="/internal",
+    tags=["Internal"],
+    # dependencies=[Depends(verify_access_token)]
+)
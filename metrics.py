@@ -0,0 +1,57 @@
+"""
+Small in-process metric types and helpers shared by the pool, request and SQL
+instrumentation.
+"""
+import bisect
+import threading
+from typing import Dict, Sequence
+
+
+# Seconds, roughly log-spaced from 0.5 ms to 30 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus semantics (cumulative `le` buckets)."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = cumulative + counts[-1]
+        return {"buckets": buckets, "count": buckets["+Inf"], "sum": total}
+
+
+def route_template(scope) -> str:
+    """Full path template of the matched route, e.g. `/users/{user_id}`."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if template is None:
+        return "unmatched"
+
+    # Older FastAPI releases copy included routes with the prefix in their
+    # path ("/users/{user_id}"). Newer ones match through the original router,
+    # so the route only knows "/{user_id}". Either way the template has one "/"
+    # per trailing segment of the request path; the prefix is what precedes
+    # them. Templates with {x:path} span several segments and are kept as is.
+    path = scope["path"]
+    if ":path}" in template:
+        return template
+    return path.rsplit("/", template.count("/"))[0] + template
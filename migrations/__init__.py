@@ -0,0 +1,99 @@
+"""
+Versioned schema migrations.
+
+Every schema change is a module listed in `MIGRATIONS`. Its number is its
+position in the list, and its `upgrade(connection)` runs once, in a
+transaction that also records it in the `schema_migrations` table:
+
+    python -m migrations upgrade     # apply the pending migrations
+    python -m migrations status      # current / latest version, pending ones
+
+Migrating is a deploy step, run once before the new version takes traffic
+(the deploy workflows do it before starting the container); the app does not
+touch the schema at startup. AUTO_MIGRATE=true makes it apply the pending
+migrations at startup anyway, for a single local process. Run one migrator at
+a time: two processes applying the same version conflict on its primary key.
+
+Migrations define the tables they touch with Core `Table`s of their own and
+inline their DDL instead of importing the models or app modules, so they keep
+describing the schema as it was at their version. Databases created by the old `create_all` at startup are
+picked up as they are: the initial migration only creates what is missing.
+"""
+import importlib
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+
+logger = logging.getLogger(__name__)
+
+# In order; version N is MIGRATIONS[N - 1]. Only ever append.
+MIGRATIONS = (
+    "m0001_initial",
+    "m0002_search_indexes",
+    "m0003_experience_filter_indexes",
+    "m0004_experience_stats",
+    "m0005_change_feed",
+    "m0006_data_versions",
+)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def latest_version() -> int:
+    return len(MIGRATIONS)
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied version, 0 for a database that was never migrated."""
+    with engine.connect() as connection:
+        try:
+            return connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            # No schema_migrations table yet
+            return 0
+
+
+def pending(version: int) -> List[Tuple[int, str]]:
+    """(version, module name) of the migrations after `version`."""
+    return [(number, name) for number, name in enumerate(MIGRATIONS, start=1) if number > version]
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply the pending migrations up to `target` (default: all). Returns the versions applied."""
+    todo = [
+        (number, name) for number, name in pending(current_version(engine))
+        if target is None or number <= target
+    ]
+    if not todo:
+        return []
+
+    _metadata.create_all(engine, checkfirst=True)
+    for number, name in todo:
+        module = importlib.import_module(f"{__name__}.{name}")
+        logger.info("Applying migration %04d %s", number, name)
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(version=number, name=name, applied_at=datetime.now()))
+    return [number for number, _ in todo]
+
+
+def status(engine: Engine) -> dict:
+    version = current_version(engine)
+    return {
+        "current": version,
+        "latest": latest_version(),
+        "pending": [f"{number:04d} {name}" for number, name in pending(version)],
+    }
@@ -0,0 +1,39 @@
+"""
+    python -m migrations upgrade [--to VERSION]
+    python -m migrations status
+
+Uses DATABASE_URL, like the app.
+"""
+import argparse
+import json
+import logging
+import sys
+
+from migrations import status, upgrade
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="stop at this version")
+    commands.add_parser("status", help="show the current and latest version")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    from database import engine
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.to)
+        print(json.dumps({"applied": applied, **status(engine)}))
+    else:
+        result = status(engine)
+        print(json.dumps(result))
+        # Non-zero while something is pending, so deploy scripts can check
+        sys.exit(1 if result["pending"] else 0)
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Initial schema: users, consulting_managers, project_experience."""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table
+
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(50), nullable=False, unique=True),
+    Column("name", String(50), nullable=False),
+    Column("password", String(255), nullable=False),
+    Column("email", String(50), nullable=False, unique=True),
+    Column("department_name", String(255)),
+    Column("created_at", DateTime, nullable=True),
+)
+
+Table(
+    "consulting_managers",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(150), nullable=False),
+    Column("email", String(150), nullable=False, unique=True),
+    Column("department_name", String(150), nullable=False),
+    Column("created_at", DateTime, nullable=True),
+)
+
+Table(
+    "project_experience",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("no_sales_order", String(200), nullable=False),
+    Column("customer_name", String(200), nullable=False),
+    Column("project_name", String(200), nullable=False),
+    Column("project_year", String(4), nullable=False),
+    Column("category", String(150), nullable=False),
+    Column("created_at", DateTime, nullable=True),
+    Column("consulting_manager_id", Integer, ForeignKey("consulting_managers.id"), nullable=True),
+)
+
+
+def upgrade(connection):
+    # checkfirst: tables created by the old create_all at startup are kept as they are
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,73 @@
+"""Trigram search indexes (FTS5 shadow tables on SQLite, pg_trgm GIN indexes on Postgres)."""
+import logging
+
+from sqlalchemy import text
+
+
+logger = logging.getLogger(__name__)
+
+# As of this migration; later column changes get a migration of their own
+SEARCH_COLUMNS = {
+    "users": ("username",),
+    "consulting_managers": ("name",),
+    "project_experience": ("project_name", "customer_name", "no_sales_order"),
+}
+
+
+def _install_sqlite(connection, table_name, columns):
+    fts = f"{table_name}_fts"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{col}" for col in columns)
+    old_cols = ", ".join(f"old.{col}" for col in columns)
+
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+    ).first()
+
+    if not exists:
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5("
+            f"{cols}, content='{table_name}', content_rowid='id', tokenize='trigram')"
+        )
+
+    connection.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+    )
+    connection.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+    )
+    connection.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+    )
+
+    if not exists:
+        # Index the rows that were there before the shadow table existed
+        connection.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def upgrade(connection):
+    dialect = connection.dialect.name
+
+    if dialect == "sqlite":
+        try:
+            connection.exec_driver_sql("CREATE VIRTUAL TABLE temp._trigram_probe USING fts5(x, tokenize='trigram')")
+            connection.exec_driver_sql("DROP TABLE temp._trigram_probe")
+        except Exception:
+            logger.warning("SQLite has no FTS5 trigram tokenizer, search falls back to ILIKE scans")
+            return
+
+        for table_name, columns in SEARCH_COLUMNS.items():
+            _install_sqlite(connection, table_name, columns)
+
+    elif dialect == "postgresql":
+        connection.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table_name, columns in SEARCH_COLUMNS.items():
+            for col in columns:
+                connection.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{col}_trgm "
+                    f"ON {table_name} USING gin ({col} gin_trgm_ops)"
+                )
@@ -0,0 +1,33 @@
+"""Composite indexes for the project experience list filters and sorts."""
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table
+
+
+metadata = MetaData()
+
+project_experience = Table(
+    "project_experience",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("customer_name", String(200)),
+    Column("project_year", String(4)),
+    Column("category", String(150)),
+    Column("consulting_manager_id", Integer),
+)
+
+INDEXES = (
+    Index("ix_project_experience_year", project_experience.c.project_year, project_experience.c.id),
+    Index(
+        "ix_project_experience_category_year",
+        project_experience.c.category, project_experience.c.project_year, project_experience.c.id,
+    ),
+    Index(
+        "ix_project_experience_manager_year",
+        project_experience.c.consulting_manager_id, project_experience.c.project_year, project_experience.c.id,
+    ),
+    Index("ix_project_experience_customer", project_experience.c.customer_name, project_experience.c.id),
+)
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,37 @@
+"""Summary table of project experience counts per (manager, year, category), filled from the current rows."""
+from sqlalchemy import Column, Integer, MetaData, String, Table, delete, func, insert, select
+
+
+metadata = MetaData()
+
+project_experience = Table(
+    "project_experience",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("project_year", String(4)),
+    Column("category", String(150)),
+    Column("consulting_manager_id", Integer),
+)
+
+project_experience_stats = Table(
+    "project_experience_stats",
+    metadata,
+    Column("consulting_manager_key", Integer, primary_key=True, autoincrement=False),
+    Column("project_year", String(4), primary_key=True),
+    Column("category", String(150), primary_key=True),
+    Column("count", Integer, nullable=False),
+)
+
+
+def upgrade(connection):
+    project_experience_stats.create(connection, checkfirst=True)
+
+    # 0 stands for "no manager"
+    experiences = project_experience.c
+    manager_key = func.coalesce(experiences.consulting_manager_id, 0)
+    connection.execute(delete(project_experience_stats))
+    connection.execute(insert(project_experience_stats).from_select(
+        ["consulting_manager_key", "project_year", "category", "count"],
+        select(manager_key, experiences.project_year, experiences.category, func.count())
+        .group_by(manager_key, experiences.project_year, experiences.category),
+    ))
@@ -0,0 +1,48 @@
+"""updated_at columns and indexes for the change feed, and the deleted_rows tombstone log."""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, inspect, update
+
+
+metadata = MetaData()
+
+TABLES = ("users", "consulting_managers", "project_experience")
+
+tables = {
+    name: Table(
+        name,
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+    )
+    for name in TABLES
+}
+
+deleted_rows = Table(
+    "deleted_rows",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("table_name", String(100), nullable=False),
+    Column("row_id", Integer, nullable=False),
+    Column("deleted_at", DateTime, nullable=False),
+    Index("ix_deleted_rows_table_deleted_at", "table_name", "deleted_at", "id"),
+)
+
+
+def upgrade(connection):
+    existing = inspect(connection)
+    # Naive UTC, like the app writes it
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for name, table in tables.items():
+        # Databases made by create_all from newer models already have the column
+        if "updated_at" not in {column["name"] for column in existing.get_columns(name)}:
+            # Spelled like create_all spells a DateTime (DATETIME on SQLite)
+            column_type = DateTime().compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {name} ADD COLUMN updated_at {column_type}")
+        # Rows from before count as changed now (created_at is local time).
+        # Bound from Python so it is stored like the app's values.
+        connection.execute(update(table).where(table.c.updated_at.is_(None)).values(updated_at=now))
+        Index(f"ix_{name}_updated_at", table.c.updated_at, table.c.id).create(connection, checkfirst=True)
+
+    deleted_rows.create(connection, checkfirst=True)
@@ -0,0 +1,25 @@
+"""Stored per-table data versions, the source of the list and stats ETags."""
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select
+
+
+metadata = MetaData()
+
+# Tables whose ETags come from a stored version, as of this migration
+VERSIONED_TABLES = ("users", "consulting_managers", "project_experience")
+
+data_versions = Table(
+    "data_versions",
+    metadata,
+    Column("table_name", String(100), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+def upgrade(connection):
+    data_versions.create(connection, checkfirst=True)
+
+    # Databases made by create_all already have the (empty) table
+    existing = set(connection.scalars(select(data_versions.c.table_name)))
+    rows = [{"table_name": name, "version": 0} for name in VERSIONED_TABLES if name not in existing]
+    if rows:
+        connection.execute(insert(data_versions), rows)
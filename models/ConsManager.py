@@ -1,12 +1,16 @@
-from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String
-from database import Base
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from database import Base, utcnow
 
 class ConsultingManager(Base):
     __tablename__ = "consulting_managers"
+    # Change feed order (created by migration 0005)
+    __table_args__ = (Index("ix_consulting_managers_updated_at", "updated_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(150), nullable=False)
     email = Column(String(150), nullable=False, unique=True)
     department_name = Column(String(150), nullable=False)
-    created_at = Column(DateTime, default =datetime.now(), nullable=True)
+    # Callables, so each row gets the time of its own insert / update, both naive UTC
+    # (created_at of rows inserted by older versions is server local time)
+    created_at = Column(DateTime, default=utcnow, nullable=True)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=True)
@@ -1,10 +1,22 @@
-from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey
+from sqlalchemy import Column, DateTime, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
-from database import Base
+from database import Base, utcnow
 
 class ProjectExperience(Base):
     __tablename__ = "project_experience"
+    # project_experience_stats counts these rows (see experience_stats). Writes
+    # through a Session keep it current; raw SQL on this table does not, run
+    # `python -m experience_stats rebuild` afterwards.
+    # Access paths of the list filters and sorts (created by migration 0003)
+    # and of the change feed (0005). The trailing id keeps ties in keyset
+    # order without a sort step.
+    __table_args__ = (
+        Index("ix_project_experience_year", "project_year", "id"),
+        Index("ix_project_experience_category_year", "category", "project_year", "id"),
+        Index("ix_project_experience_manager_year", "consulting_manager_id", "project_year", "id"),
+        Index("ix_project_experience_customer", "customer_name", "id"),
+        Index("ix_project_experience_updated_at", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -13,7 +25,10 @@ class ProjectExperience(Base):
     project_name = Column(String(200), nullable=False)
     project_year = Column(String(4), nullable=False)
     category = Column(String(150), nullable=False)
-    created_at = Column(DateTime, default =datetime.now(), nullable=True)
+    # Callables, so each row gets the time of its own insert / update, both naive UTC
+    # (created_at of rows inserted by older versions is server local time)
+    created_at = Column(DateTime, default=utcnow, nullable=True)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=True)
 
     consulting_manager_id = Column(
         Integer,
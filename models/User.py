@@ -1,16 +1,20 @@
-from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, Enum, DateTime, Boolean
-from database import Base
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Boolean, Index
+from database import Base, utcnow
 
 
 
 class User(Base):
     __tablename__ = "users"
+    # Change feed order (created by migration 0005)
+    __table_args__ = (Index("ix_users_updated_at", "updated_at", "id"),)
     id = Column(Integer,primary_key=True,index=True)
     username= Column(String(50), nullable=False, unique=True)
     name= Column(String(50), nullable=False)
     password = Column(String(255), nullable=False)
     email= Column(String(50), nullable=False, unique=True)
     department_name= Column(String(255))
-    created_at = Column(DateTime, default =datetime.now(), nullable=True)
+    # Callables, so each row gets the time of its own insert / update, both naive UTC
+    # (created_at of rows inserted by older versions is server local time)
+    created_at = Column(DateTime, default=utcnow, nullable=True)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=True)
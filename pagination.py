@@ -0,0 +1,237 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Offset pagination makes the database walk and discard `skip` rows on every
+request, so deep pages get slower linearly and shift when rows are inserted.
+Keyset pagination remembers the sort key of the last row instead and asks for
+rows strictly after it, which is a plain index range scan for any page.
+
+The cursor is opaque to clients: a urlsafe base64 JSON list of the sort values
+of the last row on the page.
+
+`parse_sort` validates `sort=column` / `sort=-column` against the columns a
+list endpoint allows (the ones it has an index for).
+
+Totals go through `count_total`, which caches COUNT(*) results per
+(table, filters) and can estimate or skip them (`total_mode`).
+"""
+import base64
+import binascii
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import Query
+
+from data_version import get_version
+
+
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", 30))
+COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", 1024))
+
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(400, "Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise HTTPException(400, "Invalid cursor")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if value is not None and python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif value is not None and not isinstance(value, python_type):
+                value = python_type(value)
+        except (TypeError, ValueError):
+            raise HTTPException(400, "Invalid cursor")
+        decoded.append(value)
+    return decoded
+
+
+def _after(columns: List[Any], values: List[Any], descending: bool):
+    """
+    (c1, c2, ...) > (v1, v2, ...) spelled out with AND/OR so it works on every
+    backend and still matches a composite index on the same columns.
+    """
+    column, value = columns[0], values[0]
+    beyond = column < value if descending else column > value
+    if len(columns) == 1:
+        return beyond
+    return or_(beyond, and_(column == value, _after(columns[1:], values[1:], descending)))
+
+
+def parse_sort(model, sort: Optional[str], allowed: Tuple[str, ...]) -> Tuple[Any, bool]:
+    """`sort=-project_year` -> (ProjectExperience.project_year, True). Sorts by id when not given."""
+    if not sort:
+        return model.id, False
+
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+    if name not in allowed:
+        raise HTTPException(400, f"sort must be one of: {', '.join(allowed)} (prefix with - for descending)")
+    return getattr(model, name), descending
+
+
+def keyset_page(
+    query: Query,
+    id_column,
+    cursor: str,
+    limit: int,
+    sort_column=None,
+    descending: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of `query` after `cursor` plus the cursor of the next page
+    (None when this is the last page). An empty cursor starts from the beginning.
+
+    Rows are ordered by `sort_column` (if given) with `id_column` as tie breaker,
+    so the order is total and stable.
+    """
+    if limit < 1:
+        raise HTTPException(400, "limit must be at least 1 in cursor mode")
+
+    columns = [sort_column, id_column] if sort_column is not None else [id_column]
+
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+
+    query = query.order_by(*[column.desc() if descending else column for column in columns])
+
+    # One extra row tells us whether there is a next page without a COUNT
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return rows, next_cursor
+
+
+# -------------------------
+# Totals
+# -------------------------
+
+class TotalMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    none = "none"
+
+
+class _CountCache:
+    """
+    LRU of COUNT(*) results keyed by (table, filter key).
+    An entry is valid while the table's data version is unchanged and it is
+    younger than COUNT_CACHE_TTL (the TTL covers writes made by other workers).
+    """
+
+    def __init__(self, size: int, ttl: float):
+        self.size = size
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[int, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, table: str, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry is None:
+                return None
+            version, total, stored_at = entry
+            if version != get_version(table) or time.monotonic() - stored_at > self.ttl:
+                del self._entries[(table, key)]
+                return None
+            self._entries.move_to_end((table, key))
+            return total
+
+    def set(self, table: str, key: Hashable, version: int, total: int):
+        with self._lock:
+            self._entries[(table, key)] = (version, total, time.monotonic())
+            self._entries.move_to_end((table, key))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+_counts = _CountCache(COUNT_CACHE_SIZE, COUNT_CACHE_TTL)
+
+
+def _estimate(query: Query, table: str, filtered: bool) -> Optional[int]:
+    """
+    Planner estimate of the row count, or None when the backend has none.
+    Postgres: pg_class.reltuples for the whole table, EXPLAIN row estimate for
+    a filtered query.
+    """
+    connection = query.session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+
+    if not filtered:
+        estimate = connection.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table},
+        ).scalar()
+    else:
+        compiled = query.statement.compile(dialect=connection.dialect)
+        params = compiled.params
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = plan[0]["Plan"]["Plan Rows"]
+
+    # reltuples is -1 for a table that has never been vacuumed/analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def count_total(
+    query: Query,
+    table: str,
+    filter_key: Optional[Hashable] = None,
+    mode: TotalMode = TotalMode.exact,
+) -> Optional[int]:
+    """
+    Total number of rows matched by `query`.
+
+    `filter_key` must identify the filters applied to `query` (None when
+    unfiltered); it is the cache key together with `table`.
+    - exact: cached COUNT(*), recomputed after writes or TTL expiry
+    - estimated: planner statistics where available, else the exact path
+    - none: no count at all, returns None
+    """
+    if mode == TotalMode.none:
+        return None
+
+    if mode == TotalMode.estimated:
+        estimate = _estimate(query, table, filter_key is not None)
+        if estimate is not None:
+            return estimate
+
+    total = _counts.get(table, filter_key)
+    if total is None:
+        version = get_version(table)
+        total = query.order_by(None).count()
+        _counts.set(table, filter_key, version, total)
+    return total
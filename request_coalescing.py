@@ -0,0 +1,108 @@
+"""
+Single-flight coalescing of identical concurrent GETs.
+
+When the dashboard opens, many tabs ask for the same list within a few
+milliseconds. `single_flight.run(key, load)` runs `load` only for the first
+request with a given key. The requests with the same key that arrive while it
+is in flight wait for it and get the same result (or the same exception).
+With COALESCE_CACHE_TTL > 0 the result is also kept that many seconds after
+it completes, for requests that arrive just too late to join.
+
+The list and stats endpoints use their table ETag as the key (see
+etag.table_etag): path, query parameters and the stored versions of the tables
+read. A committed write, in any worker, therefore starts a new flight instead
+of joining one that may have read the old rows; only the micro-cache can
+serve a result up to COALESCE_CACHE_TTL older than a write.
+Only use it for responses that depend on nothing else (no per-user data).
+
+Counters (flights run, requests that joined one, micro-cache hits) are served
+at GET /internal/coalescing and on /metrics.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds a result is reused after its flight completed; 0 turns the micro-cache off
+COALESCE_CACHE_TTL = float(os.getenv("COALESCE_CACHE_TTL", 0))
+COALESCE_CACHE_SIZE = int(os.getenv("COALESCE_CACHE_SIZE", 1024))
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, cache_ttl: float, cache_size: int):
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.flights = 0
+        self.joined = 0
+        self.cache_hits = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._cache: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    async def run(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        if not COALESCE_ENABLED:
+            return await load()
+
+        if self.cache_ttl > 0:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if time.monotonic() <= entry[1]:
+                    self.cache_hits += 1
+                    return entry[0]
+                del self._cache[key]
+
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.joined += 1
+            try:
+                # Shielded: a waiter going away must not cancel the others' flight
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+            # The request running it went away; start over
+            return await self.run(key, load)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = flight
+        self.flights += 1
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # Retrieved here, so a flight nobody joined does not log "never retrieved"
+            flight.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+        flight.set_result(value)
+        if self.cache_ttl > 0:
+            self._cache[key] = (value, time.monotonic() + self.cache_ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        requests = self.flights + self.joined + self.cache_hits
+        return {
+            "enabled": COALESCE_ENABLED,
+            "cache_ttl": self.cache_ttl,
+            "in_flight": len(self._in_flight),
+            "flights": self.flights,
+            "joined": self.joined,
+            "cache_hits": self.cache_hits,
+            # Share of requests that did not run their own queries
+            "collapsed_ratio": round((self.joined + self.cache_hits) / requests, 4) if requests else None,
+        }
+
+
+single_flight = SingleFlight(COALESCE_CACHE_TTL, COALESCE_CACHE_SIZE)
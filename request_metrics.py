@@ -0,0 +1,191 @@
+"""
+Per-route HTTP metrics and the Prometheus /metrics endpoint.
+
+`MetricsMiddleware` is a plain ASGI middleware (no BaseHTTPMiddleware, no
+request objects): per request it takes two clock readings, wraps `send` to
+pick up the status code and body size, and updates a histogram keyed by
+(method, route template, status). The route template comes from the route
+that was matched (`scope["route"]`), e.g. `/users/{user_id}`, so label
+cardinality is bounded by the number of routes; requests that match no route
+are labelled `unmatched`.
+
+METRICS_ENABLED=false leaves both the middleware and /metrics out.
+"""
+import os
+import time
+from typing import Dict, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from db_pool import pool_status
+from entity_cache import entity_cache
+from request_coalescing import single_flight
+from metrics import Histogram, route_template
+from sql_metrics import route_query_stats
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Bytes, 100 B to 10 MB
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.in_flight = 0
+        # (method, route, status) -> latency histogram, (method, route) -> size histogram
+        self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.size: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int):
+        key = (method, route, str(status))
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency.setdefault(key, Histogram())
+        histogram.observe(seconds)
+
+        histogram = self.size.get(key[:2])
+        if histogram is None:
+            histogram = self.size.setdefault(key[:2], Histogram(SIZE_BUCKETS))
+        histogram.observe(size)
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        response = [500, 0]  # status, body bytes
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                response[0] = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            metrics.observe(scope["method"], route_template(scope), response[0], elapsed, response[1])
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _histogram_lines(name: str, snapshot: dict, labels: str) -> list:
+    prefix = f"{labels}," if labels else ""
+    lines = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in snapshot["buckets"].items()]
+    lines.append(f"{name}_sum{{{labels}}} {snapshot['sum']}")
+    lines.append(f"{name}_count{{{labels}}} {snapshot['count']}")
+    return lines
+
+
+def render_prometheus(metrics: RequestMetrics = request_metrics) -> str:
+    lines = [
+        "# HELP http_requests_in_flight Requests currently being served.",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {metrics.in_flight}",
+        "# HELP http_requests_total Requests served, by route template, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    latency = [(key, histogram.snapshot()) for key, histogram in sorted(metrics.latency.items())]
+    for (method, route, status), snapshot in latency:
+        lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {snapshot['count']}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency, by route template, method and status.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), snapshot in latency:
+        lines += _histogram_lines(
+            "http_request_duration_seconds", snapshot, _labels(method=method, route=route, status=status)
+        )
+
+    lines += [
+        "# HELP http_response_size_bytes Response body size, by route template and method.",
+        "# TYPE http_response_size_bytes histogram",
+    ]
+    for (method, route), histogram in sorted(metrics.size.items()):
+        lines += _histogram_lines("http_response_size_bytes", histogram.snapshot(), _labels(method=method, route=route))
+
+    lines += [
+        "# HELP http_request_db_queries SQL statements per request, by route template and method.",
+        "# TYPE http_request_db_queries histogram",
+    ]
+    for (method, route), histogram in sorted(route_query_stats.queries.items()):
+        lines += _histogram_lines("http_request_db_queries", histogram.snapshot(), _labels(method=method, route=route))
+
+    lines += [
+        "# HELP http_request_db_seconds Time spent in SQL statements per request, by route template and method.",
+        "# TYPE http_request_db_seconds histogram",
+    ]
+    for (method, route), histogram in sorted(route_query_stats.seconds.items()):
+        lines += _histogram_lines("http_request_db_seconds", histogram.snapshot(), _labels(method=method, route=route))
+
+    pools = pool_status()
+    for name, kind, help_text in (
+        ("checked_out", "gauge", "Connections currently checked out."),
+        ("overflow", "gauge", "Overflow connections currently open."),
+        ("checkouts", "counter", "Connection checkouts."),
+        ("waits", "counter", "Checkouts that found the pool exhausted."),
+        ("timeouts", "counter", "Checkouts that timed out."),
+    ):
+        metric = f"db_pool_{name}_total" if kind == "counter" else f"db_pool_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f"{metric}{{{_labels(engine=engine)}}} {status[name]}" for engine, status in pools.items()]
+
+    for name, help_text in (
+        ("acquire", "Time to get a connection from the pool."),
+        ("hold", "Time connections stay checked out."),
+    ):
+        metric = f"db_pool_{name}_seconds"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+        for engine, status in pools.items():
+            lines += _histogram_lines(metric, status[f"{name}_seconds"], _labels(engine=engine))
+
+    for name, help_text in (
+        ("hits", "Entity cache lookups that found the entry."),
+        ("misses", "Entity cache lookups that had to load the row."),
+        ("evictions", "Entity cache entries evicted to stay within ENTITY_CACHE_SIZE."),
+        ("invalidations", "Entity cache entries dropped after a write."),
+    ):
+        metric = f"entity_cache_{name}_total"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines.append(f"{metric} {entity_cache.backend.evictions if name == 'evictions' else getattr(entity_cache, name)}")
+
+    for name, help_text in (
+        ("flights", "Coalesced GETs that ran their own queries."),
+        ("joined", "Coalesced GETs that waited for an identical request in flight."),
+        ("cache_hits", "Coalesced GETs answered from the micro-cache."),
+    ):
+        metric = f"coalescing_{name}_total"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines.append(f"{metric} {getattr(single_flight, name)}")
+
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
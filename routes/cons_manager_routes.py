@@ -1,58 +1,141 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from schemas.PaginatedResponseSchemas import PaginatedResponse
+from schemas.ChangeFeedSchemas import ChangeFeedResponse
 from models.ConsManager import ConsultingManager
 from schemas.ConsManagerSchema import ConsultingManagerCreate, ConsultingManagerResponse
-from database import get_db
+from database import DbSession, get_db
+from search import search_filter
+from pagination import TotalMode, count_total, keyset_page
+from etag import check_etag, row_etag, table_etag
+from entity_cache import entity_cache
+from routes.helper import json_response, ndjson_response
+from request_coalescing import single_flight
+from fast_json import dumps, page_json
+from change_feed import CHANGES_MAX_LIMIT, changes
+from fieldsets import field_columns, parse_fields, response_fields, trim_json
 
 from dependencies import verify_access_token
 
 router = APIRouter()
 
+entity_cache.register(ConsultingManager, ConsultingManagerResponse)
+
 
 @router.post("/", response_model=ConsultingManagerResponse)
-def create_manager(data: ConsultingManagerCreate, db: Session = Depends(get_db)):
-    new_manager = ConsultingManager(**data.dict())
-    db.add(new_manager)
-    db.commit()
-    db.refresh(new_manager)
-    return new_manager
+async def create_manager(data: ConsultingManagerCreate, db: DbSession = Depends(get_db)):
+
+    def insert(session: Session):
+        new_manager = ConsultingManager(**data.dict())
+        session.add(new_manager)
+        session.commit()
+        session.refresh(new_manager)
+        return new_manager
+
+    return await db.run(insert)
 
 
 @router.get("/", response_model=PaginatedResponse[ConsultingManagerResponse])
-def get_managers(
+async def get_managers(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 10,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = TotalMode.exact,
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db)
 ):
-    query = db.query(ConsultingManager)
+    output_fields = response_fields(ConsultingManagerResponse, parse_fields(ConsultingManagerResponse, fields))
+
+    etag = await table_etag(request, db, ConsultingManager.__tablename__)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    def list_managers(session: Session):
+        # Column rows, rendered straight to JSON without building models (see fast_json)
+        query = session.query(*field_columns(ConsultingManager, output_fields))
+
+        if search:
+            query = query.filter(search_filter(ConsultingManager, search))
+
+        total = count_total(query, ConsultingManager.__tablename__, search or None, total_mode)
+
+        # Cursor mode (?cursor=, empty for the first page) pages by id instead of offset
+        next_cursor = None
+        if cursor is not None:
+            data, next_cursor = keyset_page(query, ConsultingManager.id, cursor, limit)
+        else:
+            data = query.order_by(ConsultingManager.id).offset(skip).limit(limit).all()
+
+        return page_json(output_fields, data, total, next_cursor)
 
-    if search:
-        query = query.filter(ConsultingManager.name.ilike(f"%{search}%"))
+    # Identical concurrent requests share one run (the ETag covers query and data version)
+    return json_response(await single_flight.run(etag, lambda: db.run(list_managers)), response)
 
-    total = query.count()
-    data = query.offset(skip).limit(limit).all()
 
-    return PaginatedResponse(data=data, total=total)
+@router.get("/changes", response_model=ChangeFeedResponse[ConsultingManagerResponse])
+async def get_manager_changes(
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=CHANGES_MAX_LIMIT),
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db)
+):
+    """
+    Consulting managers inserted, updated or deleted after the `since` token, every one
+    without it. Keep `next_token` for the next call (see change_feed).
+    """
+    output_fields = response_fields(ConsultingManagerResponse, parse_fields(ConsultingManagerResponse, fields))
+    body = await db.run(lambda session: dumps(changes(session, ConsultingManager, output_fields, since, limit)))
+    return json_response(body, response)
+
 
+@router.get("/stream")
+async def stream_managers(fields: Optional[str] = None):
+    """
+    Every consulting manager as newline-delimited JSON, ordered by id: full dumps
+    (ETL) without paging through the list. `fields` as on the list.
+    """
+    output_fields = response_fields(ConsultingManagerResponse, parse_fields(ConsultingManagerResponse, fields))
+    statement = select(*field_columns(ConsultingManager, output_fields)).order_by(ConsultingManager.id)
+    return ndjson_response(statement, output_fields)
 
 
 @router.get("/{manager_id}", response_model=ConsultingManagerResponse)
-def get_manager(manager_id: int, db: Session = Depends(get_db)):
-    manager = db.query(ConsultingManager).filter_by(id=manager_id).first()
+async def get_manager(
+    manager_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db),
+):
+    selected = parse_fields(ConsultingManagerResponse, fields)
+
+    not_modified = check_etag(request, response, await row_etag(request, db, ConsultingManager, manager_id))
+    if not_modified:
+        return not_modified
+
+    manager = await entity_cache.get_or_load(db, ConsultingManager, manager_id)
     if not manager:
         raise HTTPException(404, "Consulting Manager not found")
-    return manager
+    return json_response(trim_json(manager, selected) if selected else manager, response)
 
 
 @router.delete("/{manager_id}")
-def delete_manager(manager_id: int, db: Session = Depends(get_db)):
-    manager = db.query(ConsultingManager).filter_by(id=manager_id).first()
-    if not manager:
-        raise HTTPException(404, "Consulting Manager not found")
+async def delete_manager(manager_id: int, db: DbSession = Depends(get_db)):
+
+    def delete(session: Session):
+        manager = session.query(ConsultingManager).filter_by(id=manager_id).first()
+        if not manager:
+            raise HTTPException(404, "Consulting Manager not found")
+
+        session.delete(manager)
+        session.commit()
 
-    db.delete(manager)
-    db.commit()
+    await db.run(delete)
     return {"message": "Deleted successfully"}
@@ -1,5 +1,14 @@
 import os
-from fastapi import Request
+from typing import Sequence
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from database import stream_rows
+from export_formats import MEDIA_TYPES, ExportFormat, NdjsonWriter
+
+# Rows read and serialized per step of a /stream response
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 1000))
 
 
 def generate_attachment_url(file_path: str, request: Request = None) -> str:
@@ -13,4 +22,27 @@ def generate_attachment_url(file_path: str, request: Request = None) -> str:
     else:
         # Fallback to environment variable or default
         base_url = os.getenv("BASE_URL", "http://localhost:8000")
-        return f"{base_url}/static/{clean_path}"
\ No newline at end of file
+        return f"{base_url}/static/{clean_path}"
+
+def json_response(body: bytes, response: Response) -> Response:
+    """Already serialized JSON as the route's response, keeping headers set on `response` (ETag, ...)."""
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def ndjson_response(statement, keys: Sequence[str]) -> StreamingResponse:
+    """
+    Every row of `statement` as one JSON object per line, keyed by `keys`.
+
+    The rows come from a single SELECT read with a server-side cursor
+    (`stream_rows`), so the dump is one consistent snapshot and memory stays at
+    one chunk. The next chunk is only read once the previous one has been sent,
+    so a slow client slows the read instead of filling buffers.
+    """
+    writer = NdjsonWriter(keys)
+
+    async def content():
+        async for rows in stream_rows(statement, STREAM_CHUNK_SIZE):
+            yield await run_in_threadpool(writer.write_rows, rows)
+
+    return StreamingResponse(content(), media_type=MEDIA_TYPES[ExportFormat.ndjson])
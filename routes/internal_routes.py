@@ -0,0 +1,36 @@
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+from db_pool import pool_status
+from entity_cache import entity_cache
+from request_coalescing import single_flight
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+async def get_db_pool():
+    """
+    Connection pool state per engine ("sync", and "async" when DB_ASYNC is on):
+    checked-out connections, overflow, checkouts that had to wait, timeouts, and
+    histograms of checkout latency (acquire) and time held.
+    """
+    return pool_status()
+
+
+@router.get("/entity-cache")
+async def get_entity_cache():
+    """
+    Entity cache backend, entry count, hits, misses, hit ratio, LRU evictions
+    and invalidations since the process started.
+    """
+    # The Redis backend asks the server for its size
+    return await run_in_threadpool(entity_cache.stats)
+
+
+@router.get("/coalescing")
+async def get_coalescing():
+    """
+    GET coalescing since the process started: flights run, requests that
+    joined one in flight, micro-cache hits and the share of requests collapsed.
+    """
+    return single_flight.stats()
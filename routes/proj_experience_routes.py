@@ -1,167 +1,845 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session,joinedload
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
 from schemas import PaginatedResponseSchemas
+from schemas.ChangeFeedSchemas import ChangeFeedResponse
 from models.ConsManager import ConsultingManager
 from models.ProjExperience import ProjectExperience
-from schemas.ProjManagerSchema import ProjectExperienceCreate, ProjectExperienceResponse, ProjectExperienceUpdate
-from database import get_db
-from fastapi.responses import StreamingResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from io import BytesIO
+from schemas.ConsManagerSchema import ConsultingManagerResponse
+from schemas.ProjManagerSchema import (
+    ProjectExperienceBulkError, ProjectExperienceBulkResponse, ProjectExperienceCreate, ProjectExperienceExpandedResponse,
+    ProjectExperienceExportCreate, ProjectExperienceExportResponse,
+    ProjectExperienceImportError, ProjectExperienceImportResponse, ProjectExperienceResponse,
+    ProjectExperienceStatsResponse, ProjectExperienceStatsSummary, ProjectExperienceUpdate
+)
+from database import DbSession, get_db, stream_rows
+from search import parse_search_fields, search_filter
+from pagination import TotalMode, count_total, keyset_page, parse_sort
+from etag import check_etag, row_etag, table_etag
+from entity_cache import entity_cache
+from fast_json import dumps, page_json
+from change_feed import CHANGES_MAX_LIMIT, changes
+from fieldsets import field_columns, parse_expand, parse_fields, response_fields, schema_fields, trim_json
+from routes.helper import json_response, ndjson_response
+from request_coalescing import single_flight
+from experience_stats import NO_MANAGER, StatsDimension, group_counts, record_inserted, stats_filters
+from export_formats import MEDIA_TYPES, ExportFormat, column_widths, open_writer
+from export_jobs import EXPORT_CHUNK_SIZE, ExportJob, ExportQueueFull, ExportSource, ExportStatus, export_jobs
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
+import itertools
+import json
+import os
 
 
 router = APIRouter()
 
+entity_cache.register(ProjectExperience, ProjectExperienceResponse)
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 1000))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 5000))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+# `sort=` columns of the list, each backed by an index (see the model)
+EXPERIENCE_SORTS = ("id", "project_year", "customer_name")
+# Relations `expand=` can embed
+EXPERIENCE_EXPANDS = ("consulting_manager",)
+
 
 
 @router.post("/", response_model=ProjectExperienceResponse)
-def create_experience(
+async def create_experience(
     data: ProjectExperienceCreate,
-    db: Session = Depends(get_db), 
+    db: DbSession = Depends(get_db), 
 ):
-    new_project = ProjectExperience(
-        **data.dict(),
-    )
+    def insert(session: Session):
+        new_project = ProjectExperience(
+            **data.dict(),
+        )
+
+        session.add(new_project)
+        session.commit()
+        session.refresh(new_project)
+        return new_project
+
+    return await db.run(insert)
+
+
+def _rejected_row(
+    session: Session, statement, inserted: List[Tuple[int, dict]], batch: List[Tuple[int, dict]],
+) -> Optional[Tuple[int, DBAPIError]]:
+    """
+    First (index, error) of `batch` the database rejects, found by replaying
+    the rows `inserted` before it and then inserting `batch` row by row.
+    The caller rolls the transaction back afterwards.
+    """
+    try:
+        if inserted:
+            session.execute(statement, [values for _, values in inserted])
+    except DBAPIError:
+        return None
+
+    for index, values in batch:
+        try:
+            session.scalar(statement, [values])
+        except DBAPIError as exc:
+            return index, exc
+    return None
+
+
+def bulk_insert_experiences(
+    session: Session,
+    rows: List[Tuple[int, dict]],
+    atomic: bool,
+    batch_size: int,
+) -> Tuple[List[int], List[ProjectExperienceBulkError]]:
+    """
+    Insert `rows` ((index, values) pairs) with one multi-row INSERT ... RETURNING
+    per batch. Returns the new ids (ascending) and per-item errors.
+
+    atomic: one transaction, nothing is inserted if any item fails; the error
+    names the first item of the failing batch the database rejects.
+    Otherwise every batch commits on its own; a batch the database rejects is
+    retried row by row so only the offending items are reported.
+    """
+    errors = []
+
+    # Validate every referenced manager with one IN query per chunk of ids
+    manager_ids = {values["consulting_manager_id"] for _, values in rows if values.get("consulting_manager_id") is not None}
+    known_ids = set()
+    manager_id_list = list(manager_ids)
+    for start in range(0, len(manager_id_list), 1000):
+        known_ids.update(session.scalars(
+            select(ConsultingManager.id).where(ConsultingManager.id.in_(manager_id_list[start:start + 1000]))
+        ))
+
+    valid = []
+    for index, values in rows:
+        manager_id = values.get("consulting_manager_id")
+        if manager_id is not None and manager_id not in known_ids:
+            errors.append(ProjectExperienceBulkError(index=index, detail="Consulting manager does not exist"))
+        else:
+            valid.append((index, values))
+
+    if atomic and errors:
+        return [], errors
+
+    # Without sort_by_parameter_order: asking for it makes SQLAlchemy fall back
+    # to one INSERT per row on SQLite
+    statement = insert(ProjectExperience).returning(ProjectExperience.id)
+    ids = []
+
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            ids.extend(session.scalars(statement, [values for _, values in batch]))
+            # Bulk INSERTs do not fire the mapper events that keep the counts
+            record_inserted(session.connection(), [values for _, values in batch])
+            if not atomic:
+                session.commit()
+        except DBAPIError as exc:
+            session.rollback()
+            if atomic:
+                # Only the failure path pays for finding the offending row
+                index, exc = _rejected_row(session, statement, valid[:start], batch) or (batch[0][0], exc)
+                session.rollback()
+                return [], [ProjectExperienceBulkError(index=index, detail=str(exc.orig))]
+
+            for index, values in batch:
+                try:
+                    ids.append(session.scalar(statement, [values]))
+                    record_inserted(session.connection(), [values])
+                    session.commit()
+                except DBAPIError as row_exc:
+                    session.rollback()
+                    errors.append(ProjectExperienceBulkError(index=index, detail=str(row_exc.orig)))
+
+    session.commit()
+    ids.sort()
+    errors.sort(key=lambda error: error.index)
+    return ids, errors
+
+
+@router.post("/bulk", response_model=ProjectExperienceBulkResponse)
+async def bulk_create_experiences(
+    items: List[ProjectExperienceCreate],
+    atomic: bool = False,
+    batch_size: int = Query(BULK_BATCH_SIZE, ge=1, le=10000),
+    db: DbSession = Depends(get_db),
+):
+    """
+    Create many project experiences in one request.
+    Unknown consulting managers and rows rejected by the database are reported
+    per item; with `atomic=true` any error rejects the whole request.
+    """
+    rows = [(index, item.dict()) for index, item in enumerate(items)]
+    ids, errors = await db.run(bulk_insert_experiences, rows, atomic, batch_size)
+
+    if atomic and errors:
+        raise HTTPException(400, {"errors": [error.dict() for error in errors]})
+
+    return ProjectExperienceBulkResponse(inserted=len(ids), ids=ids, errors=errors)
+
+
+# Spreadsheet header (as written by the export, or the field name) -> field
+IMPORT_COLUMNS = {
+    "id": "id",
+    "no sales order": "no_sales_order",
+    "customer name": "customer_name",
+    "project name": "project_name",
+    "project year": "project_year",
+    "category": "category",
+    "consulting manager": "consulting_manager",
+    "consulting manager id": "consulting_manager",
+}
+
+IMPORT_REQUIRED_FIELDS = ("no_sales_order", "customer_name", "project_name", "project_year", "category")
+
+_AMBIGUOUS = object()
+
+
+def _import_columns(header: tuple) -> Dict[str, int]:
+    columns = {}
+    for position, title in enumerate(header):
+        field = IMPORT_COLUMNS.get(str(title or "").strip().lower().replace("_", " "))
+        if field and field not in columns:
+            columns[field] = position
+
+    missing = [field for field in IMPORT_REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise HTTPException(400, f"Missing columns: {', '.join(missing)}")
+    return columns
+
+
+def _cell_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
 
-    db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
-    return new_project
 
+def _load_manager_lookup(session: Session):
+    """Manager name (case-insensitive) -> id, plus the set of ids, for one import."""
+    by_name, ids = {}, set()
+    for manager_id, name in session.execute(select(ConsultingManager.id, ConsultingManager.name)):
+        key = name.strip().lower()
+        by_name[key] = _AMBIGUOUS if key in by_name else manager_id
+        ids.add(manager_id)
+    return by_name, ids
 
-@router.get("/", response_model=PaginatedResponseSchemas.PaginatedResponse[ProjectExperienceResponse])
-def get_experiences(
+
+def _parse_import_chunk(rows, columns: Dict[str, int], managers, size: int):
+    """
+    Parse up to `size` rows. Returns (consumed, blank, parsed, errors) where
+    parsed holds (row_number, existing_id, values) tuples ready for insertion.
+    """
+    by_name, manager_ids = managers
+    consumed = blank = 0
+    parsed, errors = [], []
+
+    for row_number, cells in itertools.islice(rows, size):
+        consumed += 1
+        record = {
+            field: _cell_text(cells[position]) if position < len(cells) else None
+            for field, position in columns.items()
+        }
+        if not any(record.values()):
+            blank += 1
+            continue
+
+        error = None
+        for field in IMPORT_REQUIRED_FIELDS:
+            max_length = ProjectExperience.__table__.c[field].type.length
+            if record[field] is None:
+                error = f"{field} is required"
+            elif max_length and len(record[field]) > max_length:
+                error = f"{field} is longer than {max_length} characters"
+            if error:
+                break
+
+        row_id = record.get("id")
+        if not error and row_id is not None and not row_id.isdigit():
+            error = "id must be an integer"
+
+        manager_id = None
+        manager = record.get("consulting_manager")
+        if not error and manager is not None:
+            manager_id = by_name.get(manager.lower())
+            if manager_id is _AMBIGUOUS:
+                error = f"Consulting manager name '{manager}' is ambiguous, use the id"
+            elif manager_id is None and manager.isdigit() and int(manager) in manager_ids:
+                manager_id = int(manager)
+            elif manager_id is None:
+                error = f"Unknown consulting manager '{manager}'"
+
+        if error:
+            errors.append(ProjectExperienceImportError(row=row_number, detail=error))
+            continue
+
+        values = {field: record[field] for field in IMPORT_REQUIRED_FIELDS}
+        values["consulting_manager_id"] = manager_id
+        parsed.append((row_number, int(row_id) if row_id is not None else None, values))
+
+    return consumed, blank, parsed, errors
+
+
+def _insert_import_chunk(session: Session, parsed: list):
+    """Insert parsed rows, skipping those whose ID already exists. Returns (inserted, skipped, errors)."""
+    row_ids = [row_id for _, row_id, _ in parsed if row_id is not None]
+    existing = set()
+    if row_ids:
+        existing = set(session.scalars(select(ProjectExperience.id).where(ProjectExperience.id.in_(row_ids))))
+
+    new_rows = [(row_number, values) for row_number, row_id, values in parsed if row_id not in existing]
+    ids, errors = bulk_insert_experiences(session, new_rows, False, BULK_BATCH_SIZE)
+    return len(ids), len(parsed) - len(new_rows), errors
+
+
+@router.post("/import", response_model=ProjectExperienceImportResponse)
+async def import_experiences(file: UploadFile = File(...), db: DbSession = Depends(get_db)):
+    """
+    Import project experiences from an XLSX or CSV file laid out like the export.
+
+    The file is read row by row and inserted in chunks of IMPORT_CHUNK_SIZE.
+    Blank rows and rows whose ID already exists are skipped (other IDs are
+    ignored, new rows always get a fresh id). Consulting managers may be given
+    by name or id. At most IMPORT_MAX_ERRORS errors are listed, `errored` has
+    the full count.
+    """
+    # Imported here so the spreadsheet code is not loaded at startup
+    from spreadsheet_reader import detect_format, iter_sheet_rows
+
+    file_format = detect_format(file.filename, file.content_type)
+    rows = iter_sheet_rows(file.file, file_format)
+
+    header = await run_in_threadpool(next, rows, None)
+    if header is None:
+        raise HTTPException(400, "File is empty")
+    columns = _import_columns(header[1])
+
+    managers = await db.run(_load_manager_lookup)
+    result = ProjectExperienceImportResponse(inserted=0, skipped=0, errored=0, errors=[])
+
+    def record_errors(errors):
+        result.errored += len(errors)
+        result.errors.extend(errors[:max(IMPORT_MAX_ERRORS - len(result.errors), 0)])
+
+    while True:
+        # Parsing is CPU work, keep it off the event loop
+        consumed, blank, parsed, errors = await run_in_threadpool(
+            _parse_import_chunk, rows, columns, managers, IMPORT_CHUNK_SIZE
+        )
+        result.skipped += blank
+        record_errors(errors)
+
+        if parsed:
+            inserted, skipped, insert_errors = await db.run(_insert_import_chunk, parsed)
+            result.inserted += inserted
+            result.skipped += skipped
+            record_errors([
+                ProjectExperienceImportError(row=error.index, detail=error.detail) for error in insert_errors
+            ])
+
+        if consumed < IMPORT_CHUNK_SIZE:
+            break
+
+    result.errors.sort(key=lambda error: error.row)
+    return result
+
+
+def _experience_filters(
+    project_year: Optional[str],
+    project_year_from: Optional[int],
+    project_year_to: Optional[int],
+    category: Optional[str],
+    consulting_manager_id: Optional[int],
+    customer_name_prefix: Optional[str],
+) -> list:
+    """WHERE conditions of the list filters, each answerable from one of the composite indexes."""
+    conditions = []
+    if project_year is not None:
+        conditions.append(ProjectExperience.project_year == project_year)
+    # Years are stored as 4-digit strings, which compare like the numbers
+    if project_year_from is not None:
+        conditions.append(ProjectExperience.project_year >= f"{project_year_from:04d}")
+    if project_year_to is not None:
+        conditions.append(ProjectExperience.project_year <= f"{project_year_to:04d}")
+    if category is not None:
+        conditions.append(ProjectExperience.category == category)
+    if consulting_manager_id is not None:
+        conditions.append(ProjectExperience.consulting_manager_id == consulting_manager_id)
+    if customer_name_prefix:
+        # A range is an index range scan on every backend (LIKE 'x%' is not, on
+        # SQLite or with a non-C collation on Postgres); the LIKE drops anything
+        # a collation sorts into the range without the prefix
+        conditions.append(ProjectExperience.customer_name >= customer_name_prefix)
+        if ord(customer_name_prefix[-1]) < 0x10FFFF:
+            upper = customer_name_prefix[:-1] + chr(ord(customer_name_prefix[-1]) + 1)
+            conditions.append(ProjectExperience.customer_name < upper)
+        conditions.append(ProjectExperience.customer_name.startswith(customer_name_prefix, autoescape=True))
+    return conditions
+
+
+def _load_managers(session: Session, manager_ids) -> Dict[int, dict]:
+    """ConsultingManagerResponse dicts by id, for every distinct id in `manager_ids`, in one IN query."""
+    ids = {manager_id for manager_id in manager_ids if manager_id is not None}
+    if not ids:
+        return {}
+    fields = schema_fields(ConsultingManagerResponse)
+    rows = session.execute(
+        select(*field_columns(ConsultingManager, fields)).where(ConsultingManager.id.in_(ids))
+    ).all()
+    return {row.id: dict(zip(fields, row)) for row in rows}
+
+
+@router.get("/", response_model=PaginatedResponseSchemas.PaginatedResponse[ProjectExperienceExpandedResponse])
+async def get_experiences(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 10,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    search_in: Optional[str] = None,
+    project_year: Optional[str] = None,
+    project_year_from: Optional[int] = Query(None, ge=0, le=9999),
+    project_year_to: Optional[int] = Query(None, ge=0, le=9999),
+    category: Optional[str] = None,
+    consulting_manager_id: Optional[int] = None,
+    customer_name_prefix: Optional[str] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = TotalMode.exact,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    db: DbSession = Depends(get_db)
 ):
-    query = db.query(ProjectExperience)
+    """
+    List project experiences. Filters combine with AND: `project_year`, the
+    range `project_year_from`..`project_year_to` (inclusive), `category`,
+    `consulting_manager_id` and `customer_name_prefix` (case-sensitive).
+    `sort` is one of id, project_year, customer_name, `-` first for
+    descending; ties are broken by id. `expand=consulting_manager` embeds each
+    row's manager, loaded for the whole page with one query.
+    """
+    search_fields = parse_search_fields(ProjectExperience, search_in)
+    output_fields = response_fields(ProjectExperienceResponse, parse_fields(ProjectExperienceResponse, fields))
+    sort_column, descending = parse_sort(ProjectExperience, sort, EXPERIENCE_SORTS)
+    expanded = parse_expand(expand, EXPERIENCE_EXPANDS)
+    filters = _experience_filters(
+        project_year, project_year_from, project_year_to, category, consulting_manager_id, customer_name_prefix,
+    )
+
+    tables = [ProjectExperience.__tablename__]
+    if expanded:
+        tables.append(ConsultingManager.__tablename__)
+    etag = await table_etag(request, db, *tables)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    def list_experiences(session: Session):
+        # Column rows, rendered straight to JSON without building models (see fast_json);
+        # the sort column is selected too because the next cursor is built from it,
+        # and the manager id when the manager is embedded
+        extra = [sort_column]
+        if expanded:
+            extra.append(ProjectExperience.consulting_manager_id)
+        query = session.query(*field_columns(ProjectExperience, output_fields, *extra))
+
+        if search:
+            query = query.filter(search_filter(ProjectExperience, search, search_fields))
+        if filters:
+            query = query.filter(*filters)
+
+        filter_key = None
+        if search or filters:
+            filter_key = (
+                search and (search, search_fields),
+                project_year, project_year_from, project_year_to, category, consulting_manager_id, customer_name_prefix,
+            )
+        total = count_total(query, ProjectExperience.__tablename__, filter_key, total_mode)
 
-    if search:
-        query = query.filter(ProjectExperience.project_name.ilike(f"%{search}%"))
+        # Cursor mode (?cursor=, empty for the first page) pages by the sort key instead of offset
+        next_cursor = None
+        if cursor is not None:
+            data, next_cursor = keyset_page(
+                query, ProjectExperience.id, cursor, limit,
+                sort_column if sort_column is not ProjectExperience.id else None, descending,
+            )
+        else:
+            order = [sort_column, ProjectExperience.id] if sort_column is not ProjectExperience.id else [sort_column]
+            data = query.order_by(*[column.desc() if descending else column for column in order]) \
+                .offset(skip).limit(limit).all()
 
-    total = query.count()
-    data = query.offset(skip).limit(limit).all()
+        embedded = None
+        if expanded:
+            managers = _load_managers(session, [row.consulting_manager_id for row in data])
+            embedded = {"consulting_manager": [managers.get(row.consulting_manager_id) for row in data]}
+
+        return page_json(output_fields, data, total, next_cursor, embedded)
+
+    # Identical concurrent requests share one run (the ETag covers query and data versions)
+    return json_response(await single_flight.run(etag, lambda: db.run(list_experiences)), response)
+
+
+@router.get("/changes", response_model=ChangeFeedResponse[ProjectExperienceResponse])
+async def get_experience_changes(
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=CHANGES_MAX_LIMIT),
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db)
+):
+    """
+    Project experiences inserted, updated or deleted after the `since` token, every one
+    without it. Keep `next_token` for the next call (see change_feed).
+    """
+    output_fields = response_fields(ProjectExperienceResponse, parse_fields(ProjectExperienceResponse, fields))
+    body = await db.run(lambda session: dumps(changes(session, ProjectExperience, output_fields, since, limit)))
+    return json_response(body, response)
+
+
+@router.get("/stream")
+async def stream_experiences(fields: Optional[str] = None):
+    """
+    Every project experience as newline-delimited JSON, ordered by id: full dumps
+    (ETL) without paging through the list. `fields` as on the list.
+    """
+    output_fields = response_fields(ProjectExperienceResponse, parse_fields(ProjectExperienceResponse, fields))
+    statement = select(*field_columns(ProjectExperience, output_fields)).order_by(ProjectExperience.id)
+    return ndjson_response(statement, output_fields)
+
+
+def _manager_names(session: Session, keys) -> Dict[int, str]:
+    ids = [key for key in keys if key != NO_MANAGER]
+    if not ids:
+        return {}
+    return dict(session.execute(
+        select(ConsultingManager.id, ConsultingManager.name).where(ConsultingManager.id.in_(ids))
+    ).all())
+
+
+def _stats_bucket(dimension: StatsDimension, key, count: int, names: Dict[int, str]) -> dict:
+    if dimension == StatsDimension.consulting_manager:
+        return {"key": key if key != NO_MANAGER else None, "name": names.get(key), "count": count}
+    return {"key": key, "count": count}
+
+
+@router.get("/stats", response_model=ProjectExperienceStatsSummary)
+async def get_experience_stats(
+    request: Request,
+    response: Response,
+    project_year_from: Optional[int] = Query(None, ge=0, le=9999),
+    project_year_to: Optional[int] = Query(None, ge=0, le=9999),
+    category: Optional[str] = None,
+    consulting_manager_id: Optional[int] = None,
+    db: DbSession = Depends(get_db)
+):
+    """Number of project experiences in total and per manager, year and category (from the summary table)."""
+    conditions = stats_filters(None, project_year_from, project_year_to, category, consulting_manager_id)
+
+    # The manager buckets carry manager names
+    etag = await table_etag(request, db, ProjectExperience.__tablename__, ConsultingManager.__tablename__)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    def summary(session: Session):
+        result = {}
+        for dimension in StatsDimension:
+            rows = group_counts(session, [dimension], conditions)
+            names = _manager_names(session, [key for key, _ in rows]) \
+                if dimension == StatsDimension.consulting_manager else {}
+            result[f"by_{dimension.value}"] = [_stats_bucket(dimension, key, count, names) for key, count in rows]
+        result["total"] = sum(bucket["count"] for bucket in result["by_category"])
+        return result
+
+    return await single_flight.run(etag, lambda: db.run(summary))
+
+
+@router.get("/stats/{dimension}", response_model=ProjectExperienceStatsResponse)
+async def get_experience_stats_by(
+    dimension: StatsDimension,
+    request: Request,
+    response: Response,
+    breakdown: Optional[StatsDimension] = None,
+    project_year: Optional[str] = None,
+    project_year_from: Optional[int] = Query(None, ge=0, le=9999),
+    project_year_to: Optional[int] = Query(None, ge=0, le=9999),
+    category: Optional[str] = None,
+    consulting_manager_id: Optional[int] = None,
+    db: DbSession = Depends(get_db)
+):
+    """
+    Project experience counts grouped by `dimension`, largest groups first,
+    each split by `breakdown` when given (e.g. /stats/consulting_manager?breakdown=project_year).
+    The filters have the same meaning as on the list.
+    """
+    if breakdown == dimension:
+        raise HTTPException(400, "breakdown must differ from the grouped dimension")
+    conditions = stats_filters(project_year, project_year_from, project_year_to, category, consulting_manager_id)
+
+    # Manager names appear whenever a manager is grouped by or broken down by
+    tables = [ProjectExperience.__tablename__]
+    if StatsDimension.consulting_manager in (dimension, breakdown):
+        tables.append(ConsultingManager.__tablename__)
+    etag = await table_etag(request, db, *tables)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    def grouped(session: Session):
+        rows = group_counts(session, [dimension], conditions)
+        sub_rows = group_counts(session, [dimension, breakdown], conditions) if breakdown else []
+
+        names = {}
+        if StatsDimension.consulting_manager in (dimension, breakdown):
+            position = 0 if dimension == StatsDimension.consulting_manager else 1
+            names = _manager_names(session, {row[position] for row in sub_rows or rows})
+
+        breakdowns: Dict[object, list] = {}
+        for key, sub_key, count in sub_rows:
+            breakdowns.setdefault(key, []).append(_stats_bucket(breakdown, sub_key, count, names))
+
+        groups = []
+        for key, count in rows:
+            group = _stats_bucket(dimension, key, count, names)
+            if breakdown:
+                group["breakdown"] = breakdowns.get(key, [])
+            groups.append(group)
+
+        return {
+            "dimension": dimension.value,
+            "breakdown": breakdown.value if breakdown else None,
+            "total": sum(count for _, count in rows),
+            "groups": groups,
+        }
+
+    return await single_flight.run(etag, lambda: db.run(grouped))
+
+
+# Exported columns, in file order: (header, column, NDJSON key)
+EXPORT_COLUMNS = [
+    ("ID", ProjectExperience.id, "id"),
+    ("No Sales Order", ProjectExperience.no_sales_order, "no_sales_order"),
+    ("Customer Name", ProjectExperience.customer_name, "customer_name"),
+    ("Project Name", ProjectExperience.project_name, "project_name"),
+    ("Project Year", ProjectExperience.project_year, "project_year"),
+    ("Category", ProjectExperience.category, "category"),
+    ("Consulting Manager", ConsultingManager.name, "consulting_manager"),
+]
+
+
+def _export_source(search: Optional[str], search_in: Optional[str]) -> ExportSource:
+    """The export of the experiences matching `search` (all of them without one)."""
+    search_fields = parse_search_fields(ProjectExperience, search_in)
+    columns = [column for _, column, _ in EXPORT_COLUMNS]
+
+    def apply_filters(query):
+        query = query.outerjoin(
+            ConsultingManager,
+            ProjectExperience.consulting_manager_id == ConsultingManager.id
+        )
+        if search:
+            query = query.filter(search_filter(ProjectExperience, search, search_fields))
+        return query
+
+    def summarize(session: Session):
+        # Column widths must be written before the rows, so get them from the DB
+        # in one aggregate query instead of a second pass over the data
+        total, max_id, *max_lengths = apply_filters(
+            session.query(
+                func.count(),
+                func.max(ProjectExperience.id),
+                *[func.max(func.length(column)) for column in columns[1:]]
+            )
+        ).one()
+        return total, [len(str(max_id or ""))] + [length or 0 for length in max_lengths]
+
+    return ExportSource(
+        "Project Experiences",
+        [header for header, _, _ in EXPORT_COLUMNS],
+        [key for _, _, key in EXPORT_COLUMNS],
+        apply_filters(select(*columns)).order_by(ProjectExperience.id),
+        summarize,
+    )
 
-    return PaginatedResponseSchemas.PaginatedResponse(data=data, total=total)
 
 @router.get("/export/xlsx")
-def export_to_xlsx(
+async def export_to_xlsx(
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    search_in: Optional[str] = None,
+    db: DbSession = Depends(get_db)
 ):
-    """Export all project experiences to XLSX file"""
-    
-    # Query all data
-    query = (
-        db.query(ProjectExperience)
-        .options(joinedload(ProjectExperience.consulting_manager))
-    )
-    
-    if search:
-        query = query.filter(ProjectExperience.project_name.ilike(f"%{search}%"))
-    
-    results = query.all()
-    
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Project Experiences"
-    
-    # Define headers
-    headers = [
-        "ID",
-        "No Sales Order",
-        "Customer Name",
-        "Project Name",
-        "Project Year",
-        "Category",
-        "Consulting Manager"
-    ]
-    
-    # Style for headers
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    
-    # Write headers
-    for col, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-    
-    # Write data
-    for row_idx, record in enumerate(results, start=2):
-        ws.cell(row=row_idx, column=1, value=record.id)
-        ws.cell(row=row_idx, column=2, value=record.no_sales_order)
-        ws.cell(row=row_idx, column=3, value=record.customer_name)
-        ws.cell(row=row_idx, column=4, value=record.project_name)
-        ws.cell(row=row_idx, column=5, value=record.project_year)
-        ws.cell(row=row_idx, column=6, value=record.category)
-        ws.cell(row=row_idx, column=7, value=record.consulting_manager.name if record.consulting_manager else "")
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
+    """
+    Export all project experiences to XLSX file.
+
+    Rows are read from the DB in chunks of EXPORT_CHUNK_SIZE and written straight
+    into the response stream, so memory stays flat regardless of the row count.
+    Large exports are better run as a job (POST /exports).
+    """
+    source = _export_source(search, search_in)
+    _, lengths = await db.run(source.summarize)
+    widths = column_widths(source.headers, lengths)
+
+    async def content():
+        writer = open_writer(ExportFormat.xlsx, source.headers, source.keys, widths, title=source.title)
+        yield writer.start()
+        async for rows in stream_rows(source.statement, EXPORT_CHUNK_SIZE):
+            # Encoding is CPU work, keep it off the event loop
+            data = await run_in_threadpool(writer.write_rows, rows)
+            if data:
+                yield data
+        yield writer.finish()
+
     # Generate filename with timestamp
     filename = f"project_experiences_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    
+
     # Return as streaming response
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        content(),
+        media_type=MEDIA_TYPES[ExportFormat.xlsx],
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
-@router.put("/{project_id}", response_model=ProjectExperienceResponse)
-def update_project_experience(
+
+def _export_job_response(job: ExportJob, request: Request) -> dict:
+    return {
+        "id": job.id,
+        "format": job.format,
+        "status": job.status.value,
+        "rows_written": job.rows_written,
+        "total_rows": job.total_rows,
+        "size": job.size,
+        "error": job.error,
+        "created_at": datetime.fromtimestamp(job.created_at),
+        "finished_at": datetime.fromtimestamp(job.finished_at) if job.finished_at is not None else None,
+        "expires_at": datetime.fromtimestamp(job.expires_at(export_jobs.ttl)) if job.finished_at is not None else None,
+        "download_url": str(request.url_for("download_export", job_id=job.id))
+        if job.status is ExportStatus.done else None,
+    }
+
+
+@router.post("/exports", response_model=ProjectExperienceExportResponse, status_code=202)
+async def create_export(data: ProjectExperienceExportCreate, request: Request, response: Response):
+    """
+    Queue an export of the experiences matching `search` as xlsx, csv or ndjson.
+
+    Poll GET /exports/{id} until `status` is done, then fetch `download_url`.
+    The same export requested while one is queued or running returns that job.
+    """
+    source = _export_source(data.search, data.search_in)
+    key = (data.format, data.search, data.search_in)
+    try:
+        job = export_jobs.submit(key, data.format, source)
+    except ExportQueueFull:
+        raise HTTPException(503, "Too many exports in progress, try again later")
+
+    response.headers["Location"] = str(request.url_for("get_export", job_id=job.id))
+    return _export_job_response(job, request)
+
+
+@router.get("/exports/{job_id}", response_model=ProjectExperienceExportResponse)
+async def get_export(job_id: str, request: Request):
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(404, "Export not found")
+    return _export_job_response(job, request)
+
+
+@router.get("/exports/{job_id}/download")
+async def download_export(job_id: str):
+    """The finished file; supports Range requests, so an interrupted download can resume."""
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(404, "Export not found")
+    if job.status is not ExportStatus.done:
+        raise HTTPException(409, f"Export is {job.status.value}")
+    return FileResponse(job.path, media_type=MEDIA_TYPES[job.format], filename=job.filename)
+
+
+@router.get("/{project_id}", response_model=ProjectExperienceExpandedResponse)
+async def get_experience(
     project_id: int,
-    data: ProjectExperienceUpdate,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    db: DbSession = Depends(get_db),
 ):
-    project = db.query(ProjectExperience).filter_by(id=project_id).first()
+    """One project experience; `expand=consulting_manager` embeds its manager."""
+    selected = parse_fields(ProjectExperienceResponse, fields)
+    expanded = parse_expand(expand, EXPERIENCE_EXPANDS)
+
+    # The embedded manager can change without the experience row changing
+    if expanded:
+        etag = await table_etag(request, db, ProjectExperience.__tablename__, ConsultingManager.__tablename__)
+    else:
+        etag = await row_etag(request, db, ProjectExperience, project_id)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    project = await entity_cache.get_or_load(db, ProjectExperience, project_id)
     if not project:
         raise HTTPException(404, "Project experience not found")
+    if not expanded:
+        return json_response(trim_json(project, selected) if selected else project, response)
+
+    data = json.loads(project)
+    manager_id = data["consulting_manager_id"]
+    if selected:
+        data = {field: data[field] for field in selected}
+    manager = await entity_cache.get_or_load(db, ConsultingManager, manager_id) if manager_id is not None else None
+    data["consulting_manager"] = json.loads(manager) if manager else None
+    return json_response(dumps(data), response)
+
 
-    if data.consulting_manager_id:
-        manager = db.query(ConsultingManager).filter_by(id=data.consulting_manager_id).first()
-        if not manager:
-            raise HTTPException(404, "Consulting manager does not exist")
+@router.put("/{project_id}", response_model=ProjectExperienceResponse)
+async def update_project_experience(
+    project_id: int,
+    data: ProjectExperienceUpdate,
+    db: DbSession = Depends(get_db)
+):
+    def update(session: Session):
+        project = session.query(ProjectExperience).filter_by(id=project_id).first()
+        if not project:
+            raise HTTPException(404, "Project experience not found")
 
-        project.consulting_manager_id = data.consulting_manager_id
+        if data.consulting_manager_id:
+            project.consulting_manager_id = data.consulting_manager_id
+            # Checked after the write, in its transaction: the write lock (SQLite)
+            # or the foreign key (Postgres) keeps the manager from being deleted
+            # before the commit. SQLite does not enforce the key itself.
+            session.flush()
+            manager = session.query(ConsultingManager.id).filter_by(id=data.consulting_manager_id).first()
+            if not manager:
+                session.rollback()
+                raise HTTPException(404, "Consulting manager does not exist")
 
-    db.commit()
-    db.refresh(project)
-    return project
+        session.commit()
+        session.refresh(project)
+        return project
+
+    return await db.run(update)
 
 
 # Delete project
 @router.delete("/{project_id}")
-def delete_experience(project_id: int, db: Session = Depends(get_db)):
-    proj = db.query(ProjectExperience).filter_by(id=project_id).first()
-    if not proj:
-        raise HTTPException(404, "Project experience not found")
+async def delete_experience(project_id: int, db: DbSession = Depends(get_db)):
+
+    def delete(session: Session):
+        proj = session.query(ProjectExperience).filter_by(id=project_id).first()
+        if not proj:
+            raise HTTPException(404, "Project experience not found")
+
+        session.delete(proj)
+        session.commit()
 
-    db.delete(proj)
-    db.commit()
+    await db.run(delete)
     return {"message": "Deleted successfully"}
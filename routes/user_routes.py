@@ -1,55 +1,83 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from schemas.PaginatedResponseSchemas import PaginatedResponse
+from schemas.ChangeFeedSchemas import ChangeFeedResponse
 from schemas.UserSchemas import (
     UserCreate, RequestDetails, TokenSchema, UserOut, UserUpdate
 )
 from models.User import User
-from database import get_db
+from database import DbSession, get_db
+from search import search_filter
+from pagination import TotalMode, count_total, keyset_page
+from etag import check_etag, row_etag, table_etag
+from entity_cache import entity_cache
+from routes.helper import json_response, ndjson_response
+from request_coalescing import single_flight
+from fast_json import dumps, page_json
+from change_feed import CHANGES_MAX_LIMIT, changes
+from fieldsets import field_columns, parse_fields, response_fields, trim_json
 from utils import (
-    get_hashed_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     create_refresh_token
 )
 
 router = APIRouter()
 
+entity_cache.register(User, UserOut)
+
 
 # CREATE USER
 @router.post("/", response_model=UserOut)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-
-    if db.query(User).filter(User.username == payload.username).first():
-        raise HTTPException(400, "Username already exists")
-
-    if db.query(User).filter(User.email == payload.email).first():
-        raise HTTPException(400, "Email already exists")
+async def create_user(payload: UserCreate, db: DbSession = Depends(get_db)):
+
+    def insert(session: Session, hashed_password: str):
+        # Checked and inserted in one transaction; the unique constraints catch
+        # a concurrent insert of the same username or email
+        if session.query(User.id).filter(User.username == payload.username).first():
+            raise HTTPException(400, "Username already exists")
+
+        if session.query(User.id).filter(User.email == payload.email).first():
+            raise HTTPException(400, "Email already exists")
+
+        new_user = User(
+            username=payload.username,
+            name = payload.name,
+            password=hashed_password,
+            email=payload.email,
+            department_name=payload.department_name
+        )
 
-    new_user = User(
-        username=payload.username,
-        name = payload.name,
-        password=get_hashed_password(payload.password),
-        email=payload.email,
-        department_name=payload.department_name
-    )
+        session.add(new_user)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            if session.query(User.id).filter(User.username == payload.username).first():
+                raise HTTPException(400, "Username already exists")
+            raise HTTPException(400, "Email already exists")
+        session.refresh(new_user)
+        return new_user
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    hashed_password = await hash_password_async(payload.password)
+    return await db.run(insert, hashed_password)
 
 
 # LOGIN
 @router.post("/login", response_model=TokenSchema)
-def login(request: RequestDetails, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == request.username).first()
+async def login(request: RequestDetails, db: DbSession = Depends(get_db)):
+    user = await db.run(
+        lambda session: session.query(User).filter(User.username == request.username).first()
+    )
 
     if not user:
         raise HTTPException(400, "Invalid username or password")
 
-    if not verify_password(request.password, user.password):
+    if not await verify_password_async(request.password, user.password):
         raise HTTPException(400, "Invalid username or password")
 
     access = create_access_token(user.id, "", user.username)
@@ -65,8 +93,7 @@ def login(request: RequestDetails, db: Session = Depends(get_db)):
 
 
 from pydantic import BaseModel
-import os
-import jwt
+from auth import decode_refresh_token
 
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
@@ -79,16 +106,12 @@ class RefreshTokenResponse(BaseModel):
 
 
 @router.post("/refresh", response_model=RefreshTokenResponse)
-def refresh_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(payload: RefreshTokenRequest, db: DbSession = Depends(get_db)):
 
     try:
-        secret = os.getenv("JWT_REFRESH_SECRET_KEY") or os.getenv("JWT_SECRET_KEY")
-        algo = os.getenv("ALGORITHM", "HS256")
+        user_id = decode_refresh_token(payload.refresh_token).sub
 
-        data = jwt.decode(payload.refresh_token, secret, algorithms=[algo])
-        user_id = data.get("sub")
-
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.run(lambda session: session.query(User).filter(User.id == user_id).first())
         if not user:
             raise HTTPException(401, "User not found")
 
@@ -105,78 +128,159 @@ def refresh_token(payload: RefreshTokenRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=PaginatedResponse[UserOut])
-def get_users(
+async def get_users(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = TotalMode.exact,
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db)
 ):
-    query = db.query(User)
+    output_fields = response_fields(UserOut, parse_fields(UserOut, fields))
+
+    etag = await table_etag(request, db, User.__tablename__)
+    not_modified = check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
 
-    if search:
-        query = query.filter(User.username.ilike(f"%{search}%"))
+    def list_users(session: Session):
+        # Column rows, rendered straight to JSON without building models (see fast_json)
+        query = session.query(*field_columns(User, output_fields))
 
-    total = query.count()
-    data = query.offset(skip).limit(limit).all()
+        if search:
+            query = query.filter(search_filter(User, search))
 
-    return PaginatedResponse(data=data, total=total)
+        total = count_total(query, User.__tablename__, search or None, total_mode)
+
+        # Cursor mode (?cursor=, empty for the first page) pages by id instead of offset
+        next_cursor = None
+        if cursor is not None:
+            data, next_cursor = keyset_page(query, User.id, cursor, limit)
+        else:
+            data = query.order_by(User.id).offset(skip).limit(limit).all()
+
+        return page_json(output_fields, data, total, next_cursor)
+
+    # Identical concurrent requests share one run (the ETag covers query and data version)
+    return json_response(await single_flight.run(etag, lambda: db.run(list_users)), response)
+
+
+@router.get("/changes", response_model=ChangeFeedResponse[UserOut])
+async def get_user_changes(
+    response: Response,
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=CHANGES_MAX_LIMIT),
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db)
+):
+    """
+    Users inserted, updated or deleted after the `since` token, every one
+    without it. Keep `next_token` for the next call (see change_feed).
+    """
+    output_fields = response_fields(UserOut, parse_fields(UserOut, fields))
+    body = await db.run(lambda session: dumps(changes(session, User, output_fields, since, limit)))
+    return json_response(body, response)
+
+
+@router.get("/stream")
+async def stream_users(fields: Optional[str] = None):
+    """
+    Every user as newline-delimited JSON, ordered by id: full dumps
+    (ETL) without paging through the list. `fields` as on the list.
+    """
+    output_fields = response_fields(UserOut, parse_fields(UserOut, fields))
+    statement = select(*field_columns(User, output_fields)).order_by(User.id)
+    return ndjson_response(statement, output_fields)
 
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).get(user_id)
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    db: DbSession = Depends(get_db),
+):
+    selected = parse_fields(UserOut, fields)
+
+    not_modified = check_etag(request, response, await row_etag(request, db, User, user_id))
+    if not_modified:
+        return not_modified
+
+    user = await entity_cache.get_or_load(db, User, user_id)
     if not user:
         raise HTTPException(404, "User not found")
-    return user
+    return json_response(trim_json(user, selected) if selected else user, response)
 
 
 
 @router.patch("/{user_id}", response_model=UserOut)
-def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)):
-    user = db.query(User).get(user_id)
-    if not user:
-        raise HTTPException(404, "User not found")
+async def update_user(user_id: int, payload: UserUpdate, db: DbSession = Depends(get_db)):
 
-    if payload.username:
-        existing_username = (
-            db.query(User)
-            .filter(User.username == payload.username, User.id != user_id)
-            .first()
-        )
-        if existing_username:
-            raise HTTPException(400, "Username already taken")
+    def update(session: Session, hashed_password: Optional[str]):
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(404, "User not found")
 
-        user.username = payload.username
+        if payload.username:
+            existing_username = (
+                session.query(User)
+                .filter(User.username == payload.username, User.id != user_id)
+                .first()
+            )
+            if existing_username:
+                raise HTTPException(400, "Username already taken")
 
-    if payload.email:
-        existing_email = (
-            db.query(User)
-            .filter(User.email == payload.email, User.id != user_id)
-            .first()
-        )
-        if existing_email:
-            raise HTTPException(400, "Email already taken")
+            user.username = payload.username
+
+        if payload.email:
+            existing_email = (
+                session.query(User)
+                .filter(User.email == payload.email, User.id != user_id)
+                .first()
+            )
+            if existing_email:
+                raise HTTPException(400, "Email already taken")
+
+            user.email = payload.email
 
-        user.email = payload.email
+        if payload.department_name is not None:
+            user.department_name = payload.department_name
 
-    if payload.department_name is not None:
-        user.department_name = payload.department_name
 
+        if hashed_password:
+            user.password = hashed_password
 
+        session.commit()
+        session.refresh(user)
+        return user
+
+    def exists(session: Session) -> bool:
+        return session.get(User, user_id) is not None
+
+    hashed_password = None
     if payload.password:
-        user.password = get_hashed_password(payload.password)
+        # Looked up first, so a 404 does not take a slot of the password pool
+        if not await db.run(exists):
+            raise HTTPException(404, "User not found")
+        hashed_password = await hash_password_async(payload.password)
 
-    db.commit()
-    db.refresh(user)
-    return user
+    return await db.run(update, hashed_password)
 
 
 
 @router.delete("/{user_id}", status_code=204)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).get(user_id)
-    if not user:
-        raise HTTPException(404, "User not found")
+async def delete_user(user_id: int, db: DbSession = Depends(get_db)):
+
+    def delete(session: Session):
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(404, "User not found")
+
+        session.delete(user)
+        session.commit()
 
-    db.delete(user)
-    db.commit()
+    await db.run(delete)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional, Generic, TypeVar
+
+
+T = TypeVar('T')
+
+class Change(BaseModel, Generic[T]):
+    """
+    `op` is "upsert" (the row was inserted or updated; `data` is its current
+    state) or "delete" (no `data`).
+    """
+    op: str
+    id: int
+    at: datetime
+    data: Optional[T] = None
+
+
+class ChangeFeedResponse(BaseModel, Generic[T]):
+    """
+    Changes after the `since` token, oldest first. Store `next_token` for the
+    next call; when `has_more` is set, call again right away.
+    """
+    changes: List[Change[T]]
+    next_token: str
+    has_more: bool
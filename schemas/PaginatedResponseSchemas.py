@@ -8,8 +8,10 @@ class PaginatedResponse(BaseModel, Generic[T]):
     """
     A generic Pydantic model for paginated responses.
     `data` will be a list of items of type T.
-    `total` will be the total count of items.
+    `total` will be the total count of items (None when `total_mode=none`).
+    `next_cursor` is set in cursor mode when there is a next page.
     """
     data: List[T]
-    total: int
+    total: Optional[int]
+    next_cursor: Optional[str] = None
 
@@ -1,5 +1,9 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Union
+
+from export_formats import ExportFormat
+from schemas.ConsManagerSchema import ConsultingManagerResponse
 
 class ProjectExperienceBase(BaseModel):
     no_sales_order: str
@@ -23,3 +27,81 @@ class ProjectExperienceResponse(ProjectExperienceBase):
     consulting_manager_id: Optional[int]
     class Config:
         orm_mode = True
+
+
+class ProjectExperienceExpandedResponse(ProjectExperienceResponse):
+    # Only with expand=consulting_manager; null when there is no manager
+    consulting_manager: Optional[ConsultingManagerResponse] = None
+
+
+class ProjectExperienceBulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class ProjectExperienceBulkResponse(BaseModel):
+    inserted: int
+    ids: List[int]
+    errors: List[ProjectExperienceBulkError]
+
+
+class ProjectExperienceImportError(BaseModel):
+    row: int
+    detail: str
+
+
+class ProjectExperienceImportResponse(BaseModel):
+    inserted: int
+    skipped: int
+    errored: int
+    errors: List[ProjectExperienceImportError]
+
+
+class ProjectExperienceStatsBucket(BaseModel):
+    # Manager id (None: no manager), project year or category
+    key: Optional[Union[int, str]]
+    # Manager name, for the consulting_manager dimension
+    name: Optional[str] = None
+    count: int
+
+
+class ProjectExperienceStatsGroup(ProjectExperienceStatsBucket):
+    breakdown: Optional[List[ProjectExperienceStatsBucket]] = None
+
+
+class ProjectExperienceStatsResponse(BaseModel):
+    dimension: str
+    breakdown: Optional[str] = None
+    total: int
+    groups: List[ProjectExperienceStatsGroup]
+
+
+class ProjectExperienceStatsSummary(BaseModel):
+    total: int
+    by_consulting_manager: List[ProjectExperienceStatsBucket]
+    by_project_year: List[ProjectExperienceStatsBucket]
+    by_category: List[ProjectExperienceStatsBucket]
+
+
+class ProjectExperienceExportCreate(BaseModel):
+    format: ExportFormat = ExportFormat.xlsx
+    search: Optional[str] = None
+    search_in: Optional[str] = None
+
+
+class ProjectExperienceExportResponse(BaseModel):
+    id: str
+    format: ExportFormat
+    # queued, running, done or failed
+    status: str
+    rows_written: int
+    # Known once the job has started
+    total_rows: Optional[int] = None
+    # File size in bytes, once done
+    size: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    # The file is deleted after this
+    expires_at: Optional[datetime] = None
+    download_url: Optional[str] = None
@@ -0,0 +1,97 @@
+"""
+Indexed substring search for the `search` parameter of the list endpoints.
+
+`column ILIKE '%term%'` cannot use a btree index, so every search scans the
+whole table. This module keeps a trigram index next to each searchable table:
+
+- SQLite: an external-content FTS5 table with the `trigram` tokenizer, kept in
+  sync by triggers. FTS5 answers LIKE '%term%' from the trigram index.
+- Postgres: a pg_trgm GIN index per column, which the planner uses for ILIKE
+  directly.
+
+Both are created by migration 0002 (migrations/m0002_search_indexes.py); this
+module only finds out which exist and builds the conditions.
+
+`search_filter` returns a condition with the same result set as the plain ILIKE
+it replaces: on SQLite the FTS5 lookup only narrows down candidate ids and the
+ILIKE is re-checked on those rows.
+"""
+import re
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import column, or_, select, table, union
+from sqlalchemy.engine import Engine
+
+
+# Columns covered by the trigram index, per table
+SEARCH_COLUMNS = {
+    "users": ("username",),
+    "consulting_managers": ("name",),
+    "project_experience": ("project_name", "customer_name", "no_sales_order"),
+}
+
+# Tables whose FTS5 shadow table is installed (SQLite only)
+_fts_tables = set()
+
+# The trigram index only helps when the pattern has 3 literal characters in a row
+_TRIGRAM_RE = re.compile(r"[^%_]{3}")
+
+
+def _fts_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def load_search_indexes(engine: Engine):
+    """
+    Find the FTS5 shadow tables that exist (one query, SQLite only). The indexes
+    themselves are created by a migration; Postgres needs no lookup because the
+    planner picks the trigram indexes up on its own.
+    """
+    _fts_tables.clear()
+    if engine.dialect.name != "sqlite":
+        return
+
+    names = {_fts_name(table_name): table_name for table_name in SEARCH_COLUMNS}
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(column("name")).select_from(table("sqlite_master"))
+            .where(column("type") == "table", column("name").in_(list(names)))
+        )
+        _fts_tables.update(names[name] for name, in rows)
+
+
+def search_filter(model, search: str, fields: Optional[Iterable[str]] = None):
+    """
+    WHERE condition for `search` as a substring of any of `fields`
+    (case-insensitive, `%` and `_` act as wildcards exactly like the old ILIKE).
+    `fields` defaults to the first searchable column of the model's table.
+    """
+    table_name = model.__tablename__
+    fields = list(fields or SEARCH_COLUMNS[table_name][:1])
+    pattern = f"%{search}%"
+
+    ilike = or_(*[getattr(model, field).ilike(pattern) for field in fields])
+
+    if table_name not in _fts_tables or not _TRIGRAM_RE.search(search):
+        return ilike
+
+    # One FTS5 lookup per column, each of which can use the trigram index
+    fts = table(_fts_name(table_name), column("rowid"), *[column(field) for field in fields])
+    lookups = [select(fts.c.rowid).where(fts.c[field].like(pattern)) for field in fields]
+    candidates = union(*lookups) if len(lookups) > 1 else lookups[0]
+
+    return model.id.in_(candidates) & ilike
+
+
+def parse_search_fields(model, search_in: Optional[str]) -> Optional[tuple]:
+    """`search_in=project_name,customer_name` -> validated tuple of column names."""
+    if not search_in:
+        return None
+
+    allowed = SEARCH_COLUMNS[model.__tablename__]
+    fields = tuple(dict.fromkeys(field.strip() for field in search_in.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown or not fields:
+        raise HTTPException(400, f"search_in must be a subset of: {', '.join(allowed)}")
+    return fields
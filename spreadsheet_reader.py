@@ -0,0 +1,254 @@
+"""
+Row-at-a-time readers for uploaded XLSX and CSV files.
+
+The XLSX reader is the counterpart of `xlsx_stream`: the first worksheet is
+parsed with `iterparse` straight out of the zip member and every row element is
+detached once it has been read. openpyxl's read-only mode clears rows but leaves
+them attached to the sheet, so its memory still grows with the row count.
+The shared-strings table (one entry per distinct string) is held in memory up
+to XLSX_SHARED_STRINGS_MEMORY characters and spills to a temporary SQLite
+database beyond that, so a sheet of mostly unique text stays bounded as well.
+CSV files are decoded as a text stream. The upload itself is spooled to disk by
+Starlette.
+"""
+import csv
+import io
+import os
+import re
+import sqlite3
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import ParseError, fromstring, iterparse
+
+from fastapi import HTTPException
+
+
+SPREADSHEET_FORMATS = ("xlsx", "csv")
+
+# Characters of shared strings kept in a list before they move to a temporary SQLite database
+XLSX_SHARED_STRINGS_MEMORY = int(os.getenv("XLSX_SHARED_STRINGS_MEMORY", 8 * 1024 * 1024))
+
+_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_CELL_REF_RE = re.compile(r"([A-Z]+)")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """'xlsx' or 'csv' from the file extension, falling back to the content type."""
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in SPREADSHEET_FORMATS:
+        return extension
+
+    detected = _CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower())
+    if not detected:
+        raise HTTPException(400, "Unsupported file type, expected .xlsx or .csv")
+    return detected
+
+
+def _column_index(ref: str) -> int:
+    index = 0
+    for char in _CELL_REF_RE.match(ref).group(1):
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def _text(element) -> str:
+    # Plain <t>, or rich text runs <r><t>; phonetic hints (<rPh>) are not content
+    parts = []
+    for child in element:
+        if child.tag == f"{_NS}t":
+            parts.append(child.text or "")
+        elif child.tag == f"{_NS}r":
+            parts.append(child.findtext(f"{_NS}t") or "")
+    return "".join(parts)
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    workbook = fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{_NS}sheets/{_NS}sheet")
+    rel_id = sheet.get(f"{_REL_NS}id") if sheet is not None else None
+
+    rels = fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{_PACKAGE_REL_NS}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    return "xl/worksheets/sheet1.xml"
+
+
+class SharedStrings:
+    """
+    The shared-strings table, indexed like a list. Past `memory_limit`
+    characters the strings move to a private on-disk SQLite database (deleted
+    when closed), which only keeps its page cache in memory.
+    """
+
+    _BATCH = 10000
+
+    def __init__(self, memory_limit: int):
+        self.memory_limit = memory_limit
+        self._strings: List[str] = []
+        self._size = 0
+        self._count = 0
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def spilled(self) -> bool:
+        return self._db is not None
+
+    def append(self, text: str):
+        self._strings.append(text)
+        self._count += 1
+        self._size += len(text)
+        if self._db is not None:
+            if len(self._strings) >= self._BATCH:
+                self._flush()
+        elif self._size > self.memory_limit:
+            # "" is a temporary database on disk; rows are read from other threads one at a time
+            self._db = sqlite3.connect("", check_same_thread=False)
+            self._db.execute("CREATE TABLE strings (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+            self._flush()
+
+    def _flush(self):
+        start = self._count - len(self._strings)
+        self._db.executemany(
+            "INSERT INTO strings (id, value) VALUES (?, ?)", enumerate(self._strings, start=start)
+        )
+        self._strings = []
+
+    def finish(self):
+        """Call once every string has been appended."""
+        if self._db is not None and self._strings:
+            self._flush()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> str:
+        if self._db is None:
+            return self._strings[index]
+        row = self._db.execute("SELECT value FROM strings WHERE id = ?", (index,)).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return row[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> SharedStrings:
+    strings = SharedStrings(XLSX_SHARED_STRINGS_MEMORY)
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return strings
+
+    events = iterparse(archive.open("xl/sharedStrings.xml"), events=("start", "end"))
+    root = None
+    try:
+        for event, element in events:
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag == f"{_NS}si":
+                strings.append(_text(element))
+                root.remove(element)
+        strings.finish()
+    except BaseException:
+        strings.close()
+        raise
+    return strings
+
+
+def _cell_value(cell, shared: SharedStrings) -> Any:
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        inline = cell.find(f"{_NS}is")
+        return _text(inline) if inline is not None else None
+
+    value = cell.findtext(f"{_NS}v")
+    if value is None:
+        return None
+    if cell_type == "s":
+        return shared[int(value)]
+    if cell_type == "b":
+        return value == "1"
+    if cell_type == "n":
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def _iter_xlsx(file: BinaryIO) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise HTTPException(400, "Invalid XLSX file")
+    shared = None
+    try:
+        shared = _shared_strings(archive)
+        sheet = archive.open(_first_sheet_path(archive))
+    except (zipfile.BadZipFile, KeyError, ParseError, IndexError, ValueError):
+        if shared is not None:
+            shared.close()
+        archive.close()
+        raise HTTPException(400, "Invalid XLSX file")
+
+    sheet_data = None
+    row_number = 0
+    try:
+        for event, element in iterparse(sheet, events=("start", "end")):
+            if event == "start":
+                if element.tag == f"{_NS}sheetData":
+                    sheet_data = element
+                continue
+            if element.tag != f"{_NS}row":
+                continue
+
+            # Empty rows are not stored, so take the number from the row itself
+            row_number = int(element.get("r") or row_number + 1)
+            values: Dict[int, Any] = {}
+            for position, cell in enumerate(element.iter(f"{_NS}c")):
+                ref = cell.get("r")
+                values[_column_index(ref) if ref else position] = _cell_value(cell, shared)
+
+            # Detach the row so the tree does not grow with the sheet
+            sheet_data.remove(element)
+
+            width = max(values) + 1 if values else 0
+            yield row_number, tuple(values.get(index) for index in range(width))
+    except (ParseError, IndexError, ValueError):
+        raise HTTPException(400, "Invalid XLSX file")
+    finally:
+        sheet.close()
+        shared.close()
+        archive.close()
+
+
+def _iter_csv(file: BinaryIO) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    # utf-8-sig drops the BOM Excel puts in front of "CSV UTF-8" files
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        for row_number, row in enumerate(csv.reader(text), start=1):
+            yield row_number, tuple(row)
+    except UnicodeDecodeError:
+        raise HTTPException(400, "CSV file must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+
+def iter_sheet_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+    """
+    Yield (row_number, values) for every row of the first sheet, header included.
+    Row numbers are 1-based, as shown by spreadsheet applications.
+    """
+    return _iter_xlsx(file) if file_format == "xlsx" else _iter_csv(file)
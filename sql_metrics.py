@@ -0,0 +1,204 @@
+"""
+Per-request SQL statistics.
+
+`before/after_cursor_execute` listeners on the engines time every statement
+and add it to the stats of the request being served (a context variable set
+by `QueryStatsMiddleware`; it follows the work into the threadpool and into
+`run_sync`). When the request is done:
+
+- the response gets a `Server-Timing: db;dur=<ms>;desc="<n> queries"` header,
+- query count and DB time are aggregated per route (exported on /metrics),
+- a statement shape run more than SQL_REPEAT_WARN_THRESHOLD times in one
+  request is logged as a warning (N+1 pattern).
+
+`query_budget` is the assertion helper for tests and CI checks.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from metrics import Histogram, route_template
+
+
+logger = logging.getLogger("db.queries")
+
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Same statement shape this many times in one request is reported, 0 disables it
+SQL_REPEAT_WARN_THRESHOLD = int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", 10))
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# "IN (?, ?, ?)" and "VALUES (?, ?), (?, ?)" have the same shape whatever the list length
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PLACEHOLDER_LIST_RE = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_REPEATED_LIST_RE = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PLACEHOLDER_LIST_RE.sub("(?)", " ".join(statement.split()))
+    return _REPEATED_LIST_RE.sub("(?)", shape)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    @property
+    def shapes(self) -> Counter:
+        # Normalized lazily, only when someone looks
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return shapes
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+
+# Stats collected by active `query_budget` blocks, independent of requests
+_budgets: List[QueryStats] = []
+_budgets_lock = threading.Lock()
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+
+def _handle_error(exception_context):
+    # A failed statement gets no after_cursor_execute: take its start off the
+    # stack here, or every later timing on this pooled connection is off
+    conn = exception_context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts:
+        elapsed = time.perf_counter() - starts.pop()
+        if exception_context.statement is not None:
+            _record(exception_context.statement, elapsed)
+
+
+def _record(statement: str, elapsed: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if _budgets:
+        with _budgets_lock:
+            for budget in _budgets:
+                budget.record(statement, elapsed)
+
+
+def instrument_engine(engine):
+    """Time every statement run on `engine` (a sync Engine, or AsyncEngine.sync_engine)."""
+    if not SQL_STATS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class RouteQueryStats:
+    """Per (method, route template): histograms of queries and DB seconds per request."""
+
+    def __init__(self):
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.seconds: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, method: str, route: str, stats: QueryStats):
+        key = (method, route)
+        if key not in self.queries:
+            self.queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS))
+            self.seconds.setdefault(key, Histogram())
+        self.queries[key].observe(stats.count)
+        self.seconds[key].observe(stats.seconds)
+
+
+route_query_stats = RouteQueryStats()
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app, route_stats: RouteQueryStats = route_query_stats):
+        self.app = app
+        self.route_stats = route_stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and stats.count:
+                timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"'
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = route_template(scope)
+            self.route_stats.observe(scope["method"], route, stats)
+            self._warn_repeats(scope["method"], route, stats)
+
+    @staticmethod
+    def _warn_repeats(method: str, route: str, stats: QueryStats):
+        if not SQL_REPEAT_WARN_THRESHOLD or stats.count <= SQL_REPEAT_WARN_THRESHOLD:
+            return
+        for shape, count in stats.shapes.items():
+            if count > SQL_REPEAT_WARN_THRESHOLD:
+                logger.warning(json.dumps({
+                    "event": "repeated_query", "method": method, "route": route,
+                    "count": count, "statement": shape[:300],
+                }))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail when the block runs more than `max_queries` statements, e.g. in a CI check:
+
+        with query_budget(2):
+            client.get("/users/1")
+
+    Counts every statement on the instrumented engines while the block runs,
+    from any thread. The collected QueryStats is yielded for finer checks.
+    """
+    stats = QueryStats()
+    with _budgets_lock:
+        _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        with _budgets_lock:
+            _budgets.remove(stats)
+
+    if stats.count > max_queries:
+        shapes = "\n".join(f"  {count} x {shape[:200]}" for shape, count in stats.shapes.most_common())
+        raise QueryBudgetExceeded(f"{stats.count} queries, budget is {max_queries}:\n{shapes}")
@@ -0,0 +1,91 @@
+"""
+Tests run against a throwaway SQLite database migrated to the latest version,
+with the app served in-process by TestClient. Settings are read from the
+environment when the app modules are imported, so they are set first.
+"""
+import os
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="qiu-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    "JWT_SECRET_KEY": "test-secret-key-for-hs256-signing-0000",
+    "JWT_REFRESH_SECRET_KEY": "test-refresh-secret-key-for-hs256-0000",
+    "ALGORITHM": "HS256",
+    "PASSWORD_HASH_WORKERS": "0",
+    "EXPORT_DIR": os.path.join(_tmp, "exports"),
+    "LOG_LEVEL": "WARNING",
+})
+
+
+@pytest.fixture(scope="session")
+def app():
+    from database import engine
+    from migrations import upgrade
+
+    upgrade(engine)
+    from main import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def empty_tables(app):
+    """Every test starts from empty tables."""
+    yield
+    from sqlalchemy import delete
+
+    from change_feed import deleted_rows
+    from database import SessionLocal
+    from experience_stats import project_experience_stats
+    from models.ConsManager import ConsultingManager
+    from models.ProjExperience import ProjectExperience
+    from models.User import User
+
+    # Through the session, so data versions and cached entities move on too
+    with SessionLocal() as session:
+        for model in (ProjectExperience, ConsultingManager, User):
+            session.query(model).delete()
+        session.execute(delete(deleted_rows))
+        session.execute(delete(project_experience_stats))
+        session.commit()
+
+
+@pytest.fixture
+def create_manager(client):
+    def create(name: str = "Manager", **fields) -> dict:
+        data = {"name": name, "email": f"{name.lower().replace(' ', '.')}@example.com", "department_name": "Consulting"}
+        response = client.post("/consulting-manager/", json={**data, **fields})
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create
+
+
+@pytest.fixture
+def create_experiences(client):
+    def create(count: int, consulting_manager_id: int, **fields) -> list:
+        items = [
+            {
+                "no_sales_order": f"SO-{number:05d}",
+                "customer_name": f"Customer {number}",
+                "project_name": f"Project {number}",
+                "project_year": str(2000 + number % 20),
+                "category": f"Category {number % 3}",
+                "consulting_manager_id": consulting_manager_id,
+                **fields,
+            }
+            for number in range(count)
+        ]
+        response = client.post("/project-experience/bulk", json=items)
+        assert response.status_code == 200, response.text
+        return response.json()["ids"]
+    return create
@@ -0,0 +1,56 @@
+import jwt
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import auth
+from utils import create_access_token, get_current_user_name
+
+
+@pytest.fixture
+def whoami():
+    app = FastAPI()
+
+    @app.get("/whoami")
+    def whoami(name: str = Depends(get_current_user_name)):
+        return {"name": name}
+
+    return TestClient(app)
+
+
+def test_current_user_from_token(whoami):
+    token = create_access_token("1", "admin", "alice")
+    response = whoami.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"name": "alice"}
+
+
+def test_missing_token_is_401(whoami):
+    assert whoami.get("/whoami").status_code == 401
+
+
+def test_invalid_token_is_401(whoami):
+    assert whoami.get("/whoami", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+
+def test_decode_rejects_non_string_token():
+    with pytest.raises(jwt.DecodeError):
+        auth.decode_access_token(None)
+
+
+def test_unknown_algorithm_is_a_configuration_error(monkeypatch):
+    monkeypatch.setenv("ALGORITHM", "HS257")
+    with pytest.raises(ValueError, match="Unknown ALGORITHM 'HS257'"):
+        auth.load_auth_settings()
+    monkeypatch.undo()
+    auth.load_auth_settings()
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256", "PS384", "EdDSA"])
+def test_asymmetric_algorithm_needs_a_public_key(monkeypatch, algorithm):
+    monkeypatch.setenv("ALGORITHM", algorithm)
+    monkeypatch.delenv("JWT_PUBLIC_KEY", raising=False)
+    with pytest.raises(ValueError, match="set JWT_PUBLIC_KEY"):
+        auth.load_auth_settings()
+    monkeypatch.undo()
+    auth.load_auth_settings()
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import text
+
+from database import engine
+
+
+@pytest.fixture
+def unique_sales_orders():
+    """Make the database itself reject a repeated sales order number."""
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TRIGGER test_unique_sales_order BEFORE INSERT ON project_experience "
+            "WHEN EXISTS (SELECT 1 FROM project_experience WHERE no_sales_order = NEW.no_sales_order) "
+            "BEGIN SELECT RAISE(ABORT, 'duplicate sales order'); END"
+        ))
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("DROP TRIGGER test_unique_sales_order"))
+
+
+@pytest.fixture
+def items(create_manager):
+    manager_id = create_manager()["id"]
+
+    def build(sales_orders):
+        return [
+            {"no_sales_order": number, "customer_name": "Customer", "project_name": f"Project {index}",
+             "project_year": "2020", "category": "Category", "consulting_manager_id": manager_id}
+            for index, number in enumerate(sales_orders)
+        ]
+    return build
+
+
+def _total(client):
+    return client.get("/project-experience/?limit=1").json()["total"]
+
+
+def test_atomic_error_names_the_rejected_item(client, unique_sales_orders, items):
+    # The repeat (index 6) sits in the second batch and clashes with a row of the first
+    sales_orders = ["SO-0", "SO-1", "SO-2", "SO-3", "SO-4", "SO-5", "SO-1", "SO-7"]
+
+    response = client.post("/project-experience/bulk?atomic=true&batch_size=4", json=items(sales_orders))
+
+    assert response.status_code == 400
+    [error] = response.json()["detail"]["errors"]
+    assert error["index"] == 6
+    assert "duplicate sales order" in error["detail"]
+    assert _total(client) == 0
+
+
+def test_atomic_error_within_one_batch(client, unique_sales_orders, items):
+    response = client.post("/project-experience/bulk?atomic=true", json=items(["SO-0", "SO-1", "SO-2", "SO-0"]))
+
+    assert response.status_code == 400
+    assert [error["index"] for error in response.json()["detail"]["errors"]] == [3]
+    assert _total(client) == 0
+
+
+def test_non_atomic_reports_only_the_rejected_items(client, unique_sales_orders, items):
+    sales_orders = ["SO-0", "SO-1", "SO-2", "SO-3", "SO-4", "SO-1", "SO-6", "SO-3"]
+
+    response = client.post("/project-experience/bulk?batch_size=4", json=items(sales_orders))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted"] == 6
+    assert [error["index"] for error in body["errors"]] == [5, 7]
+    assert _total(client) == 6
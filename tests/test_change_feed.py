@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+import change_feed
+from change_feed import deleted_rows
+from database import utcnow
+from pagination import encode_cursor
+
+
+def _sync(client, url, since=None, limit=1000, **extra):
+    """Every change after `since`, following has_more. Returns (changes, last token)."""
+    collected = []
+    while True:
+        params = {"limit": limit, **extra}
+        if since is not None:
+            params["since"] = since
+        page = client.get(url, params=params).json()
+        collected += page["changes"]
+        since = page["next_token"]
+        if not page["has_more"]:
+            return collected, since
+
+
+@pytest.fixture
+def no_lag(monkeypatch):
+    # Tokens move up to the newest change instead of staying CHANGES_LAG behind
+    monkeypatch.setattr(change_feed, "CHANGES_LAG", 0)
+
+
+def test_full_sync_then_incremental(client, create_manager, no_lag):
+    first, second = create_manager("First"), create_manager("Second")
+
+    changes, token = _sync(client, "/consulting-manager/changes", limit=1)
+    assert [(change["op"], change["id"]) for change in changes] == [("upsert", first["id"]), ("upsert", second["id"])]
+    assert changes[0]["data"]["name"] == "First"
+    assert _sync(client, "/consulting-manager/changes", token)[0] == []
+
+    third = create_manager("Third")
+    assert client.delete(f"/consulting-manager/{first['id']}").status_code == 200
+    changes, token = _sync(client, "/consulting-manager/changes", token)
+    assert [(change["op"], change["id"]) for change in changes] == [("upsert", third["id"]), ("delete", first["id"])]
+
+
+def test_update_is_sent_again(client, create_manager, create_experiences, no_lag):
+    manager, other = create_manager("A"), create_manager("B")
+    experience_id = create_experiences(1, manager["id"])[0]
+    _, token = _sync(client, "/project-experience/changes")
+
+    client.put(f"/project-experience/{experience_id}", json={"consulting_manager_id": other["id"]})
+    changes, _ = _sync(client, "/project-experience/changes", token, fields="id,consulting_manager_id")
+    assert changes == [{
+        "op": "upsert", "id": experience_id, "at": changes[0]["at"],
+        "data": {"id": experience_id, "consulting_manager_id": other["id"]},
+    }]
+
+
+def test_changes_within_the_lag_come_again(client, create_manager):
+    manager = create_manager()
+    changes, token = _sync(client, "/consulting-manager/changes")
+    again, _ = _sync(client, "/consulting-manager/changes", token)
+    assert [change["id"] for change in changes] == [change["id"] for change in again] == [manager["id"]]
+
+
+def test_timestamps_are_utc(client, create_manager):
+    create_manager()
+    at = client.get("/consulting-manager/changes").json()["changes"][0]["at"]
+    assert abs(datetime.fromisoformat(at) - utcnow()) < timedelta(minutes=1)
+
+
+@pytest.mark.parametrize("limit", [0, 10_001])
+def test_limit_is_bounded(client, limit):
+    assert client.get(f"/users/changes?limit={limit}").status_code == 422
+
+
+def test_expired_token_is_410(client):
+    expired = utcnow() - timedelta(days=change_feed.CHANGES_RETENTION_DAYS + 1)
+    token = encode_cursor([expired, 1, expired, 1])
+    assert client.get(f"/project-experience/changes?since={token}").status_code == 410
+
+
+def test_prune_drops_old_tombstones():
+    from database import engine
+
+    with engine.begin() as connection:
+        connection.execute(insert(deleted_rows), [
+            {"table_name": "users", "row_id": 1, "deleted_at": utcnow() - timedelta(days=change_feed.CHANGES_RETENTION_DAYS + 1)},
+            {"table_name": "users", "row_id": 2, "deleted_at": utcnow()},
+        ])
+        assert change_feed.prune(connection) == 1
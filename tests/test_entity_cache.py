@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+
+import entity_cache as entity_cache_module
+from entity_cache import RedisBackend, entity_cache
+
+
+def test_update_checks_manager_in_the_write_transaction(client, create_manager, create_experiences):
+    from database import engine
+
+    kept, gone = create_manager("Kept"), create_manager("Gone")
+    experience_id = create_experiences(1, kept["id"])[0]
+    # Cached here, then deleted by "another worker" this process never hears of
+    assert client.get(f"/consulting-manager/{gone['id']}").status_code == 200
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM consulting_managers WHERE id = :id"), {"id": gone["id"]})
+
+    response = client.put(f"/project-experience/{experience_id}", json={"consulting_manager_id": gone["id"]})
+    assert response.status_code == 404
+    assert client.get(f"/project-experience/{experience_id}").json()["consulting_manager_id"] == kept["id"]
+
+    response = client.put(f"/project-experience/{experience_id}", json={"consulting_manager_id": kept["id"]})
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", classmethod(lambda cls, url: fakeredis.FakeRedis(server=server)))
+    backend = RedisBackend("redis://cache", ttl=60)
+    monkeypatch.setattr(entity_cache, "backend", backend)
+    monkeypatch.setattr(entity_cache_module, "ENTITY_CACHE_BACKEND", "redis")
+    return backend
+
+
+def test_redis_backend_round_trip(client, redis_cache, create_manager):
+    manager = create_manager("Cached")
+    hits = entity_cache.hits
+
+    assert client.get(f"/consulting-manager/{manager['id']}").json()["name"] == "Cached"
+    assert redis_cache.get(f"entity:consulting_managers:{manager['id']}") is not None
+    assert client.get(f"/consulting-manager/{manager['id']}").json()["name"] == "Cached"
+    assert entity_cache.hits == hits + 1
+    assert client.get("/internal/entity-cache").json()["entries"] == 1
+
+    # An ORM delete drops the key in Redis once committed
+    assert client.delete(f"/consulting-manager/{manager['id']}").status_code == 200
+    assert redis_cache.get(f"entity:consulting_managers:{manager['id']}") is None
+    assert client.get(f"/consulting-manager/{manager['id']}").status_code == 404
+
+
+def test_redis_backend_prefix_invalidation(redis_cache):
+    for key in range(1500):
+        redis_cache.set(f"entity:users:{key}", b"{}")
+    redis_cache.set("entity:consulting_managers:1", b"{}")
+
+    entity_cache.invalidate_table("users")
+    assert len(redis_cache) == 1
+    assert redis_cache.get("entity:consulting_managers:1") == b"{}"
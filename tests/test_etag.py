@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+import pytest
+from sqlalchemy import text
+
+import data_version
+from database import engine
+from models.ConsManager import ConsultingManager
+
+
+def _revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    return first, client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+
+def _rename_manager(manager_id, name):
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        session.get(ConsultingManager, manager_id).name = name
+        session.commit()
+
+
+def test_list_304_until_a_write(client, create_manager, create_experiences):
+    manager = create_manager()
+    create_experiences(3, manager["id"])
+
+    first, again = _revalidate(client, "/project-experience/?limit=2")
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    # Other query parameters, other tag
+    assert client.get("/project-experience/?limit=3", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+
+    create_experiences(1, manager["id"])
+    changed = client.get("/project-experience/?limit=2", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json()["total"] == 4
+
+
+def test_detail_304_until_the_row_changes(client, create_manager, create_experiences):
+    first_manager, second_manager = create_manager("First"), create_manager("Second")
+    experience_id = create_experiences(2, first_manager["id"])[0]
+    url = f"/project-experience/{experience_id}"
+
+    first, again = _revalidate(client, url)
+    assert again.status_code == 304
+
+    client.put(url, json={"consulting_manager_id": second_manager["id"]})
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json()["consulting_manager_id"] == second_manager["id"]
+
+
+def test_weak_and_listed_tags_match(client):
+    first = client.get("/consulting-manager/")
+    tag = first.headers["ETag"]
+    assert client.get("/consulting-manager/", headers={"If-None-Match": f'"other", W/{tag}'}).status_code == 304
+
+
+@pytest.mark.parametrize("url", [
+    "/project-experience/stats",
+    "/project-experience/stats/consulting_manager",
+    "/project-experience/stats/category?breakdown=consulting_manager",
+    "/project-experience/?expand=consulting_manager",
+])
+def test_manager_rename_invalidates_responses_with_names(client, create_manager, create_experiences, url):
+    manager = create_manager("Before")
+    create_experiences(2, manager["id"])
+
+    first, again = _revalidate(client, url)
+    assert again.status_code == 304
+
+    _rename_manager(manager["id"], "After")
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert "After" in changed.text and "Before" not in changed.text
+
+
+def test_manager_rename_keeps_stats_without_names_cached(client, create_manager, create_experiences):
+    manager = create_manager("Before")
+    create_experiences(2, manager["id"])
+
+    first = client.get("/project-experience/stats/category")
+    _rename_manager(manager["id"], "After")
+    assert client.get(
+        "/project-experience/stats/category", headers={"If-None-Match": first.headers["ETag"]}
+    ).status_code == 304
+
+
+def test_tags_come_from_stored_versions_not_process_state(client, create_manager, create_experiences, monkeypatch):
+    create_experiences(2, create_manager()["id"])
+    first = client.get("/project-experience/")
+
+    # Another worker: none of this process's in-memory versions
+    monkeypatch.setattr(data_version, "_versions", defaultdict(int))
+    assert client.get("/project-experience/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_commit_by_another_worker_changes_the_tag(client, create_manager, create_experiences):
+    create_experiences(2, create_manager()["id"])
+    first = client.get("/project-experience/")
+
+    # What another worker's Session commit leaves behind, without touching this process
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE project_experience SET category = 'Elsewhere'"))
+        connection.execute(text(
+            "UPDATE data_versions SET version = version + 1 WHERE table_name = 'project_experience'"
+        ))
+
+    changed = client.get("/project-experience/", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert {item["category"] for item in changed.json()["data"]} == {"Elsewhere"}
+
+
+def test_detail_tag_follows_the_rows_updated_at(client, create_manager, create_experiences):
+    experience_id = create_experiences(1, create_manager()["id"])[0]
+    url = f"/project-experience/{experience_id}"
+    first, again = _revalidate(client, url)
+    assert again.status_code == 304
+
+    with engine.begin() as connection:
+        connection.execute(
+            text("UPDATE project_experience SET updated_at = :now WHERE id = :id"),
+            {"now": "2999-01-01 00:00:00.000000", "id": experience_id},
+        )
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
@@ -0,0 +1,84 @@
+"""
+Each list filter and sort of GET /project-experience/ is answered from the
+index made for it (migration 0003). The queries are built like the route's
+and checked with SQLite's EXPLAIN QUERY PLAN, the planner left to its own
+choices.
+"""
+import pytest
+from sqlalchemy import func, select
+
+from fieldsets import field_columns, response_fields
+from models.ProjExperience import ProjectExperience
+from pagination import _after, parse_sort
+from routes.proj_experience_routes import EXPERIENCE_SORTS, _experience_filters
+from schemas.ProjManagerSchema import ProjectExperienceResponse
+
+FILTER_PARAMS = (
+    "project_year", "project_year_from", "project_year_to", "category", "consulting_manager_id", "customer_name_prefix",
+)
+# Last row of the previous page, for the cursor queries
+CURSOR_VALUES = {"id": 5000, "project_year": "2010", "customer_name": "Customer 12"}
+
+
+def _queries(session, params: dict, sort):
+    """The offset page, cursor page and COUNT queries the list runs for `params` and `sort`."""
+    sort_column, descending = parse_sort(ProjectExperience, sort, EXPERIENCE_SORTS)
+    filters = _experience_filters(*[params.get(name) for name in FILTER_PARAMS])
+    fields = response_fields(ProjectExperienceResponse, None)
+    query = session.query(*field_columns(ProjectExperience, fields, sort_column)).filter(*filters)
+
+    keys = [sort_column, ProjectExperience.id] if sort_column is not ProjectExperience.id else [sort_column]
+    order = [column.desc() if descending else column for column in keys]
+    cursor = [CURSOR_VALUES[column.key] for column in keys]
+    return {
+        "offset": query.order_by(*order).limit(50).statement,
+        "cursor": query.filter(_after(keys, cursor, descending)).order_by(*order).limit(51).statement,
+        "count": select(func.count()).select_from(query.subquery()),
+    }
+
+
+def _plan(connection, statement) -> list:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    return [row[3] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+
+
+@pytest.mark.parametrize("params, index", [
+    ({"project_year": "2010"}, "ix_project_experience_year"),
+    ({"project_year_from": 2005, "project_year_to": 2015}, "ix_project_experience_year"),
+    ({"category": "Category 3"}, "ix_project_experience_category_year"),
+    ({"category": "Category 3", "project_year": "2010"}, "ix_project_experience_category_year"),
+    ({"category": "Category 3", "project_year_from": 2005}, "ix_project_experience_category_year"),
+    ({"consulting_manager_id": 7}, "ix_project_experience_manager_year"),
+    ({"consulting_manager_id": 7, "project_year": "2010"}, "ix_project_experience_manager_year"),
+    ({"consulting_manager_id": 7, "project_year_to": 2015}, "ix_project_experience_manager_year"),
+    ({"customer_name_prefix": "Customer 12"}, "ix_project_experience_customer"),
+])
+@pytest.mark.parametrize("sort", [None, "project_year", "-customer_name", "-id"])
+def test_filter_uses_its_index(params, index, sort):
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        connection = session.connection()
+        for kind, statement in _queries(session, params, sort).items():
+            plan = _plan(connection, statement)
+            assert any(f"INDEX {index} " in line for line in plan), (kind, plan)
+            assert not any(line.startswith("SCAN project_experience") for line in plan), (kind, plan)
+
+
+@pytest.mark.parametrize("sort, index", [
+    ("project_year", "ix_project_experience_year"),
+    ("-project_year", "ix_project_experience_year"),
+    ("customer_name", "ix_project_experience_customer"),
+    ("-customer_name", "ix_project_experience_customer"),
+])
+def test_sort_walks_its_index(sort, index):
+    from database import SessionLocal
+
+    with SessionLocal() as session:
+        connection = session.connection()
+        queries = _queries(session, {}, sort)
+        for kind in ("offset", "cursor"):
+            plan = _plan(connection, queries[kind])
+            assert any(f"INDEX {index}" in line for line in plan), (kind, plan)
+            # Read in index order, stopping after the page, not sorted afterwards
+            assert not any("TEMP B-TREE FOR ORDER BY" in line for line in plan), (kind, plan)
@@ -0,0 +1,72 @@
+from sqlalchemy import delete, select, text, update
+
+from database import SessionLocal, engine
+from experience_stats import project_experience_stats, rebuild
+from models.ProjExperience import ProjectExperience
+
+
+def _counts():
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(project_experience_stats).where(project_experience_stats.c.count > 0)
+        ).all()
+    return sorted(tuple(row) for row in rows)
+
+
+def _recounted():
+    with engine.begin() as connection:
+        rebuild(connection)
+    return _counts()
+
+
+def test_bulk_insert_and_orm_writes_keep_counts(create_manager, create_experiences):
+    manager = create_manager()
+    ids = create_experiences(6, manager["id"])
+
+    with SessionLocal() as session:
+        session.get(ProjectExperience, ids[0]).category = "Moved"
+        session.delete(session.get(ProjectExperience, ids[1]))
+        session.commit()
+
+    counts = _counts()
+    assert counts == _recounted()
+    assert (manager["id"], "2000", "Moved", 1) in counts
+
+
+def test_update_and_delete_statements_rebuild_on_commit(create_manager, create_experiences):
+    manager = create_manager()
+    create_experiences(6, manager["id"])
+
+    with SessionLocal() as session:
+        session.execute(update(ProjectExperience).where(ProjectExperience.category == "Category 0").values(category="Renamed"))
+        session.execute(delete(ProjectExperience).where(ProjectExperience.project_year == "2005"))
+        session.commit()
+
+    counts = _counts()
+    assert counts == _recounted()
+    assert sum(count for *_, count in counts) == 5
+    assert all(category != "Category 0" for _, _, category, _ in counts)
+
+
+def test_rolled_back_statement_leaves_counts(create_manager, create_experiences):
+    manager = create_manager()
+    create_experiences(3, manager["id"])
+    before = _counts()
+
+    with SessionLocal() as session:
+        session.execute(delete(ProjectExperience))
+        session.rollback()
+        session.commit()
+
+    assert _counts() == before
+
+
+def test_raw_sql_needs_the_rebuild_command(create_manager, create_experiences):
+    manager = create_manager()
+    create_experiences(3, manager["id"])
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE project_experience SET category = 'Raw'"))
+
+    assert all(category != "Raw" for _, _, category, _ in _counts())
+    assert _recounted() == [(manager["id"], f"200{n}", "Raw", 1) for n in range(3)]
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+
+import sql_metrics
+from export_formats import ExportFormat
+from export_jobs import ExportJob, ExportJobs
+
+
+def _wait_done(client, job: dict) -> dict:
+    deadline = time.monotonic() + 10
+    while job["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline, job
+        time.sleep(0.02)
+        job = client.get(f"/project-experience/exports/{job['id']}").json()
+    return job
+
+
+def test_csv_export_job(client, create_manager, create_experiences):
+    create_experiences(25, create_manager("Exporter")["id"])
+
+    response = client.post("/project-experience/exports", json={"format": "csv"})
+    assert response.status_code == 202
+    assert response.headers["Location"].endswith(f"/project-experience/exports/{response.json()['id']}")
+
+    job = _wait_done(client, response.json())
+    assert job["status"] == "done"
+    assert (job["rows_written"], job["total_rows"]) == (25, 25)
+
+    download = client.get(job["download_url"])
+    lines = download.text.splitlines()
+    assert len(lines) == 26
+    assert lines[0].startswith("ID,No Sales Order")
+    assert lines[1].endswith(",Exporter")
+
+    partial = client.get(job["download_url"], headers={"Range": "bytes=0-1"})
+    assert partial.status_code == 206
+    assert partial.content == download.content[:2]
+
+
+def test_jobs_do_not_record_queries_into_the_submitting_request(client, create_manager, create_experiences, monkeypatch):
+    from export_jobs import export_jobs
+
+    create_experiences(5, create_manager()["id"])
+    # So the workers start inside the request below, not in an earlier test's
+    client.portal.call(export_jobs.stop)
+
+    requests = []
+
+    class RecordedStats(sql_metrics.QueryStats):
+        def __init__(self):
+            super().__init__()
+            requests.append(self)
+
+    monkeypatch.setattr(sql_metrics, "QueryStats", RecordedStats)
+    response = client.post("/project-experience/exports", json={"format": "ndjson", "search": "Project"})
+    submitting = requests[-1]
+    count = submitting.count
+
+    assert _wait_done(client, response.json())["status"] == "done"
+    assert submitting.count == count
+
+
+def test_sweep_drops_expired_jobs_and_orphans(tmp_path, monkeypatch):
+    jobs = ExportJobs(workers=1, queue_size=1, directory=str(tmp_path), ttl=60)
+    now = time.time()
+
+    def finished_job(finished_at):
+        job = ExportJob(("key", finished_at), ExportFormat.csv, source=None, directory=str(tmp_path))
+        job.finished_at = finished_at
+        open(job.path, "w").close()
+        jobs._jobs[job.id] = job
+        return job
+
+    expired, fresh = finished_job(now - 120), finished_job(now - 10)
+    orphan = tmp_path / ("0" * 32 + ".xlsx.part")
+    orphan.write_text("")
+    os.utime(orphan, (now - 120, now - 120))
+    unrelated = tmp_path / "notes.txt"
+    unrelated.write_text("")
+    os.utime(unrelated, (now - 120, now - 120))
+
+    asyncio.run(jobs.sweep(now))
+
+    assert jobs.get(expired.id) is None and not os.path.exists(expired.path)
+    assert jobs.get(fresh.id) is fresh and os.path.exists(fresh.path)
+    assert not orphan.exists()
+    assert unrelated.exists()
@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+
+from fieldsets import parse_fields, response_fields, schema_fields
+from schemas.ProjManagerSchema import ProjectExperienceResponse
+
+
+class LegacySchema:
+    """Stands in for a pydantic 1 model: fields only under __fields__."""
+    __fields__ = {"id": None, "name": None}
+
+
+def test_schema_fields_in_declaration_order():
+    assert schema_fields(ProjectExperienceResponse)[-1] == "id"
+    assert schema_fields(LegacySchema) == ("id", "name")
+
+
+def test_parse_fields_keeps_schema_order():
+    assert parse_fields(LegacySchema, "name, id") == ("id", "name")
+    assert response_fields(LegacySchema, None) == ("id", "name")
+
+
+def test_parse_fields_rejects_unknown():
+    with pytest.raises(HTTPException) as error:
+        parse_fields(LegacySchema, "id,password")
+    assert error.value.status_code == 400
+
+
+def test_list_and_detail_with_fields(client, create_manager, create_experiences):
+    ids = create_experiences(3, create_manager()["id"])
+    page = client.get("/project-experience/?fields=project_name,id").json()
+    assert page["data"][0] == {"project_name": "Project 0", "id": ids[0]}
+    assert client.get(f"/project-experience/{ids[1]}?fields=customer_name").json() == {"customer_name": "Customer 1"}
+    assert client.get("/project-experience/?fields=password").status_code == 400
@@ -0,0 +1,168 @@
+import io
+import zipfile
+
+import pytest
+
+import spreadsheet_reader
+from spreadsheet_reader import SharedStrings
+
+FIELDS = ("no_sales_order", "customer_name", "project_name", "project_year", "category")
+
+
+def _import(client, name, content, content_type="application/octet-stream"):
+    return client.post("/project-experience/import", files={"file": (name, content, content_type)})
+
+
+def _csv(*lines):
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _listed(client):
+    items = client.get("/project-experience/", params={"limit": 1000}).json()["data"]
+    return sorted(tuple(item[field] for field in FIELDS) + (item["consulting_manager_id"],) for item in items)
+
+
+def test_xlsx_export_round_trip(client, create_manager, create_experiences):
+    manager = create_manager("Round Trip")
+    ids = create_experiences(5, manager["id"])
+    before = _listed(client)
+    exported = client.get("/project-experience/export/xlsx").content
+
+    for experience_id in ids[:2]:
+        assert client.delete(f"/project-experience/{experience_id}").status_code == 200
+
+    response = _import(client, "export.xlsx", exported)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"inserted": 2, "skipped": 3, "errored": 0, "errors": []}
+    # Same rows again, the manager resolved from its name
+    assert _listed(client) == before
+
+
+def test_csv_bad_rows_are_reported_by_row_number(client, create_manager):
+    manager = create_manager("Jane")
+    response = _import(client, "rows.csv", _csv(
+        "ID,No Sales Order,Customer Name,Project Name,Project Year,Category,Consulting Manager",
+        ",SO-1,Customer,Project,2020,Cat,Jane",
+        ",SO-2,Customer,Project,2020,,Jane",
+        "abc,SO-3,Customer,Project,2020,Cat,Jane",
+        ",SO-4,Customer,Project,2020,Cat,Nobody",
+        ",SO-5,Customer,Project,20201,Cat,Jane",
+        ",,,,,,",
+        f",SO-7,Customer,Project,2021,Cat,{manager['id']}",
+    ))
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["inserted"], body["skipped"], body["errored"]) == (2, 1, 4)
+    assert [(error["row"], error["detail"]) for error in body["errors"]] == [
+        (3, "category is required"),
+        (4, "id must be an integer"),
+        (5, "Unknown consulting manager 'Nobody'"),
+        (6, "project_year is longer than 4 characters"),
+    ]
+    assert [row[0] for row in _listed(client)] == ["SO-1", "SO-7"]
+
+
+def test_rows_with_an_existing_id_are_skipped(client, create_manager, create_experiences):
+    existing = create_experiences(1, create_manager()["id"])[0]
+
+    response = _import(client, "rows.csv", _csv(
+        "id,no_sales_order,customer_name,project_name,project_year,category",
+        f"{existing},SO-OLD,Customer,Project,2020,Cat",
+        "999999,SO-NEW,Customer,Project,2020,Cat",
+        ",SO-NONE,Customer,Project,2020,Cat",
+    ))
+
+    assert response.json() == {"inserted": 2, "skipped": 1, "errored": 0, "errors": []}
+    assert "SO-OLD" not in [row[0] for row in _listed(client)]
+
+
+def test_missing_header_column_is_a_400(client):
+    response = _import(client, "rows.csv", _csv("No Sales Order,Customer Name,Project Name,Project Year", "SO-1,C,P,2020"))
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing columns: category"
+
+
+@pytest.mark.parametrize("content", [b"not a zip file", b"PK\x03\x04 truncated", b""])
+def test_non_zip_xlsx_is_a_400(client, content):
+    response = _import(client, "upload.xlsx", content)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] in ("Invalid XLSX file", "File is empty")
+
+
+def test_zip_without_a_workbook_is_a_400(client):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("hello.txt", "hi")
+
+    assert _import(client, "upload.xlsx", buffer.getvalue()).status_code == 400
+
+
+def test_unsupported_file_type_is_a_400(client):
+    assert _import(client, "upload.txt", b"x", "text/plain").status_code == 400
+
+
+def _shared_strings_xlsx(rows) -> bytes:
+    """A minimal workbook whose text cells all point into xl/sharedStrings.xml, as Excel writes them."""
+    main = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    strings = {}
+    sheet_rows = []
+    for row_number, values in enumerate(rows, start=1):
+        cells = "".join(
+            f'<c r="{chr(65 + column)}{row_number}" t="s"><v>{strings.setdefault(value, len(strings))}</v></c>'
+            for column, value in enumerate(values)
+        )
+        sheet_rows.append(f'<row r="{row_number}">{cells}</row>')
+    shared = "".join(f"<si><t>{value}</t></si>" for value in strings)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("xl/workbook.xml", (
+            f'<workbook xmlns="{main}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        archive.writestr("xl/_rels/workbook.xml.rels", (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/></Relationships>'
+        ))
+        archive.writestr("xl/worksheets/sheet1.xml", f'<worksheet xmlns="{main}"><sheetData>{"".join(sheet_rows)}</sheetData></worksheet>')
+        archive.writestr("xl/sharedStrings.xml", f'<sst xmlns="{main}">{shared}</sst>')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("memory_limit, spills", [(100, True), (1 << 20, False)])
+def test_xlsx_with_shared_strings(client, monkeypatch, memory_limit, spills):
+    content = _shared_strings_xlsx(
+        [("No Sales Order", "Customer Name", "Project Name", "Project Year", "Category")]
+        + [(f"SO-{number}", f"Customer {number}", f"Project {number}", "2020", "Cat") for number in range(50)]
+    )
+
+    spilled = []
+    monkeypatch.setattr(spreadsheet_reader, "XLSX_SHARED_STRINGS_MEMORY", memory_limit)
+    monkeypatch.setattr(SharedStrings, "_BATCH", 7)
+    close = SharedStrings.close
+    monkeypatch.setattr(SharedStrings, "close", lambda self: spilled.append(self.spilled) or close(self))
+
+    response = _import(client, "sheet.xlsx", content)
+
+    assert response.json()["inserted"] == 50
+    assert spilled == [spills]
+    assert sorted(row[2] for row in _listed(client)) == sorted(f"Project {number}" for number in range(50))
+
+
+def test_shared_strings_lookup():
+    strings = SharedStrings(10)
+    for number in range(25):
+        strings.append(f"string {number}")
+    strings.finish()
+
+    assert strings.spilled
+    assert len(strings) == 25
+    assert [strings[index] for index in (0, 13, 24)] == ["string 0", "string 13", "string 24"]
+    with pytest.raises(IndexError):
+        strings[25]
+    strings.close()
@@ -0,0 +1,70 @@
+import pytest
+
+from pagination import encode_cursor
+
+
+def _walk(client, url, limit):
+    """Every page of `url` in cursor mode; returns the pages' items."""
+    pages, cursor = [], ""
+    while cursor is not None:
+        response = client.get(url, params={"cursor": cursor, "limit": limit})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert len(body["data"]) <= limit
+        pages.append(body["data"])
+        cursor = body["next_cursor"]
+    return pages
+
+
+@pytest.mark.parametrize("sort", [None, "id", "-id", "project_year", "-project_year", "customer_name", "-customer_name"])
+def test_cursor_pages_cover_every_row_once_in_order(client, create_manager, create_experiences, sort):
+    ids = create_experiences(23, create_manager()["id"])
+    url = "/project-experience/" + (f"?sort={sort}" if sort else "")
+
+    pages = _walk(client, url, 5)
+    items = [item for page in pages for item in page]
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert sorted(item["id"] for item in items) == sorted(ids)
+    # Same order as offset paging, ties broken by id
+    assert items == client.get(url, params={"limit": 100}).json()["data"]
+
+
+def test_exact_page_multiple_has_no_empty_last_page(client, create_manager, create_experiences):
+    create_experiences(10, create_manager()["id"])
+
+    pages = _walk(client, "/project-experience/", 5)
+
+    assert [len(page) for page in pages] == [5, 5]
+
+
+def test_rows_inserted_behind_the_cursor_do_not_shift_pages(client, create_manager, create_experiences):
+    manager_id = create_manager()["id"]
+    ids = create_experiences(10, manager_id)
+
+    first = client.get("/project-experience/", params={"cursor": "", "limit": 5}).json()
+    create_experiences(3, manager_id)
+    second = client.get("/project-experience/", params={"cursor": first["next_cursor"], "limit": 5}).json()
+
+    assert [item["id"] for item in first["data"] + second["data"]] == ids
+
+
+@pytest.mark.parametrize("url", ["/project-experience/", "/users/", "/consulting-manager/"])
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(["a", "b", "c"]), encode_cursor(["x"]), "eyJ"])
+def test_invalid_cursor_is_a_400(client, url, cursor):
+    response = client.get(url, params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_cursor_of_another_sort_is_a_400(client, create_manager, create_experiences):
+    create_experiences(6, create_manager()["id"])
+    cursor = client.get("/project-experience/", params={"cursor": "", "limit": 2, "sort": "project_year"}).json()["next_cursor"]
+
+    # A (year, id) cursor does not fit the single id column of the default sort
+    assert client.get("/project-experience/", params={"cursor": cursor}).status_code == 400
+
+
+def test_unknown_sort_is_a_400(client):
+    assert client.get("/project-experience/", params={"sort": "category"}).status_code == 400
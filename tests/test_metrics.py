@@ -0,0 +1,37 @@
+import pytest
+
+import request_metrics
+from metrics import route_template
+
+
+@pytest.fixture
+def templates(monkeypatch):
+    """Route label of each request path, as the request metrics record it."""
+    seen = {}
+
+    def recording(scope):
+        seen[scope["path"]] = route_template(scope)
+        return seen[scope["path"]]
+
+    monkeypatch.setattr(request_metrics, "route_template", recording)
+    return seen
+
+
+def test_included_routes_are_labelled_with_the_prefix(client, templates):
+    client.get("/project-experience/12345")
+    client.get("/users/5")
+    client.get("/no-such-route")
+
+    assert templates == {
+        "/project-experience/12345": "/project-experience/{project_id}",
+        "/users/5": "/users/{user_id}",
+        "/no-such-route": "unmatched",
+    }
+
+
+@pytest.mark.parametrize("template", ["/{user_id}", "/users/{user_id}"])
+def test_prefixed_and_unprefixed_route_paths_agree(template):
+    class Route:
+        path_format = template
+
+    assert route_template({"route": Route(), "path": "/users/5"}) == "/users/{user_id}"
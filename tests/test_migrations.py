@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+
+import migrations
+from database import Base
+
+
+@pytest.fixture
+def make_engine(tmp_path, app):
+    """Engines on fresh SQLite files. Depends on `app` so every model is registered on Base.metadata."""
+    engines = []
+
+    def make(name: str):
+        engine = create_engine(f"sqlite:///{tmp_path / name}")
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def _schema(engine) -> dict:
+    """Tables of the app (not the migration bookkeeping or FTS shadow tables) with their columns, keys and indexes."""
+    inspector = inspect(engine)
+    schema = {}
+    for table in inspector.get_table_names():
+        if table == "schema_migrations" or "_fts" in table:
+            continue
+        schema[table] = {
+            "columns": sorted(
+                (column["name"], str(column["type"]), column["nullable"]) for column in inspector.get_columns(table)
+            ),
+            "primary_key": inspector.get_pk_constraint(table)["constrained_columns"],
+            "foreign_keys": sorted(
+                (tuple(key["constrained_columns"]), key["referred_table"], tuple(key["referred_columns"]))
+                for key in inspector.get_foreign_keys(table)
+            ),
+            "indexes": sorted(
+                (index["name"], tuple(index["column_names"]), bool(index["unique"]))
+                for index in inspector.get_indexes(table)
+            ),
+        }
+    return schema
+
+
+def test_upgrade_builds_the_schema_of_the_models(make_engine):
+    migrated, created = make_engine("migrated.db"), make_engine("created.db")
+
+    assert migrations.upgrade(migrated) == list(range(1, migrations.latest_version() + 1))
+    Base.metadata.create_all(created)
+
+    assert _schema(migrated) == _schema(created)
+
+
+def test_upgrade_is_idempotent(make_engine):
+    engine = make_engine("twice.db")
+    migrations.upgrade(engine)
+    schema = _schema(engine)
+
+    assert migrations.upgrade(engine) == []
+    assert _schema(engine) == schema
+    assert migrations.current_version(engine) == migrations.latest_version()
+
+
+def test_upgrade_in_steps(make_engine):
+    engine = make_engine("steps.db")
+
+    assert migrations.upgrade(engine, target=2) == [1, 2]
+    assert migrations.current_version(engine) == 2
+    assert migrations.upgrade(engine) == list(range(3, migrations.latest_version() + 1))
+
+
+def test_database_created_by_create_all_is_adopted(make_engine):
+    legacy, fresh = make_engine("legacy.db"), make_engine("fresh.db")
+    Base.metadata.create_all(legacy)
+
+    migrations.upgrade(legacy)
+    migrations.upgrade(fresh)
+
+    assert _schema(legacy) == _schema(fresh)
+
+
+def test_status(make_engine):
+    engine = make_engine("status.db")
+    latest = migrations.latest_version()
+
+    assert migrations.status(engine) == {
+        "current": 0,
+        "latest": latest,
+        "pending": [f"{number:04d} {name}" for number, name in enumerate(migrations.MIGRATIONS, start=1)],
+    }
+
+    migrations.upgrade(engine, target=1)
+    assert migrations.status(engine)["current"] == 1
+    assert len(migrations.status(engine)["pending"]) == latest - 1
+
+    migrations.upgrade(engine)
+    assert migrations.status(engine) == {"current": latest, "latest": latest, "pending": []}
@@ -0,0 +1,102 @@
+"""
+Statements per request, pinned with `query_budget` so an N+1 regression (a
+query per row or per page item) fails here. Pages are large and rows have
+many managers, so a per-row query would blow the budget.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from sql_metrics import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture
+def experiences(create_manager, create_experiences):
+    ids = []
+    for number in range(10):
+        manager = create_manager(f"Manager {number}")
+        ids += create_experiences(10, manager["id"])
+    return ids
+
+
+@pytest.mark.parametrize("limit", [5, 100])
+def test_list(client, experiences, limit):
+    # The ETag's stored versions, COUNT and the page
+    with query_budget(3):
+        assert client.get(f"/project-experience/?limit={limit}").status_code == 200
+
+
+@pytest.mark.parametrize("limit", [5, 100])
+def test_list_expanded(client, experiences, limit):
+    # Stored versions, COUNT, the page and one IN query for the managers of the page
+    with query_budget(4):
+        response = client.get(f"/project-experience/?limit={limit}&expand=consulting_manager")
+    assert response.status_code == 200
+    assert all(row["consulting_manager"] for row in response.json()["data"])
+
+
+def test_list_cursor_pages(client, experiences):
+    with query_budget(3):
+        page = client.get("/project-experience/?cursor=&limit=30&total_mode=none").json()
+    with query_budget(2):
+        client.get(f"/project-experience/?cursor={page['next_cursor']}&limit=30&total_mode=none")
+
+
+def test_detail(client, experiences):
+    # The row's updated_at for the ETag, then the row
+    with query_budget(2):
+        assert client.get(f"/project-experience/{experiences[0]}").status_code == 200
+    # From the entity cache
+    with query_budget(1):
+        assert client.get(f"/project-experience/{experiences[0]}").status_code == 200
+
+
+def test_detail_expanded(client, experiences):
+    with query_budget(3):
+        response = client.get(f"/project-experience/{experiences[0]}?expand=consulting_manager")
+    assert response.json()["consulting_manager"]["name"] == "Manager 0"
+    with query_budget(1):
+        client.get(f"/project-experience/{experiences[0]}?expand=consulting_manager")
+
+
+def test_stats(client, experiences):
+    # Stored versions, one grouped query per dimension and one for the manager names
+    with query_budget(5):
+        assert client.get("/project-experience/stats").json()["total"] == 100
+    with query_budget(4):
+        client.get("/project-experience/stats/consulting_manager?breakdown=project_year")
+
+
+@pytest.mark.parametrize("count, batch_size, budget", [(1, 1000, 4), (100, 1000, 4), (2500, 1000, 10)])
+def test_bulk(client, create_manager, count, batch_size, budget):
+    manager = create_manager()
+    items = [
+        {
+            "no_sales_order": f"SO-{number}", "customer_name": "Customer", "project_name": "Project",
+            "project_year": "2020", "category": "Category", "consulting_manager_id": manager["id"],
+        }
+        for number in range(count)
+    ]
+    # One manager lookup, then an INSERT, a counts upsert and a stored-version bump per batch
+    with query_budget(budget):
+        response = client.post(f"/project-experience/bulk?batch_size={batch_size}", json=items)
+    assert response.json()["inserted"] == count
+
+
+def test_budget_exceeded_lists_the_statements(client, experiences):
+    with pytest.raises(QueryBudgetExceeded, match="3 queries, budget is 1"):
+        with query_budget(1):
+            client.get("/project-experience/?limit=5")
+
+
+def test_failed_statement_leaves_no_stale_start():
+    from database import engine
+
+    with engine.connect() as connection:
+        with query_budget(10) as stats:
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM no_such_table"))
+            connection.execute(text("SELECT 1"))
+        assert connection.info["query_start"] == []
+    # The failed statement is counted too
+    assert stats.count == 2
@@ -0,0 +1,180 @@
+import asyncio
+
+import pytest
+
+import request_coalescing
+from request_coalescing import SingleFlight
+
+
+class Loader:
+    """A load function that blocks until released and counts its runs."""
+
+    def __init__(self, value="result"):
+        self.value = value
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.value, BaseException):
+            raise self.value
+        return self.value
+
+
+async def _settle():
+    # Let every started task reach its first await
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_requests_share_one_flight():
+    flight, load = SingleFlight(0, 10), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(5)]
+        await _settle()
+        load.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == ["result"] * 5
+    assert load.calls == 1
+    assert (flight.flights, flight.joined, flight.cache_hits) == (1, 4, 0)
+    assert flight.stats()["in_flight"] == 0
+    assert flight.stats()["collapsed_ratio"] == 0.8
+
+
+def test_different_keys_do_not_coalesce():
+    flight, load = SingleFlight(0, 10), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        tasks = [asyncio.create_task(flight.run(key, load)) for key in ("a", "b")]
+        await _settle()
+        load.release.set()
+        return await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert load.calls == 2
+    assert flight.joined == 0
+
+
+def test_an_exception_reaches_every_waiter_and_is_not_cached():
+    flight, load = SingleFlight(60, 10), Loader(ValueError("boom"))
+
+    async def scenario():
+        load.release = asyncio.Event()
+        tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(3)]
+        await _settle()
+        load.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        load.value = "recovered"
+        return results, await flight.run("key", load)
+
+    results, retried = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["boom"] * 3
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retried == "recovered"
+    assert load.calls == 2
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_flight():
+    flight, load = SingleFlight(0, 10), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        leader = asyncio.create_task(flight.run("key", load))
+        waiter = asyncio.create_task(flight.run("key", load))
+        await _settle()
+        waiter.cancel()
+        await _settle()
+        load.release.set()
+        return await leader, waiter.cancelled()
+
+    assert asyncio.run(scenario()) == ("result", True)
+    assert load.calls == 1
+
+
+def test_waiters_start_over_when_the_leader_is_cancelled():
+    flight, load = SingleFlight(0, 10), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        leader = asyncio.create_task(flight.run("key", load))
+        waiters = [asyncio.create_task(flight.run("key", load)) for _ in range(3)]
+        await _settle()
+        leader.cancel()
+        await _settle()
+        load.release.set()
+        return leader, await asyncio.gather(*waiters)
+
+    leader, results = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert results == ["result"] * 3
+    # One new flight, run by the first waiter and joined by the others
+    assert load.calls == 2
+    assert flight.flights == 2
+
+
+def test_results_are_reused_for_the_cache_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(request_coalescing.time, "monotonic", lambda: now[0])
+    flight, load = SingleFlight(5, 10), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        load.release.set()
+        results = [await flight.run("key", load)]
+        now[0] += 5
+        results.append(await flight.run("key", load))
+        now[0] += 0.1
+        results.append(await flight.run("key", load))
+        return results
+
+    assert asyncio.run(scenario()) == ["result"] * 3
+    assert load.calls == 2
+    assert flight.cache_hits == 1
+
+
+def test_cache_keeps_the_most_recent_keys():
+    flight, load = SingleFlight(60, 2), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        load.release.set()
+        for key in ("a", "b", "c", "c", "a"):
+            await flight.run(key, load)
+
+    asyncio.run(scenario())
+    # "a" was evicted by "c"; the second "c" was a hit
+    assert load.calls == 4
+    assert flight.cache_hits == 1
+
+
+def test_disabled_runs_every_load(monkeypatch):
+    monkeypatch.setattr(request_coalescing, "COALESCE_ENABLED", False)
+    flight, load = SingleFlight(60, 10), Loader()
+
+    async def scenario():
+        load.release = asyncio.Event()
+        tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(3)]
+        await _settle()
+        load.release.set()
+        return await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert load.calls == 3
+    assert flight.flights == 0
+
+
+@pytest.mark.parametrize("path", ["/project-experience/", "/project-experience/stats"])
+def test_a_committed_write_starts_a_new_flight(client, create_manager, create_experiences, path):
+    manager_id = create_manager()["id"]
+    create_experiences(2, manager_id)
+    before = client.get(path).json()
+
+    create_experiences(1, manager_id)
+
+    assert client.get(path).json() != before
@@ -0,0 +1,77 @@
+import itertools
+
+import pytest
+from sqlalchemy import or_
+
+import search
+from database import SessionLocal
+from models.ProjExperience import ProjectExperience
+
+VALUES = [
+    "Café Ünïcode", "CAFÉ ÜNÏCODE", "cafe unicode", "Straße", "東京 project",
+    "50% off", "50 percent", "100%", "snake_case", "snakeXcase", "a_b",
+    "MiXeD Case", "mixed case", "MIXED CASE", "ab", "xy",
+]
+
+TERMS = [
+    "café", "CAFÉ", "Ünï", "ünï", "straße", "東京",
+    "50%", "% o", "0%", "_case", "e_c", "a_b", "%",  "_",
+    "mixed case", "MIX", "xed c",
+    "ab", "a", "é", "",
+]
+
+FIELD_SETS = [None] + [
+    ",".join(fields)
+    for size in (1, 2, 3)
+    for fields in itertools.combinations(search.SEARCH_COLUMNS["project_experience"], size)
+]
+
+
+@pytest.fixture
+def experiences(client, create_manager):
+    manager_id = create_manager()["id"]
+    # Each value lands in a different column of different rows, so field sets matter
+    items = []
+    for number, value in enumerate(VALUES):
+        for project_name, customer_name, no_sales_order in (
+            (value, f"Customer {number}", f"SO-{number}"),
+            (f"Project {number}", value, f"SO-C{number}"),
+            (f"Project S{number}", f"Customer S{number}", value),
+        ):
+            items.append({
+                "no_sales_order": no_sales_order, "customer_name": customer_name, "project_name": project_name,
+                "project_year": "2020", "category": "Category", "consulting_manager_id": manager_id,
+            })
+    response = client.post("/project-experience/bulk", json=items)
+    assert response.status_code == 200, response.text
+
+
+def _ilike_ids(term, search_in):
+    fields = search_in.split(",") if search_in else search.SEARCH_COLUMNS["project_experience"][:1]
+    pattern = f"%{term}%"
+    with SessionLocal() as session:
+        query = session.query(ProjectExperience.id).filter(
+            or_(*[getattr(ProjectExperience, field).ilike(pattern) for field in fields])
+        )
+        return sorted(id_ for id_, in query)
+
+
+def test_trigram_index_is_in_use(client):
+    assert "project_experience" in search._fts_tables
+
+
+@pytest.mark.parametrize("search_in", FIELD_SETS)
+def test_indexed_search_matches_ilike(client, experiences, search_in):
+    for term in TERMS:
+        params = {"search": term, "limit": 1000}
+        if search_in:
+            params["search_in"] = search_in
+        response = client.get("/project-experience/", params=params)
+        assert response.status_code == 200, response.text
+
+        found = sorted(item["id"] for item in response.json()["data"])
+        assert found == _ilike_ids(term, search_in), term
+
+
+def test_unknown_search_field_is_a_400(client):
+    assert client.get("/project-experience/", params={"search": "x", "search_in": "category"}).status_code == 400
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import database
+from routes import helper
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "async"])
+def db_async(request, monkeypatch):
+    """Serve the test in both DB_ASYNC modes, whichever one the suite was started with."""
+    if request.param and database.AsyncSessionLocal is None:
+        # NullPool: no aiosqlite connection outlives the request loop that opened it
+        engine = create_async_engine(database.async_database_url(database.DATABASE_URL), poolclass=NullPool)
+        monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(engine, autoflush=False, expire_on_commit=False))
+    monkeypatch.setattr(database, "DB_ASYNC", request.param)
+    # Several chunks per response
+    monkeypatch.setattr(helper, "STREAM_CHUNK_SIZE", 7)
+    return request.param
+
+
+def _stream(client, url, **params):
+    response = client.get(url, params=params)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text == "" or response.text.endswith("\n")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_matches_list(client, create_manager, create_experiences, db_async):
+    create_experiences(30, create_manager()["id"])
+    listed = client.get("/project-experience/", params={"limit": 100, "sort": "id"}).json()["data"]
+
+    streamed = _stream(client, "/project-experience/stream")
+
+    assert len(streamed) == len(listed) == 30
+    assert [item["id"] for item in streamed] == [item["id"] for item in listed]
+    for item, listed_item in zip(streamed, listed):
+        assert item == {key: listed_item[key] for key in item}
+
+
+def test_stream_fields(client, create_manager, create_experiences, db_async):
+    create_experiences(10, create_manager()["id"])
+    listed = client.get("/project-experience/", params={"limit": 100, "fields": "id,project_name"}).json()["data"]
+
+    streamed = _stream(client, "/project-experience/stream", fields="id,project_name")
+
+    assert streamed == listed
+
+
+def test_stream_empty(client, db_async):
+    assert _stream(client, "/project-experience/stream") == []
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+from database import run_blocking
+
+
+def _user(username="alice", email="alice@example.com"):
+    return {"username": username, "name": "Alice", "password": "secret", "email": email}
+
+
+def test_create_and_login(client):
+    created = client.post("/users/", json=_user())
+    assert created.status_code == 200
+    assert "password" not in created.json()
+
+    login = client.post("/users/login", json={"username": "alice", "password": "secret"})
+    assert login.status_code == 200
+    assert login.json()["username"] == "alice"
+    assert client.post("/users/login", json={"username": "alice", "password": "wrong"}).status_code == 400
+
+
+def test_duplicate_username_or_email(client):
+    assert client.post("/users/", json=_user()).status_code == 200
+
+    response = client.post("/users/", json=_user(email="other@example.com"))
+    assert (response.status_code, response.json()["detail"]) == (400, "Username already exists")
+    response = client.post("/users/", json=_user(username="bob"))
+    assert (response.status_code, response.json()["detail"]) == (400, "Email already exists")
+
+
+def test_concurrent_creates_of_the_same_user(client):
+    # All of them hash the password at the same time, then race to insert
+    with ThreadPoolExecutor(6) as pool:
+        responses = list(pool.map(lambda _: client.post("/users/", json=_user()), range(6)))
+
+    assert sorted(response.status_code for response in responses) == [200] + [400] * 5
+    assert client.get("/users/").json()["total"] == 1
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+
+
+def test_run_blocking_outside_the_event_loop_calls_now():
+    calls = []
+    run_blocking(FakeSession(), lambda: calls.append(1))
+    assert calls == [1]
+
+
+def test_run_blocking_on_the_event_loop_is_deferred():
+    calls, session = [], FakeSession()
+
+    async def on_loop():
+        run_blocking(session, lambda: calls.append(1))
+
+    asyncio.run(on_loop())
+    assert calls == []
+    assert len(session.info["database.deferred"]) == 1
+
+
+def test_password_jobs_over_the_cap_get_503(client, monkeypatch):
+    monkeypatch.setattr(utils, "PASSWORD_HASH_MAX_PENDING", 0)
+
+    response = client.post("/users/", json=_user())
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/users/").json()["total"] == 0
+
+
+def test_a_blocked_password_job_fills_the_cap(client, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    hash_password = utils.get_hashed_password
+
+    def blocking_hash(password):
+        started.set()
+        release.wait(10)
+        return hash_password(password)
+
+    monkeypatch.setattr(utils, "PASSWORD_HASH_MAX_PENDING", 1)
+    monkeypatch.setattr(utils, "get_hashed_password", blocking_hash)
+
+    with ThreadPoolExecutor(1) as pool:
+        first = pool.submit(client.post, "/users/", json=_user())
+        assert started.wait(10)
+
+        rejected = client.post("/users/", json=_user("bob", "bob@example.com"))
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "1"
+
+        release.set()
+        assert first.result().status_code == 200
+
+    # The slot is free again
+    assert client.post("/users/", json=_user("bob", "bob@example.com")).status_code == 200
+
+
+def test_update_of_a_missing_user_does_not_hash(client, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(utils, "get_hashed_password", lambda password: hashed.append(password) or "hash")
+
+    response = client.patch("/users/999999", json={"password": "new-secret"})
+
+    assert response.status_code == 404
+    assert hashed == []
@@ -0,0 +1,55 @@
+import io
+
+import openpyxl
+
+from routes import proj_experience_routes
+
+HEADERS = ["ID", "No Sales Order", "Customer Name", "Project Name", "Project Year", "Category", "Consulting Manager"]
+
+
+def _workbook(response):
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return openpyxl.load_workbook(io.BytesIO(response.content), read_only=True)
+
+
+def test_export_is_a_readable_workbook(client, create_manager, create_experiences):
+    manager = create_manager("Smith & Sons <EU>")
+    ids = create_experiences(5, manager["id"])
+    create_experiences(1, manager["id"], no_sales_order="SO-X", project_name="R&D <beta>\x01\x0b done", category=" padded ")
+
+    workbook = _workbook(client.get("/project-experience/export/xlsx"))
+
+    assert workbook.sheetnames == ["Project Experiences"]
+    rows = list(workbook.active.iter_rows(values_only=True))
+    assert list(rows[0]) == HEADERS
+    assert len(rows) == 1 + 6
+    assert rows[1] == (ids[0], "SO-00000", "Customer 0", "Project 0", "2000", "Category 0", "Smith & Sons <EU>")
+    # XML special characters survive, characters XML 1.0 cannot hold are dropped, edge spaces are kept
+    assert rows[-1][3] == "R&D <beta> done"
+    assert rows[-1][5] == " padded "
+
+
+def test_export_spanning_several_chunks(client, create_manager, create_experiences, monkeypatch):
+    monkeypatch.setattr(proj_experience_routes, "EXPORT_CHUNK_SIZE", 4)
+    ids = create_experiences(11, create_manager()["id"])
+
+    rows = list(_workbook(client.get("/project-experience/export/xlsx")).active.iter_rows(values_only=True))
+
+    assert [row[0] for row in rows[1:]] == ids
+
+
+def test_export_without_rows_has_the_header_only(client):
+    rows = list(_workbook(client.get("/project-experience/export/xlsx")).active.iter_rows(values_only=True))
+
+    assert [list(row) for row in rows] == [HEADERS]
+
+
+def test_export_filtered_by_search(client, create_manager, create_experiences):
+    manager_id = create_manager()["id"]
+    create_experiences(3, manager_id)
+    create_experiences(1, manager_id, no_sales_order="SO-FIND", project_name="Needle project")
+
+    rows = list(_workbook(client.get("/project-experience/export/xlsx?search=needle")).active.iter_rows(values_only=True))
+
+    assert [row[3] for row in rows[1:]] == ["Needle project"]
@@ -1,15 +1,21 @@
+import asyncio
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Union, Any, Optional
 
 import jwt
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
+from auth import decode_access_token, get_auth_settings
 
-# Password hashing
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Password hashing; passlib and bcrypt are imported on first use, not at startup
+_password_context = None
 
 # OAuth2 token dependency
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
@@ -19,12 +25,74 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 # Password Utilities
 # -------------------------
 
+def _get_password_context():
+    global _password_context
+    if _password_context is None:
+        from passlib.context import CryptContext
+        _password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _password_context
+
+
 def get_hashed_password(password: str) -> str:
-    return password_context.hash(password)
+    return _get_password_context().hash(password)
 
 
 def verify_password(password: str, hashed_pass: str) -> bool:
-    return password_context.verify(password, hashed_pass)
+    return _get_password_context().verify(password, hashed_pass)
+
+
+# bcrypt holds the GIL for ~250 ms per call, so routes run it in a separate
+# process pool. 0 workers runs it in the threadpool of this process instead.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# Hash/verify calls allowed in flight (running + queued) before answering 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+_password_pool: Optional[ProcessPoolExecutor] = None
+_password_pending = 0
+
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        # spawn: never fork a process that already runs an event loop and threads
+        _password_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _password_pool
+
+
+async def _run_password_job(fn, *args):
+    global _password_pending
+    if _password_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many password operations in progress, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    _password_pending += 1
+    try:
+        if PASSWORD_HASH_WORKERS <= 0:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(_get_password_pool(), fn, *args)
+    finally:
+        _password_pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_password_job(get_hashed_password, password)
+
+
+async def verify_password_async(password: str, hashed_pass: str) -> bool:
+    return await _run_password_job(verify_password, password, hashed_pass)
+
+
+def shutdown_password_pool():
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
 
 
 # -------------------------
@@ -35,28 +103,28 @@ def get_current_user_name(token: str = Depends(oauth2_scheme)) -> str:
     """
     Extract username ("un") from JWT token.
     """
-    try:
-        payload = jwt.decode(
-            token,
-            os.getenv("JWT_SECRET_KEY"),
-            algorithms=[os.getenv("ALGORITHM")]
+    if not token:
+        raise HTTPException(
+            status_code=401,
+            detail="Unauthorized: Missing token"
         )
 
-        username: str = payload.get("un")
-        if username is None:
-            raise HTTPException(
-                status_code=401,
-                detail="Unauthorized: Invalid token"
-            )
-
-        return username
-
-    except jwt.exceptions.PyJWTError:
+    try:
+        claims = decode_access_token(token)
+    except (jwt.exceptions.PyJWTError, ValidationError):
         raise HTTPException(
             status_code=401,
             detail="Unauthorized: Invalid or expired token"
         )
 
+    if claims.un is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Unauthorized: Invalid token"
+        )
+
+    return claims.un
+
 
 def create_access_token(
     subject: Union[str, Any],
@@ -64,12 +132,13 @@ def create_access_token(
     name: str,
     expires_delta: int = None
 ) -> str:
+    settings = get_auth_settings()
 
     if expires_delta is not None:
         exp = datetime.now() + expires_delta
     else:
         exp = datetime.now() + timedelta(
-            minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 600))
+            minutes=settings.access_token_expire_minutes
         )
 
     payload = {
@@ -81,8 +150,8 @@ def create_access_token(
 
     return jwt.encode(
         payload,
-        os.getenv("JWT_SECRET_KEY"),
-        os.getenv("ALGORITHM")
+        settings.signing_key,
+        settings.algorithm
     )
 
 
@@ -91,6 +160,7 @@ def create_refresh_token(
     name: str,
     expires_delta: int = None
 ) -> str:
+    settings = get_auth_settings()
 
     if expires_delta is not None:
         exp = datetime.now() + expires_delta
@@ -105,6 +175,6 @@ def create_refresh_token(
 
     return jwt.encode(
         payload,
-        os.getenv("JWT_REFRESH_SECRET_KEY"),
-        os.getenv("ALGORITHM")
+        settings.refresh_signing_key,
+        settings.algorithm
     )
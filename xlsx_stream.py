@@ -0,0 +1,199 @@
+"""
+Minimal streaming SpreadsheetML (XLSX) writer.
+
+openpyxl keeps every cell of a workbook in memory (or, in write-only mode,
+in a temp file that is only zipped on ``save``), so nothing can be sent to the
+client until the whole sheet is built. This writer emits the zip container
+incrementally instead: rows are serialized straight into a deflate stream and
+the compressed bytes are handed back to the caller as soon as they exist.
+Memory use depends only on the flush interval, not on the number of rows.
+"""
+import re
+import zipfile
+from typing import Any, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+
+# Characters that are not allowed in XML 1.0 documents (same set openpyxl strips)
+_ILLEGAL_CHARACTERS_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Style 0 is the default cell, style 1 is the header (bold white on blue, centered)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><color rgb="FFFFFFFF"/><name val="Calibri"/></font>'
+    '</fonts>'
+    '<fills count="3">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FF366092"/><bgColor rgb="FF366092"/></patternFill></fill>'
+    '</fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center"/></xf>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class _ChunkSink:
+    """
+    Write-only file object for ``zipfile``.
+    It has no ``tell``/``seek``, so ZipFile switches to streaming mode
+    (data descriptors after each entry) and never rewinds.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def column_letter(index: int) -> str:
+    """1-based column index -> Excel column letter (1 -> A, 27 -> AA)."""
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def column_width(max_length: Optional[int]) -> int:
+    """Same rule the old openpyxl export used: longest value + 2, capped at 50."""
+    return min((max_length or 0) + 2, 50)
+
+
+def _cell(ref: str, value: Any, style: str = "") -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style}><v>{value}</v></c>'
+
+    text = _ILLEGAL_CHARACTERS_RE.sub("", str(value))
+    space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ""
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def _row(row_idx: int, letters: Sequence[str], values: Sequence[Any], style: str = "") -> str:
+    cells = "".join(
+        _cell(f"{letter}{row_idx}", value, style)
+        for letter, value in zip(letters, values)
+    )
+    return f'<row r="{row_idx}">{cells}</row>'
+
+
+class XlsxStreamWriter:
+    """
+    Incremental XLSX writer with a single sheet.
+
+    `start()` returns the bytes of the zip entries preceding the sheet,
+    `write_rows()` the compressed bytes produced so far (often empty, deflate
+    buffers internally) and `finish()` the remainder of the file.
+    `widths` must be known up front because `<cols>` precedes `<sheetData>`.
+    """
+
+    def __init__(self, headers: Sequence[str], widths: Optional[Sequence[int]] = None, sheet_title: str = "Sheet1"):
+        self.headers = headers
+        self.widths = widths
+        self.sheet_title = sheet_title
+        self._letters = [column_letter(i) for i in range(1, len(headers) + 1)]
+        self._next_row = 2
+        self._sink = _ChunkSink()
+        self._zip = None
+        self._sheet = None
+
+    def start(self) -> bytes:
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(self.sheet_title[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>',
+        )
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self._zip.writestr("xl/styles.xml", _STYLES)
+
+        cols = ""
+        if self.widths:
+            cols = "<cols>" + "".join(
+                f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                for i, width in enumerate(self.widths, start=1)
+            ) + "</cols>"
+
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True)
+        self._sheet.write((
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f'{cols}<sheetData>'
+            + _row(1, self._letters, self.headers, ' s="1"')
+        ).encode("utf-8"))
+        return self._sink.drain()
+
+    def write_rows(self, rows: Iterable[Sequence[Any]]) -> bytes:
+        for values in rows:
+            self._sheet.write(_row(self._next_row, self._letters, values).encode("utf-8"))
+            self._next_row += 1
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()